@@ -1,33 +1,39 @@
 from flask import request, Response, jsonify, Blueprint, current_app, send_from_directory, url_for, stream_with_context, session
-import json, yt_dlp, base64 , logging, os, uuid, urllib.parse, time, subprocess, re
-from middleware.auth_quard import login_required
-from yt_dlp.utils import sanitize_filename
+import json, base64 , logging, os, uuid, urllib.parse, time, subprocess, re, threading
+from middleware.auth_quard import login_required, get_refresh_cache_stats
 
 
 # Impor SEMUA fungsi scraper
-from scrapper_requests import   search_mahasiswa, search_staff, fetch_photo_from_sicyca, fetch_data_ultah, scrape_krs, scrape_krs_detail, fetch_masa_studi, get_authenticated_session
-from controller.GateController import get_session_status
+from scrapper_requests import   search_mahasiswa, search_staff, fetch_photo_from_sicyca, fetch_photo_status, fetch_photos_concurrent, fetch_data_ultah, scrape_krs, scrape_krs_detail, fetch_masa_studi, get_krs_bundle, krs_detail_params, get_krs_detail_stats, get_search_cache_stats, get_authenticated_session, get_singleflight_stats
+from controller.GateController import get_session_status, get_session_keeper_status, get_session_keeper_summary
+from models.gate import get_credential_cache_stats
+from models.photo_store import THUMB_SIZES, THUMB_FORMATS
+from connection import get_pool_stats
 # from app import photo_cache, majorID, executor, JADWAL_STATUS, log_file, _valid_role
 api_bp = Blueprint('api', __name__)
 
 
 # variabel global untuk diinject
-photo_cache = None
+photo_store = None
 majorID = None
 executor = None
 get_jadwal_status_func = None
 log_file = None
 _valid_role = None
+jadwal_store = None
+directory_index = None
 
 # Fungsi untuk inisialisasi variabel global
-def init_api(cache, major, execu, status_getter, logfile, valid_role_func):
-    global photo_cache, majorID, executor, get_jadwal_status_func, log_file, _valid_role
-    photo_cache = cache
+def init_api(photos, major, execu, status_getter, logfile, valid_role_func, store=None, directory=None):
+    global photo_store, majorID, executor, get_jadwal_status_func, log_file, _valid_role, jadwal_store, directory_index
+    photo_store = photos
     majorID = major
     executor = execu
     get_jadwal_status_func = status_getter
     log_file = logfile
     _valid_role = valid_role_func
+    jadwal_store = store
+    directory_index = directory
     
     
 # Fungsi untuk membersihkan kode warna ANSI (seperti \u001b[0;32m)
@@ -40,8 +46,9 @@ download_progress = {}
 # Fungsi Hook untuk menangkap progress dari yt-dlp internal
 def my_hook(d, task_id):
     if task_id in download_progress and download_progress[task_id].get('cancelled', False):
+            from yt_dlp.utils import DownloadError
             logging.info(f"[HOOK] Membunuh task {task_id} karena dibatalkan user.")
-            raise yt_dlp.utils.DownloadError("Dibatalkan oleh User")
+            raise DownloadError("Dibatalkan oleh User")
     if d['status'] == 'downloading':
         # Ambil data raw
 # 1. Ambil Data Raw
@@ -122,131 +129,158 @@ def api_status():
             "message": "Gagal terhubung ke server Sicyca (Session Invalid)."
         })
 
+# Indeks direktori lokal: segar -> jawab dari indeks saja; basi (<= MAX_STALE) -> jawab dari indeks
+# + refresh Sicyca di background; belum tercakup / terlalu basi -> cari live lalu simpan ke indeks
+SEARCH_INDEX_FRESH = int(os.getenv("SEARCH_INDEX_FRESH", str(24 * 3600)))
+SEARCH_INDEX_MAX_STALE = int(os.getenv("SEARCH_INDEX_MAX_STALE", str(14 * 24 * 3600)))
+SEARCH_ROLES = {"mahasiswa": (search_mahasiswa, "NIM"), "staff": (search_staff, "NIK")}
+SEARCH_LABELS = {"mahasiswa": "mahasiswa", "staff": "staff/dosen"}
+SEARCH_STREAM_BUFFER = int(os.getenv("SEARCH_STREAM_BUFFER", "40"))  # potongan template per chunk stream
+_search_refreshing = set()
+_search_refreshing_lock = threading.Lock()
+
+def _search_live(role, query, user_id):
+    search_fn, id_key = SEARCH_ROLES[role]
+    rows = search_fn(query, user_id)
+    if rows is None:
+        return None  # Sicyca gagal (sesi/timeout): bukan "tidak ada hasil", jangan dicatat
+    if directory_index:
+        directory_index.record(role, query, rows, id_key)
+    return rows
+
+def _search_refresh_background(role, query, user_id):
+    key = (role, directory_index.normalize(query))
+    with _search_refreshing_lock:
+        if key in _search_refreshing:
+            return
+        _search_refreshing.add(key)
+    def run():
+        try:
+            _search_live(role, query, user_id)
+        finally:
+            with _search_refreshing_lock:
+                _search_refreshing.discard(key)
+    executor.submit(run)
+
+def _search_rows(query):
+    """
+    Hasil per role + info sumber: {'mahasiswa': [...], 'staff': [...]}, sources, age (detik, data indeks tertua).
+    sources per role: 'index' / 'live' / 'error' (Sicyca gagal -> hasil role itu kosong tapi bukan "tidak ada").
+    """
+    user_id = session.get('user_id')
+    now = time.time()
+    results, sources, ages, live = {}, {}, [], {}
+    for role in SEARCH_ROLES:
+        rows, fetched_at = directory_index.lookup(role, query) if directory_index else (None, None)
+        age = now - fetched_at if fetched_at else None
+        if rows is not None and age <= SEARCH_INDEX_MAX_STALE:
+            if age > SEARCH_INDEX_FRESH:
+                _search_refresh_background(role, query, user_id)
+            results[role], sources[role] = rows, "index"
+            ages.append(age)
+        else:
+            live[role] = executor.submit(_search_live, role, query, user_id)
+    for role, future in live.items():
+        rows = future.result()
+        results[role], sources[role] = (rows, "live") if rows is not None else ([], "error")
+    return results, sources, (max(ages) if ages else 0)
+
+def _format_age(seconds):
+    if seconds < 3600:
+        return f"{max(1, int(seconds // 60))} menit"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} jam"
+    return f"{int(seconds // 86400)} hari"
+
+def _search_items(results):
+    """Baris mentah per role -> item tampilan (dipakai partial HTML dan mode JSON)."""
+    items = []
+    for row in results["mahasiswa"]:
+        nim = str(row.get('NIM') or '')
+        if majorID:
+            prodi_name = majorID.get(nim[2:7], 'Prodi Tidak Dikenal') if nim and len(nim) >= 7 else 'Prodi Tidak Dikenal'
+        else:
+            prodi_name = 'Sistem Belum Siap'
+        items.append({
+            'Tipe': 'Mahasiswa',
+            'Nama': row.get('Nama'),
+            'IDMhs': nim,
+            'Status': row.get('Status'),
+            'Prodi': prodi_name,
+            'Detail': row.get('Dosen Wali')
+        })
+    for row in results["staff"]:
+        items.append({
+            'Tipe': 'Staff/Dosen',
+            'Nama': row.get('Nama'),
+            'IDStaff': row.get('NIK'),
+            'Bagian': row.get('Bagian'),
+            'Detail': row.get('Email')
+        })
+    return items
+
 # Untuk mencari mahasiswa atau staff
+# Default: HTML dari partial Jinja (templates/partials/search_results.html), di-stream per potongan.
+# {"format": "json"} (atau Accept: application/json): data mentah, dirender Alpine di frontend.
 @api_bp.route('/search', methods=['POST'])
+@login_required
 def api_search():
-    data = request.get_json()   
+    data = request.get_json(silent=True)   # body rusak / bukan JSON -> None, bukan exception
+    want_json = (isinstance(data, dict) and data.get('format') == 'json') or request.accept_mimetypes.best == 'application/json'
+    if not isinstance(data, dict) or not isinstance(data.get('query', ''), str):
+        if want_json:
+            return jsonify({"status": "error", "message": "Body harus JSON berisi 'query'."}), 400
+        return "<p class='text-gray-400 p-4'>Permintaan tidak valid.</p>", 400
     query = data.get('query', '').strip()
     if not query:
+        if want_json:
+            return jsonify({"status": "error", "message": "Query tidak boleh kosong."}), 400
         return "<p class='text-gray-400 p-4'>Query tidak boleh kosong.</p>"
 
-    future_mahasiswa = executor.submit(search_mahasiswa, query)
-    future_staff = executor.submit(search_staff, query)
-    df_mahasiswa = future_mahasiswa.result()
-    df_staff = future_staff.result()
-
-    combined_results = []
-    if not df_mahasiswa.empty:
-        for _, row in df_mahasiswa.iterrows():
-            nim = row.get('NIM', '')
-            if majorID:
-                prodi_name = majorID.get(nim[2:7], 'Prodi Tidak Dikenal') if nim and len(nim) >= 7 else 'Prodi Tidak Dikenal'
-            else:
-                prodi_name = 'Sistem Belum Siap'
-            combined_results.append({
-                'Tipe': 'Mahasiswa',
-                'Nama': row.get('Nama'),
-                'IDMhs': nim,
-                'Status': row.get('Status'),
-                'Prodi': prodi_name,
-                'Detail': row.get('Dosen Wali')
-            })
-    if not df_staff.empty:
-        for _, row in df_staff.iterrows():
-            combined_results.append({
-                'Tipe': 'Staff/Dosen',
-                'Nama': row.get('Nama'),
-                'IDStaff': row.get('NIK'),
-                'Bagian': row.get('Bagian'),
-                'Detail': row.get('Email')
-            })
-
-    html_output = ""
-    if combined_results:
-        for item in combined_results:
-            detail_html = ""
-            if item['Tipe'] == 'Mahasiswa':
-                detail_html = f"""
-           <dt class="font-medium text-gray-400">NIM</dt>
-<dd class="col-span-2 text-white flex items-center" id="nim-{item['IDMhs']}">
-    <span>{item['IDMhs']}</span>
-    <!-- Tombol Salin di sebelah NIM -->
-<button class="copy-id-btn p-1 text-gray-400 hover:text-white transition" 
-    data-name="{item['IDMhs']}" title="Salin NIM">
-    <svg class="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M8 16H6a2 2 0 01-2-2V6a2 2 0 012-2h8a2 2 0 012 2v2m-6 12h8a2 2 0 002-2v-8a2 2 0 00-2-2h-8a2 2 0 00-2 2v8a2 2 0 002 2z"></path>
-    </svg>
-</button>
-
-
-</dd>
-
-<dt class="font-medium text-gray-400">Status</dt><dd class="col-span-2 text-white">{item['Status']}</dd>
-<dt class="font-medium text-gray-400">Prodi</dt><dd class="col-span-2 text-white">{item['Prodi']}</dd>
-<dt class="font-medium text-gray-400">Dosen Wali</dt><dd class="col-span-2 text-white">{item['Detail']}</dd>
-
-<!-- Tombol di bawah Dosen Wali -->
-<dd class="col-span-3 mt-2">
-    <button class="photo-btn px-3 py-1 text-sm bg-blue-600 hover:bg-blue-500 rounded text-white" data-role="mahasiswa" data-id="{item['IDMhs']}">Lihat Foto</button>
-</dd>
-
-                """
-            else:
-                detail_html = f"""
-                <dt class="font-medium text-gray-400">NIK</dt><dd class="col-span-2 text-white">{item['IDStaff']}</dd>
-                <dt class="font-medium text-gray-400">Bagian</dt><dd class="col-span-2 text-white">{item['Bagian']}</dd>
-                <dt class="font-medium text-gray-400">Email</dt><dd class="col-span-2 text-white">{item['Detail']}</dd>
-                <!-- Tombol di bawah Email -->
-                <dd class="col-span-3 mt-2">
-                    <button class="photo-btn px-3 py-1 text-sm bg-blue-600 hover:bg-blue-500 rounded text-white" data-role="staff" data-id="{item['IDStaff']}">Lihat Foto</button>
-                </dd>
-                """
-
-            html_output += f"""
-            <div x-data="{{ isOpen: false }}" class="border-b border-gray-700 last:border-b-0">
-    <div class="w-full text-left p-4 ">
-        <div class="flex justify-between items-center">
-            <div class="flex items-center space-x-2">
-               <button class="copy-name-btn flex items-center p-1 text-white hover:text-gray-400 transition" 
-    data-name="{item['Nama']}" title="Salin Nama">
-    <span class="font-semibold text-white mr-2 hover:text-gray-400">{item['Nama']}</span>
-    <!-- Ikon Salin -->
-    <svg class="w-4 h-4 hover:text-gray-400" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M8 16H6a2 2 0 01-2-2V6a2 2 0 012-2h8a2 2 0 012 2v2m-6 12h8a2 2 0 002-2v-8a2 2 0 00-2-2h-8a2 2 0 00-2 2v8a2 2 0 002 2z"></path>
-    </svg>
-</button>
-
-
-                <span class="text-xs text-gray-300 ml-2 px-2 py-1 bg-gray-600 rounded-full">{item['Tipe']}</span>
-            </div>
-
-            <!-- SVG yang bisa dipencet untuk membuka dan menutup deskripsi -->
-            <div class="hover:bg-gray-700 focus:outline-none rounded-full p-2">
-            <svg @click="isOpen = !isOpen" class="w-5 h-5 transform transition-transform duration-300 cursor-pointer" 
-                 :class="{{'rotate-180': isOpen}}" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M19 9l-7 7-7-7"></path>
-            </svg>
-            </div>
-        </div>
-    </div>
-
-    <!-- Bagian detail yang terbuka atau tertutup -->
-    <div x-show="isOpen" x-transition class="p-4 bg-gray-900 border-t border-gray-700 text-sm">
-        <dl class="grid grid-cols-3 gap-2 text-sm">{detail_html}</dl>
-    </div>
-</div>
-
-            """
-        
-        # **JS: Overlay untuk Tombol (Delegation untuk Alpine)**
-        # html_output += """
-       
-        # """
+    results, sources, age = _search_rows(query)
+    items = _search_items(results)
+
+    # Sumber & umur data kelihatan di header (dan di atas hasil kalau dari indeks lokal)
+    source_values = set(sources.values())
+    source = source_values.pop() if len(source_values) == 1 else "mixed"
+    headers = {'X-Search-Source': source, 'X-Search-Age': str(int(age))}
+    age_label = _format_age(age) if "index" in sources.values() else None
+    # Sicyca gagal untuk sebagian/semua role: tampilkan sebagai error, bukan "tidak ada data"
+    failed = [SEARCH_LABELS[role] for role, src in sources.items() if src == "error"]
+    error = f"Pencarian {' & '.join(failed)} ke Sicyca gagal, hasil mungkin tidak lengkap. Coba lagi." if failed else None
+    status = 502 if len(failed) == len(sources) else 200
+
+    if want_json:
+        resp = jsonify({
+            "query": query,
+            "source": source,
+            "age_seconds": int(age),
+            "age_label": age_label,
+            "error": error,
+            "count": len(items),
+            "results": items
+        })
+        resp.status_code = status
+        resp.headers.update(headers)
+        return resp
 
-    else:
-        html_output = "<p class='text-gray-400 p-4'>Tidak ada data yang ditemukan.</p>"
+    template = current_app.jinja_env.get_template('partials/search_results.html')
+    stream = template.stream(items=items, age_label=age_label, error=error)
+    stream.enable_buffering(SEARCH_STREAM_BUFFER)
+    return Response(stream_with_context(stream), status=status, mimetype='text/html', headers=headers)  # bukan jsonify
 
-    return html_output  # bukan jsonify
+# Search-as-you-type: hanya dari indeks lokal, tidak pernah menambah request ke Sicyca
+@api_bp.route('/search/suggest', methods=['GET'])
+@login_required
+def api_search_suggest():
+    query = request.args.get('q', '').strip()
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    if len(query) < 2 or not directory_index:
+        return jsonify([])
+    return jsonify(directory_index.suggest(query, limit))
 
 # Endpoint yt-dlp untuk mendapatkan link download YouTube
 @api_bp.route('/get-youtube-info', methods=['POST'])
@@ -260,6 +294,9 @@ def get_youtube_info():
 
     logging.info(f"Menerima permintaan yt-dlp (info) untuk: {url}")
 
+    # yt_dlp berat (~ratusan ms), di-import saat pertama kali dipakai saja
+    import yt_dlp
+
     ydl_opts = {
         'quiet': True, 
         'noplaylist': True,
@@ -369,6 +406,9 @@ def request_conversion():
 
     logging.info(f"Memulai konversi ke {ext_req} ({quality}) untuk {url}...")
 
+    import yt_dlp
+    from yt_dlp.utils import sanitize_filename
+
     # SETUP yt-dlp
     ydl_opts = {
         'quiet': True,
@@ -540,6 +580,27 @@ def api_log():
     return Response("Log file tidak ditemukan.", mimetype='text/plain', status=404)
 
 
+# Statistik internal (pool DB, cache, dll) untuk tuning performa
+@api_bp.route('/stats')
+@login_required
+def api_stats():
+    return jsonify({
+        "db_pool": get_pool_stats(),
+        "refresh_token_cache": get_refresh_cache_stats(),
+        # Status probe hanya milik user ini; user lain cukup angka agregat
+        "session_keeper": {
+            "self": get_session_keeper_status(session.get('user_id')) if session.get('user_id') else None,
+            "summary": get_session_keeper_summary()
+        },
+        "singleflight": get_singleflight_stats(),
+        "gate_credential_cache": get_credential_cache_stats(),
+        "krs_detail_cache": get_krs_detail_stats(),
+        "search_cache": get_search_cache_stats(),
+        "photo_store": photo_store.stats() if photo_store else None,
+        "jadwal_cache": jadwal_store.cache_stats() if jadwal_store else None,
+        "directory_index": directory_index.stats() if directory_index else None
+    })
+
 # Mengecek apakah jadwal ready atau error
 @api_bp.route('/jadwal-status')
 def api_jadwal_status():
@@ -548,7 +609,117 @@ def api_jadwal_status():
         return jsonify(get_jadwal_status_func())
     return jsonify({"status": "unknown", "message": "Status belum diinisialisasi"})
 
-# Mendapatkan foto mahasiswa atau staff dalam base64
+PHOTO_MAX_AGE = int(os.getenv("PHOTO_MAX_AGE", str(7 * 24 * 3600)))    # Cache-Control browser untuk foto
+PHOTO_MISSING_MAX_AGE = 3600                                            # 404 juga boleh di-cache sebentar
+
+def _load_photo(role, id_):
+    """(state, sha, bytes) dari photo_store; state: 'hit' / 'missing' / 'error'."""
+    return photo_store.get_or_fetch(role, id_, fetch_photo_status)
+
+def _photo_variant_args():
+    """
+    (size, format, negotiated) dari query ?size=sm|md|orig & ?format=jpeg|webp.
+    Tanpa ?format -> WebP kalau browser menerima image/webp (header Accept), selain itu JPEG.
+    """
+    size = request.args.get('size', 'orig')
+    fmt = request.args.get('format')
+    if size not in THUMB_SIZES or (fmt and fmt not in THUMB_FORMATS):
+        return None, None, False
+    if fmt:
+        return size, fmt, False
+    # Cek eksplisit: browser lama kirim 'image/*' tapi belum tentu bisa WebP
+    return size, ('webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'), True
+
+# Foto mentah + ETag & Cache-Control -> browser bisa cache & revalidate (304)
+# ?size=sm|md -> thumbnail, format JPEG/WebP sesuai ?format atau header Accept
+@api_bp.route('/photo/<role>/<id_>/raw', methods=['GET'])
+@login_required
+def get_photo_raw(role, id_):
+    if not session.get('user_id'):  # jangan fetch pakai session Gate user default (1)
+        return jsonify({'error': 'Sesi login tidak ditemukan'}), 401
+    if not _valid_role(role):
+        return jsonify({'error': 'Role tidak valid'}), 400
+    
+    if not id_.isdigit():
+        return jsonify({'error': 'ID harus angka'}), 400
+
+    size, fmt, negotiated = _photo_variant_args()
+    if not size:
+        return jsonify({'error': f"size harus {'/'.join(THUMB_SIZES)}, format harus {'/'.join(THUMB_FORMATS)}"}), 400
+
+    state, etag, content, mimetype = photo_store.get_variant(role, id_, size, fmt, fetch_photo_status)
+    if state == "missing":
+        resp = jsonify({'success': False, 'message': 'Foto tidak tersedia'})
+        resp.status_code = 404
+        resp.headers['Cache-Control'] = f'private, max-age={PHOTO_MISSING_MAX_AGE}'
+        return resp
+    if state != "hit":
+        return jsonify({'success': False, 'message': 'Gagal mengambil foto dari Sicyca'}), 502
+
+    headers = {"ETag": f'"{etag}"', "Cache-Control": f"private, max-age={PHOTO_MAX_AGE}"}
+    if negotiated:
+        headers["Vary"] = "Accept"
+    if etag in request.if_none_match:
+        return "", 304, headers
+    return Response(content, mimetype=mimetype, headers=headers)
+
+PHOTO_BATCH_MAX = 60  # 1 halaman hasil pencarian
+
+def _photo_batch_line(role, id_, state, sha, content, cached, inline, size="orig"):
+    line = {"role": role, "id": id_, "status": state, "cached": cached}
+    if state == "hit":
+        line["etag"] = sha
+        line["url"] = url_for('api.get_photo_raw', role=role, id_=id_, **({"size": size} if size != "orig" else {}))
+        if inline:
+            line["image_b64"] = base64.b64encode(content).decode('utf-8')
+    return json.dumps(line) + "\n"
+
+# Batch foto untuk 1 halaman hasil pencarian: cache hit langsung dikirim,
+# miss di-fetch barengan (pool terbatas, satu session) dan di-stream (NDJSON) begitu selesai.
+# Body: {"items": [{"role": "mahasiswa", "id": "2341..."}, ...], "inline": false, "size": "md"}
+@api_bp.route('/photo/batch', methods=['POST'])
+@login_required
+def get_photo_batch():
+    # Fetch pakai session Gate milik user yang login, jangan pernah jatuh ke user default (1)
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Sesi login tidak ditemukan'}), 401
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': "Field 'items' wajib berupa list"}), 400
+    if len(items) > PHOTO_BATCH_MAX:
+        return jsonify({'error': f'Maksimal {PHOTO_BATCH_MAX} foto per batch'}), 400
+    inline = bool(data.get('inline'))
+    size = data.get('size') if data.get('size') in THUMB_SIZES else 'orig'  # cuma untuk URL di respon
+
+    pairs, invalid = [], []
+    for item in items:
+        role = item.get('role') if isinstance(item, dict) else None
+        id_ = str(item.get('id', '')).strip() if isinstance(item, dict) else ''
+        if not _valid_role(role) or not id_.isdigit():
+            invalid.append({"role": role, "id": id_, "status": "invalid"})
+        elif (role, id_) not in pairs:
+            pairs.append((role, id_))
+
+    def generate():
+        for line in invalid:
+            yield json.dumps(line) + "\n"
+        misses = []
+        for role, id_ in pairs:
+            state, sha, content = photo_store.lookup(role, id_)
+            if state is None:
+                misses.append((role, id_))
+            else:
+                yield _photo_batch_line(role, id_, state, sha, content, True, inline, size)
+        for role, id_, content, status in fetch_photos_concurrent(misses, user_id):
+            state, sha, content = photo_store.store_result(role, id_, content, status)
+            yield _photo_batch_line(role, id_, state, sha, content, False, inline, size)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+
+# Mendapatkan foto mahasiswa atau staff dalam base64 (format lama, dipertahankan untuk kompatibilitas)
 @api_bp.route('/photo/<role>/<id_>', methods=['GET'])
 def get_photo(role, id_):
     if not _valid_role(role):
@@ -556,27 +727,14 @@ def get_photo(role, id_):
     
     if not id_.isdigit():
         return jsonify({'error': 'ID harus angka'}), 400
-    
-    # Cek cache dulu
-    cache_key = f"{role}_{id_}"
-    if cache_key in photo_cache:
-        logging.info(f"Foto {role}/{id_} dari cache.")
-        return jsonify({'success': True, 'image_b64': photo_cache[cache_key]})
-    
-    # Fetch dari Sicyca
-    logging.info(f"Fetching foto untuk tombol: {role}/{id_}")  # Ubah log ke "tombol" untuk clarity
-    image_content = fetch_photo_from_sicyca(role, id_)
-    
-    if image_content is None:
-        logging.warning(f"Fetch gagal untuk {role}/{id_}.")
+
+    state, _, image_content = _load_photo(role, id_)
+    if state != "hit":
+        logging.warning(f"Fetch gagal untuk {role}/{id_} ({state}).")
         return jsonify({'success': False, 'message': 'Foto tidak tersedia'})
     
     # Encode ke base64
     image_b64 = base64.b64encode(image_content).decode('utf-8')
-    
-    # Simpan ke cache
-    photo_cache[cache_key] = image_b64
-    
     logging.info(f"Foto {role}/{id_} berhasil di-encode ({len(image_b64)} chars).")
     return jsonify({'success': True, 'image_b64': image_b64})
     
@@ -623,30 +781,31 @@ def data_ultah_alias():
 def api_krs_data():
     """
     Endpoint untuk mengambil data KRS mahasiswa yang sedang login.
+    Data dari cache per user (stale-while-revalidate); ?force=1 untuk paksa ambil ulang.
     """
     logging.info("API: Menerima request untuk data KRS")
     try:
-        # Panggil fungsi scraper (DataFrame)
-        df_krs = scrape_krs()
+        force_refresh = request.args.get('force', 'false').lower() in ['true', '1', 'yes']
+        bundle = get_krs_bundle(force_refresh=force_refresh)
 
-        if df_krs.empty:
+        if not bundle:
             logging.warning("API: Data KRS kosong atau gagal diambil.")
             return jsonify({
                 "success": False,
                 "message": "Data KRS tidak ditemukan atau sesi Sicyca habis.",
                 "data": []
             })
-        masa_studi_text = fetch_masa_studi()
 
-        # Convert DataFrame ke List of Dictionaries (JSON friendly)
-        # orient='records' bikin jadi [{col1:val1, col2:val2}, ...]
-        krs_list = df_krs.to_dict(orient='records')
-        
-        logging.info(f"API: Berhasil mengambil {len(krs_list)} data KRS.")
+        logging.info(f"API: Berhasil mengambil {len(bundle['data_krs'])} data KRS (umur {bundle['age_seconds']}s).")
         return jsonify({
             "success": True,
-            "data_krs": krs_list,
-            "masa_studi": masa_studi_text
+            "data_krs": bundle["data_krs"],
+            "masa_studi": bundle["masa_studi"],
+            # Umur data, biar frontend bisa tampilkan "diperbarui X menit lalu"
+            "fetched_at": int(bundle["fetched_at"]),
+            "age_seconds": bundle["age_seconds"],
+            "stale": bundle["stale"],
+            "refreshing": bundle["refreshing"]
         })
         
     except Exception as e:
@@ -680,17 +839,10 @@ def api_krs_detail():
     # Mapping parameter frontend ke parameter Sicyca URL (?t=...)
     # Sesuai JS: t=kehadiran, t=kehadiranprak, t=nilai, t=matakuliah, t=materikuliah
     
-    params = {
-        "t": req_type
-    }
-    
-    # Masukkan parameter lain jika ada
-    if data.get('mk'): params['mk'] = data.get('mk')
-    if data.get('kls'): params['kls'] = data.get('kls')
-    if data.get('grup'): params['grup'] = data.get('grup')
-    if data.get('nik'): params['nik'] = data.get('nik') # Untuk materi kuliah
+    # Masukkan parameter lain jika ada (mk, kls, grup, nik untuk materi kuliah)
+    params = krs_detail_params(req_type, data.get('mk'), data.get('kls'), data.get('grup'), data.get('nik'))
 
-    # Panggil Scraper
+    # Panggil Scraper (biasanya sudah ada di cache hasil prefetch)
     result = scrape_krs_detail(params)
     
     
@@ -699,22 +851,29 @@ def api_krs_detail():
 
 
 @api_bp.route('/jadwal-list', methods=['GET'])
+@login_required
 def api_jadwal_list():
     """
     Endpoint baru untuk mengambil data jadwal.json mentah.
     """
     try:
-        with open('jadwal.json', 'r', encoding='utf-8') as f:
-            data_json = json.load(f)
-        
-        # Kirim datanya (metadata + list jadwal)
-        return jsonify(data_json)
+        # Snapshot jadwal milik user yang login (tidak pernah jadwal user lain)
+        user_id = session.get('user_id')
+        etag = jadwal_store.etag(user_id)
+        if etag in request.if_none_match:
+            return "", 304, {"ETag": f'"{etag}"'}
+
+        # Kirim datanya (metadata + list jadwal) langsung dari bytes yang sudah di-cache
+        resp = Response(jadwal_store.read_bytes(user_id), mimetype='application/json')
+        resp.set_etag(etag)
+        return resp
         
     except FileNotFoundError:
-        logging.warning("API: jadwal.json tidak ditemukan.")
+        logging.warning(f"API: jadwal user {session.get('user_id')} belum ada.")
+        loading = bool(get_jadwal_status_func) and get_jadwal_status_func().get("status") == "loading"
         return jsonify({
             "error": True, 
-            "message": "File jadwal belum dibuat.",
+            "message": "Jadwal kamu sedang diambil, coba lagi sebentar." if loading else "File jadwal belum dibuat.",
             "data": []
         }), 404
     except Exception as e:
@@ -1,27 +1,32 @@
 # app.py
 
 import os
-import re
 from datetime import datetime
-import pandas as pd
-from flask import Flask, send_from_directory, request, render_template, redirect, url_for, json, session, current_app, make_response, g
+from flask import Flask, send_from_directory, request, render_template, redirect, url_for, json, session, current_app, make_response, g, has_request_context
 from apscheduler.schedulers.background import BackgroundScheduler
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
+import random
+import threading
+import time
 import pytz
 import json
 from datetime import datetime
 import jwt
 # import base64  # Untuk encode image ke base64
 from logging.handlers import RotatingFileHandler
-from cachetools import TTLCache  # Install: pip install cachetools
 from api.api import api_bp, init_api
 from models.auth_api import auth_bp
 from flask_cors import CORS
 
 # Impor SEMUA fungsi scraper
-from scrapper_requests import scrape_data
-from controller.GateController import reset_session_user
+from scrapper_requests import scrape_data, search_mahasiswa, search_staff
+from controller.GateController import reset_session_user, start_session_keeper
+from models.gate import GateUser
+from models.jadwal_store import JadwalStore
+from models.photo_store import PhotoStore
+from models.directory_index import DirectoryIndex
+from models.jadwal_ics import build_ics
 from middleware.auth_quard import login_required
 from werkzeug.middleware.proxy_fix import ProxyFix
 from models.auth_api import _revoke_refresh_token, _revoke_all_user_sessions
@@ -75,8 +80,19 @@ logger.addHandler(file_handler)
 logger.addHandler(stream_handler)
 # ==================================================================
 
-# Setup cache untuk foto (TTL 30 detik, max 100 items)
-photo_cache = TTLCache(maxsize=100, ttl=30)
+# Cache foto: LRU memori (batas byte) + disk content-addressed + negative cache
+PHOTO_DIR = os.getenv("PHOTO_DIR", "photo_cache")
+photo_store = PhotoStore(
+    PHOTO_DIR,
+    mem_budget=int(os.getenv("PHOTO_MEM_BUDGET_MB", "32")) * 1024 * 1024,
+    disk_ttl=int(os.getenv("PHOTO_DISK_TTL", str(30 * 24 * 3600))),
+    negative_ttl=int(os.getenv("PHOTO_NEGATIVE_TTL", str(6 * 3600))),
+    negative_maxsize=int(os.getenv("PHOTO_NEGATIVE_MAXSIZE", "10000")),
+)
+PHOTO_CLEANUP_HOUR = int(os.getenv("PHOTO_CLEANUP_HOUR", "3"))
+# Indeks lokal mahasiswa/staff (SQLite FTS5), diisi dari hasil pencarian + crawl malam opsional
+directory_index = DirectoryIndex(os.getenv("DIRECTORY_DB", "directory_index.sqlite3"),
+                                 result_cap=int(os.getenv("DIRECTORY_RESULT_CAP", "20")))
 logging.info(f"Scheduler timezone diatur ke: {SCHEDULER_TZ}")
 # Jalankan sekali saat start (opsional)
 def boot_scrape_if_needed():
@@ -95,8 +111,29 @@ def boot_scrape_if_needed():
 
 executor = ThreadPoolExecutor(max_workers=3)
 JSON_FILE = 'jadwal.json'
-ICS_FILE = 'jadwal_kegiatan.ics'
 JADWAL_STATUS = {"status": "ready", "message": "Siap."}
+
+# === KONFIGURASI SCRAPING JADWAL MULTI-USER ===
+JADWAL_DIR = os.getenv("JADWAL_DIR", "jadwal_data")             # file per user (selain user default)
+DEFAULT_JADWAL_USER = 1                                          # user default tetap ditulis ke JSON_FILE
+JADWAL_WORKERS = int(os.getenv("JADWAL_WORKERS", "4"))           # maksimal user di-scrape paralel
+JADWAL_HOST_CONCURRENCY = int(os.getenv("JADWAL_HOST_CONCURRENCY", "2"))  # maksimal request barengan ke Sicyca
+JADWAL_JITTER = float(os.getenv("JADWAL_JITTER", "3"))           # jeda acak (detik) sebelum tiap user
+_sicyca_host_limit = threading.BoundedSemaphore(JADWAL_HOST_CONCURRENCY)
+JADWAL_STATUS_BY_USER = {}   # user_id (str) -> {"status", "message"}
+LAST_JADWAL_RUN = {}         # laporan run terakhir (wall time, timing per user, kegagalan)
+
+# Snapshot jadwal: tulis atomik, skip kalau isi sama, simpan N versi terakhir
+JADWAL_KEEP_VERSIONS = int(os.getenv("JADWAL_KEEP_VERSIONS", "5"))
+jadwal_store = JadwalStore(JSON_FILE, JADWAL_DIR, DEFAULT_JADWAL_USER, JADWAL_KEEP_VERSIONS)
+
+def _current_user_id():
+    if session.get('user_id'):
+        return session.get('user_id')
+    if 'user' in g and g.user.get('sub'):
+        return g.user['sub']
+    return None
+
 app.secret_key = os.getenv("SECRET_KEY")  # Untuk session
 # if not app.secret_key:
     
@@ -135,7 +172,6 @@ app.config.update(
 
 
 
-month_translation = { 'Januari': 'January', 'Februari': 'February', 'Maret': 'March', 'April': 'April', 'Mei': 'May', 'Juni': 'June', 'Juli': 'July', 'Agustus': 'August', 'September': 'September', 'Oktober': 'October', 'November': 'November', 'Desember': 'December' }
 majorID = { "39010": "D3 Sistem Informasi", "41010": "S1 Sistem Informasi", "41011": "S1 Sistem Informasi", "41020": "S1 Teknik Komputer", "42010": "S1 Desain Komunikasi Visual", "42020": "S1 Desain Produk", "43010": "S1 Manajemen", "43020": "S1 Akuntansi", "51016": "D4 Produksi Film dan Televisi" }
 
 # Fungsi validasi (sudah ada, tidak ubah)
@@ -143,123 +179,128 @@ def _valid_role(x):
     return x in ("mahasiswa", "staff")
 
 def get_current_status():
-    return JADWAL_STATUS
+    # Status per user kalau dipanggil dari request, status run global kalau tidak
+    status = JADWAL_STATUS
+    if has_request_context():
+        status = JADWAL_STATUS_BY_USER.get(str(_current_user_id())) or JADWAL_STATUS
+    return dict(status, last_run=LAST_JADWAL_RUN)
 
 
-init_api(photo_cache, majorID, executor, get_current_status, log_file, _valid_role)
+init_api(photo_store, majorID, executor, get_current_status, log_file, _valid_role, jadwal_store, directory_index)
 app.register_blueprint(api_bp, url_prefix='/api')
 
-# Jalankan scraper dan simpan hasilnya ke file JSON
-def run_scraper_and_save():
-    global JADWAL_STATUS
-    JADWAL_STATUS = {"status": "loading", "message": f"Proses scraping dimulai: {datetime.now().strftime('%A, %d %B %Y %H:%M:%S')}"}
-    logging.info("=== MENJALANKAN SCRAPING JADWAL ===")
-    
-    df = scrape_data()
+# Crawl malam indeks direktori: refresh query paling basi + query seed, pelan-pelan lewat _generic_search
+DIRECTORY_CRAWL = os.getenv("DIRECTORY_CRAWL", "0") == "1"
+DIRECTORY_CRAWL_HOUR = int(os.getenv("DIRECTORY_CRAWL_HOUR", "2"))
+DIRECTORY_CRAWL_LIMIT = int(os.getenv("DIRECTORY_CRAWL_LIMIT", "200"))
+DIRECTORY_CRAWL_DELAY = float(os.getenv("DIRECTORY_CRAWL_DELAY", "2"))
+DIRECTORY_CRAWL_SEEDS = [q.strip() for q in os.getenv("DIRECTORY_CRAWL_SEEDS", "").split(",") if q.strip()]
+DIRECTORY_ROLES = {"mahasiswa": (search_mahasiswa, "NIM"), "staff": (search_staff, "NIK")}
+
+def crawl_directory_index():
+    jobs = [(role, q) for q in DIRECTORY_CRAWL_SEEDS for role in DIRECTORY_ROLES]
+    jobs += directory_index.stale_queries(older_than=12 * 3600, limit=DIRECTORY_CRAWL_LIMIT)
+    seen = set()
+    done = 0
+    for role, q in jobs:
+        if (role, q) in seen or done >= DIRECTORY_CRAWL_LIMIT:
+            continue
+        seen.add((role, q))
+        search_fn, id_key = DIRECTORY_ROLES[role]
+        rows = search_fn(q)
+        if rows is not None:
+            directory_index.record(role, q, rows, id_key)
+        done += 1
+        time.sleep(DIRECTORY_CRAWL_DELAY)
+    logging.info(f"[DirectoryCrawl] {done} query di-refresh, indeks: {directory_index.stats()}")
+
+def run_scraper_for_user(user_id):
+    """Scrape jadwal 1 user lalu simpan ke file miliknya. Return ringkasan untuk laporan."""
+    key = str(user_id)
+    started = time.time()
+    JADWAL_STATUS_BY_USER[key] = {"status": "loading", "message": f"Proses scraping dimulai: {datetime.now().strftime('%A, %d %B %Y %H:%M:%S')}"}
 
-    if not df.empty:
+    try:
+        # Batasi request barengan ke host Sicyca, walau worker pool lebih besar
+        with _sicyca_host_limit:
+            df = scrape_data(user_id)
+    except Exception as e:
+        logging.error(f"[Jadwal] Scraping user {user_id} error: {e}")
+        df = None
+
+    if df is not None and not df.empty:
         # Format waktu lengkap untuk disimpan di metadata
         waktu_scraping = datetime.now().strftime("%A, %d %B %Y %H:%M:%S")
 
-        # Simpan ke file JSON utama
         data_records = df.to_dict(orient='records')
 
-        # Tambahkan metadata di akhir file JSON
-        json_output = {
-            "metadata": {
-                "last_scraped": waktu_scraping,
-                "total_jadwal": len(data_records)
-            },
-            "data": data_records
-        }
-
-        # Simpan file
-        with open(JSON_FILE, 'w', encoding='utf-8') as f:
-            json.dump(json_output, f, indent=4, ensure_ascii=False)
-
-        JADWAL_STATUS = {"status": "ready", "message": f"Data diperbarui: {waktu_scraping}"}
-        logging.info(f"Jadwal berhasil disimpan ({len(data_records)} entri) pada {waktu_scraping}.")
+        # Simpan snapshot (atomik; tidak ditulis ulang kalau isinya sama)
+        version, changed = jadwal_store.publish(user_id, data_records, waktu_scraping)
+
+        if changed:
+            if str(user_id) == str(DEFAULT_JADWAL_USER):
+                # Bangun ICS sekali saat jadwal baru terbit, /kalendar tinggal kirim bytes
+                jadwal_store.derived(user_id, "ics", _build_jadwal_ics)
+            JADWAL_STATUS_BY_USER[key] = {"status": "ready", "message": f"Data diperbarui: {waktu_scraping}", "version": version}
+        else:
+            JADWAL_STATUS_BY_USER[key] = {"status": "ready", "message": f"Data tidak berubah (dicek: {waktu_scraping})", "version": version}
+        ok, total = True, len(data_records)
     else:
         waktu_error = datetime.now().strftime("%A, %d %B %Y %H:%M:%S")
-        JADWAL_STATUS = {"status": "error", "message": f"Scraping gagal pada: {waktu_error}"}
-        logging.warning("Scraping jadwal tidak menghasilkan data.")
+        JADWAL_STATUS_BY_USER[key] = {"status": "error", "message": f"Scraping gagal pada: {waktu_error}"}
+        logging.warning(f"[Jadwal] User {user_id}: scraping tidak menghasilkan data.")
+        ok, total = False, 0
 
-    logging.info("=== SCRAPING JADWAL SELESAI ===")
+    return {"user_id": user_id, "ok": ok, "total_jadwal": total, "seconds": round(time.time() - started, 2)}
 
+def _run_scraper_with_jitter(user_id):
+    # Jeda acak biar login/scrape semua user tidak nembak Sicyca di detik yang sama
+    if JADWAL_JITTER > 0:
+        time.sleep(random.uniform(0, JADWAL_JITTER))
+    return run_scraper_for_user(user_id)
 
-def create_ics_from_json(json_path, ics_path):
-    try:
-        # Baca file JSON yang bisa punya struktur baru (metadata + data)
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data_json = json.load(f)
-
-        # Cek apakah ini struktur baru atau lama
-        if isinstance(data_json, dict) and "data" in data_json:
-            events = data_json["data"]
-        else:
-            # fallback: struktur lama (langsung list)
-            events = data_json
-
-        if not events:
-            raise ValueError("Data jadwal kosong atau tidak valid.")
-
-        ics_content = "BEGIN:VCALENDAR\nVERSION:2.0\nCALSCALE:GREGORIAN\n"
+# Jalankan scraper untuk SEMUA user Gate aktif dan simpan hasilnya per user
+def run_scraper_and_save():
+    global JADWAL_STATUS, LAST_JADWAL_RUN
+    JADWAL_STATUS = {"status": "loading", "message": f"Proses scraping dimulai: {datetime.now().strftime('%A, %d %B %Y %H:%M:%S')}"}
+    logging.info("=== MENJALANKAN SCRAPING JADWAL ===")
+    started = time.time()
 
-        for event in events:
+    user_ids = GateUser().get_active_user_ids() or [DEFAULT_JADWAL_USER]
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(JADWAL_WORKERS, len(user_ids))), thread_name_prefix="jadwal") as pool:
+        futures = {pool.submit(_run_scraper_with_jitter, uid): uid for uid in user_ids}
+        for fut in as_completed(futures):
             try:
-                date_str = event.get("Hari, Tanggal", "")
-                time_range_str = event.get("Jam", "")
-                if not date_str or not time_range_str:
-                    continue
-
-                start_time_val, end_time_val = time_range_str.split('-')
-                start_date_time_str = re.sub(r"^\w+, ", "", date_str) + ' ' + start_time_val
-                end_date_time_str = re.sub(r"^\w+, ", "", date_str) + ' ' + end_time_val
-
-                for idn, eng in month_translation.items():
-                    start_date_time_str = start_date_time_str.replace(idn, eng)
-                    end_date_time_str = end_date_time_str.replace(idn, eng)
-                # Jika tahun hanya 2 digit, tambahkan '20' di depannya
-                def normalize_year(date_str):
-                    parts = date_str.split()
-                    if len(parts) >= 3 and len(parts[1]) > 0 and len(parts[2]) == 2:  # contoh: ['22', 'October', '25']
-                        parts[2] = "20" + parts[2]
-                        return " ".join(parts)
-                    return date_str
-                
-                start_date_time_str = normalize_year(start_date_time_str)
-                end_date_time_str = normalize_year(end_date_time_str)
-                
-                start_time = datetime.strptime(start_date_time_str, "%d %B %Y %H:%M")
-                end_time = datetime.strptime(end_date_time_str, "%d %B %Y %H:%M")
-
-
-                ics_content += (
-                    "BEGIN:VEVENT\n"
-                    f"SUMMARY:{event.get('Nama Matakuliah', 'Tanpa Nama')}\n"
-                    f"DTSTART:{start_time.strftime('%Y%m%dT%H%M%S')}\n"
-                    f"DTEND:{end_time.strftime('%Y%m%dT%H%M%S')}\n"
-                    f"LOCATION:{event.get('Ruangan', 'Tidak Diketahui')}\n"
-                    f"DESCRIPTION:Keterangan: {event.get('Keterangan', '-')}\n"
-                    f"STATUS:{event.get('Status Kuliah', '-')}\n"
-                    "END:VEVENT\n"
-                )
+                results.append(fut.result())
             except Exception as e:
-                logging.warning(f"Gagal konversi event: {e}")
-                continue
+                results.append({"user_id": futures[fut], "ok": False, "total_jadwal": 0, "seconds": None, "error": str(e)})
+
+    wall = round(time.time() - started, 2)
+    failed = [r["user_id"] for r in results if not r["ok"]]
+    waktu_selesai = datetime.now().strftime("%A, %d %B %Y %H:%M:%S")
+    LAST_JADWAL_RUN = {
+        "finished_at": waktu_selesai,
+        "wall_seconds": wall,
+        "users": len(user_ids),
+        "failed": failed,
+        "per_user": sorted(results, key=lambda r: str(r["user_id"]))
+    }
+
+    if len(failed) < len(user_ids):
+        JADWAL_STATUS = {"status": "ready", "message": f"Data diperbarui: {waktu_selesai}"}
+    else:
+        JADWAL_STATUS = {"status": "error", "message": f"Scraping gagal pada: {waktu_selesai}"}
 
-        ics_content += "END:VCALENDAR\n"
+    for r in LAST_JADWAL_RUN["per_user"]:
+        logging.info(f"   --> User {r['user_id']}: {'OK' if r['ok'] else 'GAGAL'} ({r['total_jadwal']} jadwal, {r['seconds']}s)")
+    logging.info(f"=== SCRAPING JADWAL SELESAI: {len(user_ids)} user, {len(failed)} gagal, {wall}s ===")
 
-        with open(ics_path, 'w', encoding='utf-8') as f:
-            f.write(ics_content)
 
-        logging.info(f"File {ics_path} berhasil diperbarui.")
-        return True
+def _build_jadwal_ics(data_json):
+    events = data_json.get("data", []) if isinstance(data_json, dict) else data_json
+    return build_ics(events or [])
 
-    except Exception as e:
-        logging.error(f"Error create_ics_from_json: {e}")
-        raise
-        
 # @app.before_request
 # def debug_cookies():
 #     print("[DEBUG COOKIE] Cookie header:", request.headers.get('Cookie'))
@@ -372,9 +413,8 @@ def index():
     # logging.info(f"[INDEX DEBUG] Session keys:", list(session.keys()))
     print("[INDEX DEBUG] Session keys:", list(session.keys()))
     try:
-        # Baca JSON dengan struktur baru
-        with open(JSON_FILE, encoding='utf-8') as f:
-            df_json = json.load(f)
+        # Baca JSON milik user yang login (hasil scraping terjadwal, tidak scrape live)
+        df_json = jadwal_store.read(_current_user_id())
 
         metadata = df_json.get("metadata", {})
         # Ambil datanya sebagai list of dict, BUKAN DataFrame
@@ -390,7 +430,19 @@ def index():
             last_scraped=last_scraped  # <-- Kirim tanggal scrape-nya
         )
 
-    except (FileNotFoundError, ValueError, json.JSONDecodeError): 
+    except FileNotFoundError:
+        # Jadwal user ini belum pernah di-scrape: ambil sekarang (bukan tampilkan jadwal user lain)
+        user_id = _current_user_id()
+        if user_id and JADWAL_STATUS_BY_USER.get(str(user_id), {}).get("status") != "loading":
+            executor.submit(run_scraper_for_user, user_id)
+        return render_template(
+            'index.html',
+            jadwal_list=[],
+            last_scraped=None,
+            error_message="JADWAL BELUM TERSEDIA. Jadwal kamu sedang diambil, refresh halaman sebentar lagi."
+        )
+
+    except (ValueError, json.JSONDecodeError): 
         msg = "JADWAL BELUM TERSEDIA. Jalankan scraper terlebih dahulu atau tunggu jadwal otomatis berikutnya."
         # Kirim list kosong dan pesan error
         return render_template(
@@ -447,8 +499,8 @@ def reset_scraper_session():
 @app.route('/refresh-jadwal')
 @login_required
 def refresh_jadwal_route():
-    # Jalankan scraper di background agar tidak memblokir
-    executor.submit(run_scraper_and_save)
+    # Jalankan scraper (hanya untuk user ini) di background agar tidak memblokir
+    executor.submit(run_scraper_for_user, _current_user_id() or DEFAULT_JADWAL_USER)
     # Langsung redirect, JavaScript akan menangani update UI
     return redirect(url_for('index'))
 
@@ -459,32 +511,21 @@ def kalendar_ics():
         if not os.path.exists(JSON_FILE):
             return "<h3>File jadwal.json belum dibuat. Jalankan scraper dulu.</h3>", 404
 
-        # Baca file dan ambil bagian data
-        with open(JSON_FILE, 'r', encoding='utf-8') as f:
-            df_json = json.load(f)
-            data_records = df_json.get("data", [])
-            metadata = df_json.get("metadata", {})
-
-        if not data_records:
+        # ICS dibangun sekali per versi data (lihat run_scraper_for_user), request cuma kirim bytes
+        ics_bytes, entry = jadwal_store.derived(DEFAULT_JADWAL_USER, "ics", _build_jadwal_ics)
+        if not entry["data"].get("data"):
             return "<h3>Data jadwal belum tersedia atau kosong.</h3>", 404
 
-        # Buat DataFrame dari data yang valid
-        df = pd.DataFrame(data_records)
-
-        # Simpan jadi file ICS
-        create_ics_from_json(JSON_FILE, ICS_FILE)
-
-        # Ambil waktu update dari metadata (opsional)
-        waktu = metadata.get("last_scraped", "Tidak diketahui")
-
-        logging.info(f"File ICS dibuat berdasarkan data terakhir: {waktu}")
-
-        return send_from_directory(
-            os.path.abspath('.'),
-            path=ICS_FILE,
-            as_attachment=True,
-            download_name=f'jadwal_kuliah_{datetime.now().strftime("%Y%m%d_%H%M")}.ics'
+        resp = make_response(ics_bytes)
+        resp.mimetype = 'text/calendar'
+        resp.headers['Content-Disposition'] = (
+            f'attachment; filename=jadwal_kuliah_{datetime.now().strftime("%Y%m%d_%H%M")}.ics'
         )
+        resp.headers['Cache-Control'] = 'no-cache'  # boleh simpan, tapi wajib revalidasi (304 kalau sama)
+        resp.set_etag(jadwal_store.etag(DEFAULT_JADWAL_USER))
+        resp.last_modified = datetime.fromtimestamp(entry["stat"][0] / 1e9, tz=pytz.utc)
+        # Polling client kalender yang datanya belum berubah cukup dapat 304
+        return resp.make_conditional(request)
 
     except (FileNotFoundError, ValueError):
         return "<h3>File jadwal.json tidak ditemukan atau rusak.</h3>", 404
@@ -559,6 +600,12 @@ def krs_kuliah():
 # scheduler = BackgroundScheduler(daemon=True)
 # Daftarkan job harian jam 05:00 WIB
 scheduler.add_job(run_scraper_and_save, 'cron', hour=5, minute=0, id="scrape-05")
+# Buang foto/ref cache yang sudah lewat PHOTO_DISK_TTL dari disk
+scheduler.add_job(photo_store.cleanup, 'cron', hour=PHOTO_CLEANUP_HOUR, minute=30, id="photo-cleanup")
+if DIRECTORY_CRAWL:
+    scheduler.add_job(crawl_directory_index, 'cron', hour=DIRECTORY_CRAWL_HOUR, minute=0, id="directory-crawl")
+# Validasi session Sicyca di background, biar request tidak nunggu check_validity
+start_session_keeper(scheduler)
 scheduler.start()
 boot_scrape_if_needed()
     
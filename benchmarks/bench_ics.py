@@ -0,0 +1,56 @@
+# benchmarks/bench_ics.py
+# Benchmark pembuatan ICS dari jadwal sintetis besar:
+# cara lama (translate bulan + strptime per event) vs jalur parse cepat.
+# Jalankan dari root project: python benchmarks/bench_ics.py [jumlah_event ...]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from models.jadwal_ics import build_ics
+
+HARI = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu"]
+BULAN = ["Januari", "Februari", "Maret", "April", "Mei", "Juni", "Juli",
+         "Agustus", "September", "Oktober", "November", "Desember"]
+
+
+def make_events(n):
+    events = []
+    for i in range(n):
+        # Campur tahun 4 digit & 2 digit seperti data asli Sicyca
+        tahun = "2025" if i % 2 else "25"
+        events.append({
+            "Hari, Tanggal": f"{HARI[i % 6]}, {1 + i % 28} {BULAN[i % 12]} {tahun}",
+            "Jam": f"{7 + i % 8:02d}:30-{9 + i % 8:02d}:00",
+            "Ruangan": f"B{500 + i % 20}",
+            "Nama Matakuliah": f"Matakuliah {i}",
+            "Status Kuliah": "Luring",
+            "Keterangan": ""
+        })
+    return events
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    sizes = [int(x) for x in sys.argv[1:]] or [100, 1000, 10000]
+    print(f"{'event':>8} {'lama (ms)':>12} {'cepat (ms)':>12} {'speedup':>9} {'us/event':>10}")
+    for n in sizes:
+        events = make_events(n)
+        assert build_ics(events, fast=True) == build_ics(events, fast=False), "Output ICS berbeda!"
+        repeat = 5 if n <= 1000 else 2
+        slow = timed(lambda: build_ics(events, fast=False), repeat)
+        fast = timed(lambda: build_ics(events, fast=True), repeat)
+        print(f"{n:>8} {slow * 1000:>12.2f} {fast * 1000:>12.2f} {slow / fast:>8.1f}x {fast / n * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
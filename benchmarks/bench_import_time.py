@@ -0,0 +1,89 @@
+# benchmarks/bench_import_time.py
+# Ukur biaya import modul web (cold start worker) pakai `python -X importtime`,
+# lalu cek dependency berat (pandas, yt_dlp, webauthn, bs4, ...) TIDAK ikut ter-load
+# saat import. Exit code 1 kalau ada yang bocor, jadi bisa dipakai di CI.
+# Jalankan dari root project: python benchmarks/bench_import_time.py [modul ...]
+# (butuh .env / env DB_* & GATE_ENCRYPTION_KEY seperti saat app jalan)
+
+import os
+import sys
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+DEFAULT_MODULES = [
+    "middleware.auth_quard",
+    "controller.GateController",
+    "scrapper_requests",
+    "models.auth_api",
+    "api.api",
+]
+# cryptography tidak masuk daftar: PyJWT (dipakai auth di tiap request) sudah meng-import-nya.
+HEAVY = ["pandas", "numpy", "yt_dlp", "webauthn", "bs4", "lxml"]
+TOP_N = 10
+
+CHECK_SNIPPET = (
+    "import sys, importlib; importlib.import_module({mod!r}); "
+    "print(','.join(m for m in {heavy!r} if m in sys.modules))"
+)
+
+
+def run_importtime(module):
+    """Return (total_us, {top-level package: cumulative_us}, heavy modules yang ter-load)."""
+    code = CHECK_SNIPPET.format(mod=module, heavy=HEAVY)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import {module} gagal:\n{proc.stderr[-2000:]}")
+
+    per_package = {}
+    total = 0
+    for line in proc.stderr.splitlines():
+        # format: "import time:   self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line.split(":", 1)[1].split("|")
+        if len(parts) != 3:
+            continue
+        _, cumulative, raw_name = parts
+        raw_name = raw_name.rstrip()
+        depth = (len(raw_name) - len(raw_name.lstrip())) // 2
+        name = raw_name.strip()
+        cumulative = int(cumulative)
+        if depth == 0:
+            # Hanya import level teratas yang dijumlah, biar tidak dobel hitung
+            total += cumulative
+            top = name.split(".")[0]
+            per_package[top] = per_package.get(top, 0) + cumulative
+
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return total, per_package, loaded
+
+
+def main():
+    modules = sys.argv[1:] or DEFAULT_MODULES
+    leaked_any = False
+
+    print(f"{'modul':<28} {'total (ms)':>11}   dependency berat yang ter-load")
+    details = {}
+    for module in modules:
+        total, per_package, loaded = run_importtime(module)
+        details[module] = per_package
+        leaked_any = leaked_any or bool(loaded)
+        print(f"{module:<28} {total / 1000:>11.1f}   {', '.join(loaded) or '-'}")
+
+    for module, per_package in details.items():
+        print(f"\n{module}: {TOP_N} package termahal (kumulatif)")
+        for name, us in sorted(per_package.items(), key=lambda kv: kv[1], reverse=True)[:TOP_N]:
+            print(f"  {name:<30} {us / 1000:>9.1f} ms")
+
+    if leaked_any:
+        print("\nGAGAL: ada dependency berat yang ter-import saat boot.")
+        sys.exit(1)
+    print("\nOK: tidak ada dependency berat yang ter-import saat boot.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_jadwal_cache.py
+# Micro-benchmark: baca jadwal langsung dari file (json.load tiap request, cara lama)
+# vs lewat cache memori JadwalStore.load() (cara baru).
+# Jalankan dari root project: python benchmarks/bench_jadwal_cache.py [jumlah_jadwal] [iterasi]
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from models.jadwal_store import JadwalStore
+
+
+def make_records(n):
+    return [{
+        "Hari, Tanggal": f"Senin, {1 + i % 28} Oktober 25",
+        "Jam": "07:30-09:00",
+        "Nama Matakuliah": f"Matakuliah Contoh {i}",
+        "Ruangan": f"R.{100 + i % 50}",
+        "Dosen": f"Dosen {i % 17}",
+        "Status Kuliah": "Kuliah",
+        "Keterangan": "-"
+    } for i in range(n)]
+
+
+def bench(label, fn, iterations):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {iterations / elapsed:>12,.0f} ops/s   {elapsed / iterations * 1e6:>10.1f} us/op")
+
+
+def bench_threads(label, fn, iterations, threads=8):
+    per_thread = max(1, iterations // threads)
+
+    def worker():
+        for _ in range(per_thread):
+            fn()
+
+    fn()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    total = per_thread * threads
+    print(f"{label:<34} {total / elapsed:>12,.0f} ops/s   ({threads} thread)")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jadwal.json")
+        store = JadwalStore(path, os.path.join(tmp, "jadwal_data"), default_user=1, keep_versions=0)
+        store.publish(1, make_records(n))
+        print(f"Jadwal: {n} entri, file {os.path.getsize(path):,} bytes, {iterations} iterasi\n")
+
+        def old_way():
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.dumps(json.load(f))
+
+        def new_way():
+            return store.read_bytes(1)
+
+        bench("file + json.load + dumps (lama)", old_way, iterations)
+        bench("JadwalStore.read_bytes (cache)", new_way, iterations)
+        bench_threads("JadwalStore.read_bytes (cache)", new_way, iterations)
+        print(f"\nStatistik cache: {store.cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# benchmarks/bench_krs_detail.py
+# Benchmark + cek regresi parsing detail KRS (/table-proxy/?t=...):
+# cara lama (BeautifulSoup, get_text seluruh halaman, previous_sibling & find_all berulang)
+# vs scrapper_tables.parse_krs_detail (lxml, satu kali parse). Output JSON HARUS identik.
+#
+# Halaman uji: halaman sintetis per jenis t= (nilai, kehadiran, matakuliah, matakuliah+prak)
+# dengan jumlah mahasiswa bervariasi, ditambah halaman rekaman debug_*.html / file lain
+# yang diberikan lewat argumen (mis. hasil simpan dari /table-proxy/).
+# Jalankan dari root project: python benchmarks/bench_krs_detail.py [file.html ...]
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+from scrapper_tables import parse_krs_detail
+from sicyca_pages import page_nilai, page_kehadiran, page_matakuliah
+
+SIZES = [10, 100, 500, 2000]
+
+
+# --- cara lama (disalin dari scrape_krs_detail sebelum pakai parse_krs_detail) ---
+def old_parse_krs_detail(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "lxml")
+    ada_prak = soup.find(string=re.compile(r"Group\s*Prak", re.IGNORECASE))
+    judul_tabel_mhs = "Data Praktikum Mahasiswa" if ada_prak else "Data Peserta Mahasiswa"
+
+    metadata = {}
+    full_text = soup.get_text(separator="\n")
+    for line in full_text.split('\n'):
+        if ":" in line:
+            parts = line.split(":", 1)
+            key = parts[0].strip()
+            val = parts[1].strip()
+            if len(key) < 50 and val:
+                metadata[key] = val
+
+    tables_list = []
+    for table in soup.find_all("table"):
+        title = ""
+        prev_el = table.previous_sibling
+        while prev_el:
+            if isinstance(prev_el, str) and prev_el.strip():
+                title = prev_el.strip()
+                break
+            if hasattr(prev_el, 'get_text') and prev_el.get_text(strip=True):
+                title = prev_el.get_text(strip=True)
+                break
+            prev_el = prev_el.previous_sibling
+        title = re.sub(r'[^\w\s]', '', title).strip() or "Detail"
+
+        headers = []
+        thead = table.find("thead")
+        if thead:
+            headers = [th.get_text(strip=True) for th in thead.find_all("th")]
+        if not headers:
+            first_tr = table.find("tr")
+            if first_tr:
+                headers = [ele.get_text(strip=True) for ele in first_tr.find_all(["th", "td"])]
+        headers = [h if h else f"Kolom {i+1}" for i, h in enumerate(headers)]
+
+        headers_str = " ".join(headers).lower()
+        if "nim" in headers_str or "nama" in headers_str:
+            title = judul_tabel_mhs
+        elif "dosen" in headers_str or "matakuliah" in headers_str or "sks" in headers_str:
+            title = "Detail Mata Kuliah"
+        else:
+            title = "Data Lainnya"
+            prev_el = table.previous_sibling
+            while prev_el:
+                if isinstance(prev_el, str) and prev_el.strip():
+                    title = prev_el.strip()
+                    break
+                if hasattr(prev_el, 'get_text') and prev_el.get_text(strip=True):
+                    title = prev_el.get_text(strip=True)
+                    break
+                prev_el = prev_el.previous_sibling
+            title = re.sub(r'[^\w\s]', '', title).strip() or "Tabel Data"
+
+        rows_data = []
+        all_trs = table.find_all("tr")
+        start_idx = 0
+        if not thead and all_trs and headers:
+            first_tr_text = [e.get_text(strip=True) for e in all_trs[0].find_all(["th", "td"])]
+            if first_tr_text == headers:
+                start_idx = 1
+        tbody = table.find("tbody")
+        tr_source = tbody.find_all("tr") if tbody else all_trs[start_idx:]
+        for tr in tr_source:
+            cols = tr.find_all("td")
+            if not cols: continue
+            if len(cols) == 1 and not cols[0].get_text(strip=True): continue
+            row_obj = {}
+            for idx, td in enumerate(cols):
+                val = td.get_text(strip=True)
+                link = td.find("a")
+                if idx < len(headers):
+                    col_name = headers[idx]
+                    row_obj[col_name] = val
+                    if link and link.get("href"):
+                        row_obj[f"{col_name}_link"] = link.get("href")
+            if row_obj:
+                rows_data.append(row_obj)
+        if headers or rows_data:
+            tables_list.append({"title": title, "headers": headers, "rows": rows_data})
+    return metadata, tables_list
+
+
+def synthetic_pages():
+    for n in SIZES:
+        yield f"t=nilai n={n}", page_nilai(n)
+        yield f"t=kehadiran n={n}", page_kehadiran(n)
+        yield f"t=matakuliah n={n}", page_matakuliah(n)
+        yield f"t=matakuliah+prak n={n}", page_matakuliah(n, prak=True)
+
+
+def recorded_pages(paths):
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            yield os.path.basename(path), f.read()
+
+
+def timed(fn, html, min_time=0.2):
+    fn(html)
+    n, start = 0, time.perf_counter()
+    while True:
+        fn(html)
+        n += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / n
+
+
+def traced_peak(fn, html):
+    tracemalloc.start()
+    fn(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(ROOT, "debug_*.html")))
+    pages = list(synthetic_pages()) + list(recorded_pages(paths))
+
+    print(f"{'halaman':<28} {'KB':>6} {'lama (ms)':>10} {'baru (ms)':>10} {'speedup':>8} "
+          f"{'peak lama KB':>13} {'peak baru KB':>13}")
+    for name, html in pages:
+        expected = old_parse_krs_detail(html)
+        got = parse_krs_detail(html)
+        if json.dumps(got, sort_keys=False) != json.dumps(expected, sort_keys=False):
+            raise SystemExit(f"REGRESI: hasil parse_krs_detail beda dengan cara lama di {name}")
+        old_s = timed(old_parse_krs_detail, html)
+        new_s = timed(parse_krs_detail, html)
+        print(f"{name:<28} {len(html) / 1024:>6.0f} {old_s * 1000:>10.2f} {new_s * 1000:>10.2f} "
+              f"{old_s / new_s:>7.1f}x {traced_peak(old_parse_krs_detail, html) / 1024:>13.0f} "
+              f"{traced_peak(parse_krs_detail, html) / 1024:>13.0f}")
+    print(f"\nOK: {len(pages)} halaman, output identik dengan parser lama.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# benchmarks/bench_parsers.py
+# Suite benchmark parser offline: jalankan scraper asli (scrape_data, scrape_krs,
+# scrape_krs_detail, _generic_search; dua terakhir lewat *_upstream supaya tidak kena cache),
+# regex token API & parsing form login Gate
+# terhadap halaman rekaman (debug_*.html) + varian sintetis yang barisnya dikali 10x & 100x.
+# Tidak ada request ke Sicyca/Gate: session diganti FixtureSession yang mengembalikan halaman rekaman.
+#
+# Laporan: throughput, latency p50/p95/p99, puncak alokasi (tracemalloc).
+#   python benchmarks/bench_parsers.py                       # semua case
+#   python benchmarks/bench_parsers.py --filter krs --quick
+#   python benchmarks/bench_parsers.py --json hasil.json     # simpan hasil (machine-readable)
+#   python benchmarks/bench_parsers.py --compare baseline.json [--threshold 0.25]
+#       -> exit 1 kalau p50 ada yang lebih lambat > threshold dibanding baseline
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Modul scraper butuh config DB saat import; benchmark tidak pernah konek ke DB.
+for _key in ("DB_HOST", "DB_USERNAME", "DB_DATABASE"):
+    os.environ.setdefault(_key, "offline-bench")
+logging.disable(logging.CRITICAL)
+
+import scrapper_requests as sr
+from controller.GateController import _parse_login_form, GATE_ROOT
+from sicyca_pages import krs_page, page_matakuliah, page_kehadiran
+
+BENCH_USER = 1
+SCALES = [1, 10, 100]
+_ROW_RE = re.compile(r"<tr\b[^>]*>(?:(?!<tr\b).)*?<td\b(?:(?!<tr\b).)*?</tr>", re.DOTALL | re.IGNORECASE)
+
+
+# --- session palsu: kembalikan halaman rekaman, tanpa jaringan ---
+class FixtureResponse:
+    status_code = 200
+
+    def __init__(self, text, url):
+        self.text = text
+        self.url = url
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FixtureSession:
+    def __init__(self):
+        self.page = ""
+
+    def get(self, url, params=None, **kwargs):
+        return FixtureResponse(self.page, url)
+
+    post = get
+
+
+def fixture(name):
+    with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def scale_rows(html, factor):
+    """Kalikan setiap baris data (<tr> yang punya <td>) sebanyak factor."""
+    if factor == 1:
+        return html
+    return _ROW_RE.sub(lambda m: m.group(0) * factor, html)
+
+
+def build_cases(session):
+    """List (nama, fixture, skala, html, fungsi(html)). Case scraper memakai session.page = html."""
+    def scraper(fn):
+        def run(html):
+            session.page = html
+            return fn()
+        return run
+
+    bases = [
+        ("scrape_data", "debug_output.html", fixture("debug_output.html"),
+         scraper(lambda: sr.scrape_data(BENCH_USER))),
+        ("_generic_search", "debug_output.html", fixture("debug_output.html"),
+         scraper(lambda: sr._generic_search_upstream("/komunitas/mahasiswa/", "bench", "Mahasiswa", BENCH_USER))),
+        ("scrape_krs", "sintetis krs", krs_page(),
+         scraper(lambda: sr.scrape_krs(BENCH_USER))),
+        ("scrape_krs(miss)", "debug_krs_failed.html", fixture("debug_krs_failed.html"),
+         scraper(lambda: sr.scrape_krs(BENCH_USER))),
+        ("scrape_krs_detail", "t=matakuliah prak", page_matakuliah(50, prak=True),
+         scraper(lambda: sr._scrape_krs_detail_upstream({"t": "matakuliah"}, BENCH_USER))),
+        ("scrape_krs_detail", "t=kehadiran", page_kehadiran(16),
+         scraper(lambda: sr._scrape_krs_detail_upstream({"t": "kehadiran"}, BENCH_USER))),
+        ("global_token", "debug_result.html", fixture("debug_result.html"),
+         lambda html: sr._extract_global_token(html)),
+        ("global_token", "debug_result_v2.html", fixture("debug_result_v2.html"),
+         lambda html: sr._extract_global_token(html)),
+        ("global_token(miss)", "debug_token_page.html", fixture("debug_token_page.html"),
+         lambda html: sr._extract_global_token(html)),
+        ("login_form", "debug_token_page.html", fixture("debug_token_page.html"),
+         lambda html: _parse_login_form(html, f"{GATE_ROOT}/login", form_id="gate-login-form")),
+    ]
+    # Halaman token & login tidak punya tabel data -> cukup ukuran asli
+    fixed_size = ("global_token", "login_form")
+    cases = []
+    for name, source, html, fn in bases:
+        for factor in ([1] if name.startswith(fixed_size) else SCALES):
+            cases.append((name, source, factor, scale_rows(html, factor), fn))
+    return cases
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(fn, html, min_time, max_iter):
+    fn(html)  # warm-up (import lazy, kompilasi XPath, dst.)
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_iter:
+        t0 = time.perf_counter()
+        fn(html)
+        latencies.append(time.perf_counter() - t0)
+        if time.perf_counter() - started >= min_time and len(latencies) >= 5:
+            break
+    total = time.perf_counter() - started
+
+    tracemalloc.start()
+    result = fn(html)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    latencies.sort()
+    return {
+        "iterations": len(latencies),
+        "ops_per_sec": len(latencies) / total,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "alloc_peak_kb": peak / 1024,
+        "alloc_retained_kb": current / 1024,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def case_key(r):
+    return f"{r['case']}|{r['fixture']}|x{r['scale']}"
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {case_key(r): r for r in json.load(f)["results"]}
+    regressions = []
+    print(f"\nBanding dengan {baseline_path} (batas +{threshold:.0%} p50):")
+    for r in results:
+        old = baseline.get(case_key(r))
+        if not old or not old["p50_ms"]:
+            continue
+        change = r["p50_ms"] / old["p50_ms"] - 1
+        mark = "REGRESI" if change > threshold else ""
+        print(f"  {case_key(r):<52} {old['p50_ms']:>9.3f} -> {r['p50_ms']:>9.3f} ms  {change:>+7.1%} {mark}")
+        if mark:
+            regressions.append(case_key(r))
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark parser Sicyca/Gate offline")
+    ap.add_argument("--filter", help="hanya case yang namanya mengandung teks ini")
+    ap.add_argument("--quick", action="store_true", help="waktu ukur lebih pendek")
+    ap.add_argument("--json", dest="json_out", help="simpan hasil ke file JSON")
+    ap.add_argument("--compare", help="file JSON baseline untuk deteksi regresi")
+    ap.add_argument("--threshold", type=float, default=0.25, help="batas regresi p50 (default 0.25 = +25%%)")
+    args = ap.parse_args()
+
+    min_time, max_iter = (0.1, 200) if args.quick else (0.5, 2000)
+
+    session = FixtureSession()
+    sr.get_authenticated_session = lambda user_id: session
+    cases = build_cases(session)
+    if args.filter:
+        cases = [c for c in cases if args.filter in c[0]]
+
+    # scrape_krs menulis debug_krs_failed.html kalau tabel tidak ketemu -> jangan timpa fixture di repo
+    os.chdir(tempfile.mkdtemp(prefix="bench_parsers_"))
+
+    print(f"{'case':<20} {'fixture':<22} {'skala':>5} {'KB':>6} {'ops/s':>9} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'peak KB':>8}")
+    results = []
+    for name, source, factor, html, fn in cases:
+        stats = measure(fn, html, min_time, max_iter)
+        row = {"case": name, "fixture": source, "scale": factor, "input_kb": len(html) / 1024, **stats}
+        results.append(row)
+        print(f"{name:<20} {source:<22} {'x' + str(factor):>5} {row['input_kb']:>6.0f} {row['ops_per_sec']:>9.1f} "
+              f"{row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f} {row['alloc_peak_kb']:>8.0f}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    if args.json_out:
+        out = args.json_out if os.path.isabs(args.json_out) else os.path.join(ROOT, args.json_out)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nHasil disimpan ke {out}")
+
+    if args.compare:
+        base = args.compare if os.path.isabs(args.compare) else os.path.join(ROOT, args.compare)
+        regressions = compare(results, base, args.threshold)
+        if regressions:
+            print(f"\nGAGAL: {len(regressions)} case lebih lambat dari baseline.")
+            sys.exit(1)
+        print("\nOK: tidak ada regresi.")
+
+
+if __name__ == "__main__":
+    main()
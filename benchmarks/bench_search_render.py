@@ -0,0 +1,208 @@
+# benchmarks/bench_search_render.py
+# Benchmark render hasil /api/search untuk 10/100/1000 hasil:
+#   lama   : DataFrame.iterrows() + f-string besar per baris, seluruh halaman dirakit di memori
+#   partial: partial Jinja templates/partials/search_results.html (terkompilasi, di-stream per potongan)
+#   json   : mode JSON (dirender Alpine di browser)
+# Sekaligus cek teks yang tampil di partial sama dengan versi lama.
+# Jalankan dari root project: python benchmarks/bench_search_render.py [jumlah_hasil ...]
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+for key in ("DB_HOST", "DB_USERNAME", "DB_DATABASE"):
+    os.environ.setdefault(key, "bench")  # tidak pernah konek DB
+logging.disable(logging.CRITICAL)
+
+from flask import Flask
+import api.api as api
+
+majorID = {"41010": "S1 Sistem Informasi", "41020": "S1 Teknik Komputer"}
+
+
+def make_results(n):
+    """Setengah mahasiswa, setengah staff (kolom sesuai tabel komunitas Sicyca)."""
+    mhs = [{"NIM": f"2341010{i:04d}", "Nama": f"Mahasiswa Contoh {i}", "Status": "Aktif",
+            "Dosen Wali": f"Dosen Wali {i % 17}"} for i in range(n - n // 2)]
+    staff = [{"NIK": f"{900000 + i}", "Nama": f"Staff Contoh {i}", "Bagian": f"Bagian {i % 7}",
+              "Email": f"staff{i}@dinamika.ac.id"} for i in range(n // 2)]
+    return {"mahasiswa": mhs, "staff": staff}
+
+
+def legacy_render(df_mahasiswa, df_staff):
+    """Salinan render api_search sebelum partial Jinja (sebagai pembanding)."""
+    combined_results = []
+    if not df_mahasiswa.empty:
+        for _, row in df_mahasiswa.iterrows():
+            nim = row.get('NIM', '')
+            if majorID:
+                prodi_name = majorID.get(nim[2:7], 'Prodi Tidak Dikenal') if nim and len(nim) >= 7 else 'Prodi Tidak Dikenal'
+            else:
+                prodi_name = 'Sistem Belum Siap'
+            combined_results.append({
+                'Tipe': 'Mahasiswa',
+                'Nama': row.get('Nama'),
+                'IDMhs': nim,
+                'Status': row.get('Status'),
+                'Prodi': prodi_name,
+                'Detail': row.get('Dosen Wali')
+            })
+    if not df_staff.empty:
+        for _, row in df_staff.iterrows():
+            combined_results.append({
+                'Tipe': 'Staff/Dosen',
+                'Nama': row.get('Nama'),
+                'IDStaff': row.get('NIK'),
+                'Bagian': row.get('Bagian'),
+                'Detail': row.get('Email')
+            })
+
+    html_output = ""
+    if combined_results:
+        for item in combined_results:
+            detail_html = ""
+            if item['Tipe'] == 'Mahasiswa':
+                detail_html = f"""
+           <dt class="font-medium text-gray-400">NIM</dt>
+<dd class="col-span-2 text-white flex items-center" id="nim-{item['IDMhs']}">
+    <span>{item['IDMhs']}</span>
+    <!-- Tombol Salin di sebelah NIM -->
+<button class="copy-id-btn p-1 text-gray-400 hover:text-white transition" 
+    data-name="{item['IDMhs']}" title="Salin NIM">
+    <svg class="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M8 16H6a2 2 0 01-2-2V6a2 2 0 012-2h8a2 2 0 012 2v2m-6 12h8a2 2 0 002-2v-8a2 2 0 00-2-2h-8a2 2 0 00-2 2v8a2 2 0 002 2z"></path>
+    </svg>
+</button>
+
+
+</dd>
+
+<dt class="font-medium text-gray-400">Status</dt><dd class="col-span-2 text-white">{item['Status']}</dd>
+<dt class="font-medium text-gray-400">Prodi</dt><dd class="col-span-2 text-white">{item['Prodi']}</dd>
+<dt class="font-medium text-gray-400">Dosen Wali</dt><dd class="col-span-2 text-white">{item['Detail']}</dd>
+
+<!-- Tombol di bawah Dosen Wali -->
+<dd class="col-span-3 mt-2">
+    <button class="photo-btn px-3 py-1 text-sm bg-blue-600 hover:bg-blue-500 rounded text-white" data-role="mahasiswa" data-id="{item['IDMhs']}">Lihat Foto</button>
+</dd>
+
+                """
+            else:
+                detail_html = f"""
+                <dt class="font-medium text-gray-400">NIK</dt><dd class="col-span-2 text-white">{item['IDStaff']}</dd>
+                <dt class="font-medium text-gray-400">Bagian</dt><dd class="col-span-2 text-white">{item['Bagian']}</dd>
+                <dt class="font-medium text-gray-400">Email</dt><dd class="col-span-2 text-white">{item['Detail']}</dd>
+                <!-- Tombol di bawah Email -->
+                <dd class="col-span-3 mt-2">
+                    <button class="photo-btn px-3 py-1 text-sm bg-blue-600 hover:bg-blue-500 rounded text-white" data-role="staff" data-id="{item['IDStaff']}">Lihat Foto</button>
+                </dd>
+                """
+
+            html_output += f"""
+            <div x-data="{{ isOpen: false }}" class="border-b border-gray-700 last:border-b-0">
+    <div class="w-full text-left p-4 ">
+        <div class="flex justify-between items-center">
+            <div class="flex items-center space-x-2">
+               <button class="copy-name-btn flex items-center p-1 text-white hover:text-gray-400 transition" 
+    data-name="{item['Nama']}" title="Salin Nama">
+    <span class="font-semibold text-white mr-2 hover:text-gray-400">{item['Nama']}</span>
+    <!-- Ikon Salin -->
+    <svg class="w-4 h-4 hover:text-gray-400" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M8 16H6a2 2 0 01-2-2V6a2 2 0 012-2h8a2 2 0 012 2v2m-6 12h8a2 2 0 002-2v-8a2 2 0 00-2-2h-8a2 2 0 00-2 2v8a2 2 0 002 2z"></path>
+    </svg>
+</button>
+
+
+                <span class="text-xs text-gray-300 ml-2 px-2 py-1 bg-gray-600 rounded-full">{item['Tipe']}</span>
+            </div>
+
+            <!-- SVG yang bisa dipencet untuk membuka dan menutup deskripsi -->
+            <div class="hover:bg-gray-700 focus:outline-none rounded-full p-2">
+            <svg @click="isOpen = !isOpen" class="w-5 h-5 transform transition-transform duration-300 cursor-pointer" 
+                 :class="{{'rotate-180': isOpen}}" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M19 9l-7 7-7-7"></path>
+            </svg>
+            </div>
+        </div>
+    </div>
+
+    <!-- Bagian detail yang terbuka atau tertutup -->
+    <div x-show="isOpen" x-transition class="p-4 bg-gray-900 border-t border-gray-700 text-sm">
+        <dl class="grid grid-cols-3 gap-2 text-sm">{detail_html}</dl>
+    </div>
+</div>
+
+            """
+        
+        # **JS: Overlay untuk Tombol (Delegation untuk Alpine)**
+        # html_output += """
+       
+        # """
+
+    else:
+        html_output = "<p class='text-gray-400 p-4'>Tidak ada data yang ditemukan.</p>"
+
+    return html_output
+
+
+def visible_text(html):
+    """Teks yang terlihat user (tanpa tag/komentar/spasi) untuk membandingkan output."""
+    html = re.sub(r"<!--.*?-->|<[^>]+>", " ", html, flags=re.S)
+    return " ".join(html.split())
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    import pandas as pd
+    sizes = [int(x) for x in sys.argv[1:]] or [10, 100, 1000]
+    app = Flask("bench", template_folder=os.path.join(ROOT, "templates"))
+    api.majorID = majorID
+    template = app.jinja_env.get_template("partials/search_results.html")
+
+    def render_partial(results):
+        stream = template.stream(items=api._search_items(results), age_label=None, error=None)
+        stream.enable_buffering(api.SEARCH_STREAM_BUFFER)
+        first, chunks = None, []
+        t0 = time.perf_counter()
+        for chunk in stream:
+            if first is None:
+                first = time.perf_counter() - t0
+            chunks.append(chunk)
+        return "".join(chunks), first
+
+    print(f"{'hasil':>6} {'lama ms':>9} {'partial ms':>11} {'json ms':>9} {'chunk-1 ms':>11} "
+          f"{'us/hasil lama':>14} {'us/hasil partial':>17} {'us/hasil json':>14}")
+    with app.app_context():
+        for n in sizes:
+            results = make_results(n)
+            df_m, df_s = pd.DataFrame(results["mahasiswa"]), pd.DataFrame(results["staff"])
+            old_html = legacy_render(df_m, df_s)
+            new_html, _ = render_partial(results)
+            assert visible_text(old_html) == visible_text(new_html), "Teks hasil partial berbeda dengan versi lama!"
+            assert new_html.count("photo-btn") == old_html.count("photo-btn") == n
+
+            repeat = 20 if n <= 100 else 5
+            # Versi lama termasuk membangun DataFrame (dulu hasil scraper selalu DataFrame)
+            old = timed(lambda: legacy_render(pd.DataFrame(results["mahasiswa"]), pd.DataFrame(results["staff"])), repeat)
+            new = timed(lambda: render_partial(results), repeat)
+            js = timed(lambda: json.dumps({"results": api._search_items(results)}, ensure_ascii=False), repeat)
+            first = min(render_partial(results)[1] for _ in range(repeat))
+            print(f"{n:>6} {old * 1000:>9.2f} {new * 1000:>11.2f} {js * 1000:>9.2f} {first * 1000:>11.3f} "
+                  f"{old / n * 1e6:>14.1f} {new / n * 1e6:>17.1f} {js / n * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
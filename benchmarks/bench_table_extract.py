@@ -0,0 +1,125 @@
+# benchmarks/bench_table_extract.py
+# Benchmark ekstraksi tabel Sicyca: cara lama (BeautifulSoup seluruh halaman + find/find_all)
+# vs engine scrapper_tables (lxml + XPath terkompilasi, parse potongan relevan saja).
+# Mengukur waktu parse per halaman & puncak memori, sekaligus cek hasilnya identik.
+# Jalankan dari root project: python benchmarks/bench_table_extract.py [file.html ...]
+#
+# Catatan memori: tracemalloc hanya melihat heap Python. Tree bs4 seluruhnya objek Python
+# (terhitung penuh), sedangkan tree lxml sementara ada di heap C libxml2 & langsung dibebaskan;
+# yang terhitung untuk lxml hanyalah hasil ekstraksi (list baris) + string teks sel.
+
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+import scrapper_tables as st
+
+DEFAULT_PAGES = ["debug_result.html", "debug_output.html", "debug_krs_failed.html"]
+SPECS = {
+    "jadwal": st.JADWAL_MINGGU_INI,
+    "search": st.KOMUNITAS_SEARCH,
+    "krs": st.KRS_LIST,
+}
+
+
+# --- cara lama (disalin dari scrapper_requests sebelum pakai engine) ---
+def _old_rows(table):
+    headers = [th.get_text(strip=True) for th in table.find_all("th")]
+    rows = [[td.get_text(strip=True) for td in tr.find_all("td")] for tr in table.find_all("tr") if tr.find("td")]
+    return headers, rows
+
+
+def old_jadwal(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "lxml")
+    text_node = soup.find(string=re.compile(r'JADWAL KEGIATAN MINGGU INI', re.IGNORECASE))
+    target_div = text_node.find_parent("div", class_="tabletitle") if text_node else None
+    table = target_div.find_next("table", class_=re.compile(r"\bsicycatable\b")) if target_div else None
+    return _old_rows(table) if table else None
+
+
+def old_search(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "lxml")
+    table = soup.find("table", class_=re.compile(r"\bsicycatable\b"))
+    return _old_rows(table) if table else None
+
+
+def old_krs(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find('table', id='tableView') or soup.find('table', class_='sicycatablemanual')
+    if not table:
+        return None
+    rows = [[td.get_text(strip=True) for td in tr.find_all('td')] for tr in table.find_all('tr')[1:]]
+    return None, rows
+
+
+OLD = {"jadwal": old_jadwal, "search": old_search, "krs": old_krs}
+
+
+def new_fn(name, narrow):
+    spec = SPECS[name]
+
+    def run(html):
+        table = st.extract_table(html, spec, narrow=narrow)
+        if table is None:
+            return None
+        return (None if name == "krs" else table.headers), table.rows
+    return run
+
+
+def methods(name):
+    return {
+        "bs4 (lama)": OLD[name],
+        "lxml full": new_fn(name, narrow=False),
+        "lxml potong": new_fn(name, narrow=True),
+    }
+
+
+def timed(fn, html, min_time=0.3):
+    fn(html)  # warm-up (termasuk kompilasi XPath)
+    n, start = 0, time.perf_counter()
+    while True:
+        fn(html)
+        n += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / n
+
+
+def traced_peak(fn, html):
+    tracemalloc.start()
+    fn(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    pages = sys.argv[1:] or DEFAULT_PAGES
+    print(f"{'halaman':<24} {'tabel':<7} {'cara':<12} {'ms/parse':>9} {'speedup':>8} {'py peak KB':>11}  hasil")
+    for page in pages:
+        path = os.path.join(ROOT, page)
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        for name in SPECS:
+            expected = OLD[name](html)
+            baseline = None
+            for label, fn in methods(name).items():
+                assert fn(html) == expected, f"Hasil {label} beda dengan cara lama di {page}/{name}!"
+                sec = timed(fn, html)
+                baseline = baseline or sec
+                peak = traced_peak(fn, html) / 1024
+                found = f"{len(expected[1])} baris" if expected else "tidak ada"
+                print(f"{page:<24} {name:<7} {label:<12} {sec * 1000:>9.3f} {baseline / sec:>7.1f}x "
+                      f"{peak:>11.0f}  {found}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/check_parallel_login.py
+# Cek konkurensi lock per user di get_authenticated_session (GateController):
+# N user berbeda login barengan ke stand-in lokal harus selesai dalam ~1x latency login,
+# bukan N x (seperti waktu masih pakai satu lock global). Sekalian cek N request untuk user
+# yang SAMA cuma menghasilkan 1 login.
+# Kredensial & cookie dibaca dari memori (bukan MySQL), selebihnya jalur login asli.
+#
+#   python benchmarks/check_parallel_login.py
+#   python benchmarks/check_parallel_login.py --users 16 --route-latency /login=500
+#
+# Exit code 1 kalau salah satu cek gagal.
+
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import standin_server
+
+
+class MemoryGateUser:
+    """Pengganti GateUser: kredensial stand-in per user_id, tanpa DB."""
+    def __init__(self, password):
+        self.password = password
+
+    def get_credentials_by_user_id(self, user_id):
+        return user_id, f"2341010{int(user_id):04d}", self.password
+
+    def invalidate_credentials(self, user_id=None):
+        pass
+
+
+class MemoryGateSession:
+    """Pengganti GateSession: tidak ada cookie tersimpan, simpan = no-op."""
+    def load_cookies(self, user_id):
+        return None
+
+    def save_cookies(self, gate_user_id, session_obj, user_agent):
+        return True
+
+
+def run_parallel(gc, user_ids):
+    """Panggil get_authenticated_session untuk tiap user_id di thread sendiri, return (detik, hasil)."""
+    results = {}
+    barrier = threading.Barrier(len(user_ids))
+
+    def worker(i, uid):
+        barrier.wait()
+        results[i] = gc.get_authenticated_session(uid)
+
+    threads = [threading.Thread(target=worker, args=(i, uid)) for i, uid in enumerate(user_ids)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, [results[i] for i in range(len(user_ids))]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cek login paralel per user (stand-in lokal)")
+    ap.add_argument("--users", type=int, default=8, help="jumlah user login barengan")
+    ap.add_argument("--max-ratio", type=float, default=2.0,
+                    help="batas waktu paralel / waktu 1 login (lock global ~= jumlah user)")
+    standin_server.add_state_args(ap)
+    args = ap.parse_args()
+    if not args.route_latency:
+        args.route_latency = ["/login=300"]  # login Gate lambat, route lain cepat
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = standin_server.StandinServer(standin_server.state_from_args(args)).start()
+    os.environ["GATE_URL"], os.environ["SICYCA_URL"] = server.gate_url, server.sicyca_url
+    for key in ("DB_HOST", "DB_USERNAME", "DB_DATABASE"):
+        os.environ.setdefault(key, "check")  # tidak pernah konek DB
+    logging.disable(logging.CRITICAL)
+    import controller.GateController as gc
+    gc.gate_user_model = MemoryGateUser(args.password)
+    gc.gate_session_model = MemoryGateSession()
+
+    failures = []
+    try:
+        # 1 login sendirian = patokan latency login
+        single, (sess,) = run_parallel(gc, [1000])
+        if sess is None:
+            failures.append("login tunggal gagal (cek --password / stand-in)")
+
+        # N user berbeda barengan: harus ~1x latency, bukan N x
+        user_ids = list(range(1, args.users + 1))
+        wall, sessions = run_parallel(gc, user_ids)
+        ratio = wall / single if single else float("inf")
+        ok = sum(1 for s in sessions if s is not None)
+        print(f"1 login: {single * 1000:.0f} ms | {args.users} user paralel: {wall * 1000:.0f} ms "
+              f"({ratio:.2f}x, lock global ~{args.users}x) | sukses {ok}/{args.users}")
+        if ok != args.users:
+            failures.append(f"hanya {ok}/{args.users} login sukses")
+        if ratio > args.max_ratio:
+            failures.append(f"login paralel {ratio:.2f}x latency login (> {args.max_ratio}x): masih serial?")
+
+        # N request user yang SAMA (belum login) barengan: cuma boleh 1 login ke Gate
+        logins_before = server.state.stats["logins"]
+        wall_same, sessions = run_parallel(gc, [2000] * args.users)
+        logins = server.state.stats["logins"] - logins_before
+        same_obj = len({id(s) for s in sessions}) == 1 and sessions[0] is not None
+        print(f"{args.users} request user sama: {wall_same * 1000:.0f} ms, login ke Gate: {logins}x, "
+              f"session sama: {same_obj}")
+        if logins != 1 or not same_obj:
+            failures.append(f"user sama login {logins}x (harusnya 1x, session dipakai bersama)")
+    finally:
+        server.stop()
+
+    for f in failures:
+        print(f"GAGAL: {f}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# benchmarks/load_driver.py
+# Load test end-to-end: N user simulasi login lewat Gate SSO (login_gateDinamika asli),
+# lalu berulang-ulang memanggil endpoint Sicyca seperti app (parser asli scrapper_tables),
+# termasuk login ulang otomatis saat sesi kedaluwarsa. Target: stand-in lokal (standin_server.py),
+# JANGAN diarahkan ke server kampus.
+#
+#   python benchmarks/load_driver.py --spawn --users 20 --duration 30
+#   python benchmarks/load_driver.py --spawn --users 50 --latency-ms 80 --jitter-ms 40 --session-ttl 10
+#   python benchmarks/load_driver.py --gate http://127.0.0.1:8801 --sicyca http://127.0.0.1:8802 --json hasil.json
+#
+# Laporan per endpoint: jumlah ok/gagal, throughput (ok/s), latency p50/p95/p99.
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import threading
+from collections import defaultdict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import standin_server
+
+ENDPOINTS = ["check_validity", "akademik", "krs", "table_proxy", "komunitas", "sicyca_api", "foto"]
+QUERIES = ["budi", "siti", "agus", "dewi", "eko", "rina", "andi", "putri"]
+
+
+class SessionExpired(Exception):
+    pass
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class VirtualUser:
+    """Satu user simulasi: session requests sendiri, cookie sendiri, global_token sendiri."""
+    def __init__(self, idx, password, mix, deadline):
+        from controller.GateController import create_session_obj
+        self.username = f"2341010{idx:04d}"
+        self.password = password
+        self.mix = mix
+        self.deadline = deadline
+        self.session = create_session_obj()
+        self.global_token = None
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.rng = random.Random(idx)
+
+    # --- util ---
+    def _get(self, path, **kwargs):
+        from upstream import TARGET_URL
+        r = self.session.get(f"{TARGET_URL}{path}", timeout=30, **kwargs)
+        self._check(r)
+        return r
+
+    def _check(self, r):
+        from upstream import GATE_ROOT
+        if r.url.startswith(f"{GATE_ROOT}/login"):
+            raise SessionExpired()
+        r.raise_for_status()
+
+    def timed(self, name, fn):
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except SessionExpired:
+            self.errors[name] += 1
+            self.errors["session_expired"] += 1
+            self.login("relogin")
+            return
+        except Exception:
+            self.errors[name] += 1
+            return
+        self.latencies[name].append(time.perf_counter() - t0)
+
+    # --- alur ---
+    def login(self, name="login"):
+        from controller.GateController import login_gateDinamika
+        self.global_token = None
+        t0 = time.perf_counter()
+        if login_gateDinamika(self.session, self.username, self.password):
+            self.latencies[name].append(time.perf_counter() - t0)
+            return True
+        self.errors[name] += 1
+        return False
+
+    def check_validity(self):
+        from controller.GateController import check_validity
+        if not check_validity(self.session):
+            raise SessionExpired()
+
+    def akademik(self):
+        from scrapper_tables import extract_table, JADWAL_MINGGU_INI
+        extract_table(self._get("/akademik").text, JADWAL_MINGGU_INI)
+
+    def krs(self):
+        from scrapper_tables import extract_table, KRS_LIST
+        extract_table(self._get("/akademik/krs").text, KRS_LIST)
+
+    def table_proxy(self):
+        from scrapper_tables import parse_krs_detail
+        t = self.rng.choice(["matakuliah", "kehadiran", "nilai"])
+        parse_krs_detail(self._get("/table-proxy/", params={"t": t, "kelas": "P1", "mk": "410101"}).text)
+
+    def komunitas(self):
+        from scrapper_tables import extract_table, KOMUNITAS_SEARCH
+        role = self.rng.choice(["mahasiswa", "staff"])
+        extract_table(self._get(f"/komunitas/{role}/", params={"q": self.rng.choice(QUERIES)}).text, KOMUNITAS_SEARCH)
+
+    def sicyca_api(self):
+        from upstream import GATE_ROOT, TARGET_URL
+        from scrapper_requests import _extract_global_token
+        if not self.global_token:
+            r = self.session.get(f"{GATE_ROOT}/", timeout=30)
+            self._check(r)
+            self.global_token, _ = _extract_global_token(r.text)
+            if not self.global_token:
+                raise RuntimeError("global_token tidak ditemukan")
+        r = self.session.post(f"{TARGET_URL}/sicyca_api.php",
+                              data={"nim": self.username, "token": self.global_token, "masa_studi": "1"}, timeout=30)
+        if r.status_code == 403:
+            self.global_token = None  # token basi -> ambil ulang di panggilan berikutnya
+        self._check(r)
+        r.json()
+
+    def foto(self):
+        from upstream import TARGET_URL
+        r = self.session.get(f"{TARGET_URL}/static/foto/mahasiswa/{self.username}.jpg", timeout=30)
+        if r.status_code == 404:
+            return  # foto memang tidak ada: tetap dihitung sukses
+        self._check(r)
+
+    def run(self):
+        if not self.login():
+            return
+        i = self.rng.randrange(len(self.mix))
+        while time.monotonic() < self.deadline:
+            name = self.mix[i % len(self.mix)]
+            self.timed(name, getattr(self, name))
+            i += 1
+
+
+def run_load(users, duration, password, mix):
+    deadline = time.monotonic() + duration
+    vusers = [VirtualUser(i, password, mix, deadline) for i in range(users)]
+    threads = [threading.Thread(target=v.run, daemon=True) for v in vusers]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies, errors = defaultdict(list), defaultdict(int)
+    for v in vusers:
+        for k, vals in v.latencies.items():
+            latencies[k].extend(vals)
+        for k, n in v.errors.items():
+            errors[k] += n
+
+    results = []
+    for name in ["login", "relogin"] + mix:
+        vals = sorted(latencies.get(name, []))
+        if not vals and not errors.get(name):
+            continue
+        results.append({
+            "endpoint": name,
+            "ok": len(vals),
+            "errors": errors.get(name, 0),
+            "ops_per_sec": len(vals) / elapsed,
+            "p50_ms": percentile(vals, 50) * 1000,
+            "p95_ms": percentile(vals, 95) * 1000,
+            "p99_ms": percentile(vals, 99) * 1000,
+        })
+    return elapsed, results, errors.get("session_expired", 0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Load test Gate SSO + Sicyca (stand-in lokal)")
+    ap.add_argument("--users", type=int, default=10, help="jumlah user bersamaan")
+    ap.add_argument("--duration", type=float, default=20, help="lama tes (detik)")
+    ap.add_argument("--mix", default=",".join(ENDPOINTS), help=f"endpoint yang dipanggil bergiliran ({','.join(ENDPOINTS)})")
+    ap.add_argument("--gate", default=os.getenv("GATE_URL"), help="URL Gate stand-in (kalau tidak --spawn)")
+    ap.add_argument("--sicyca", default=os.getenv("SICYCA_URL"), help="URL Sicyca stand-in (kalau tidak --spawn)")
+    ap.add_argument("--spawn", action="store_true", help="jalankan stand-in di proses ini (port acak)")
+    ap.add_argument("--json", dest="json_out", help="simpan hasil ke file JSON")
+    standin_server.add_state_args(ap)
+    args = ap.parse_args()
+
+    mix = [m.strip() for m in args.mix.split(",") if m.strip()]
+    unknown = set(mix) - set(ENDPOINTS)
+    if unknown:
+        ap.error(f"endpoint tidak dikenal: {', '.join(sorted(unknown))}")
+
+    server = None
+    if args.spawn:
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        server = standin_server.StandinServer(standin_server.state_from_args(args)).start()
+        args.gate, args.sicyca = server.gate_url, server.sicyca_url
+    if not args.gate or not args.sicyca:
+        ap.error("butuh --spawn atau --gate/--sicyca (atau env GATE_URL/SICYCA_URL)")
+
+    # upstream.py membaca env saat import -> set sebelum modul app di-import
+    os.environ["GATE_URL"], os.environ["SICYCA_URL"] = args.gate, args.sicyca
+    for key in ("DB_HOST", "DB_USERNAME", "DB_DATABASE"):
+        os.environ.setdefault(key, "load-driver")  # tidak pernah konek DB
+    logging.disable(logging.CRITICAL)
+    import controller.GateController  # noqa: F401  (import sekali di thread utama)
+
+    print(f"Gate={args.gate} Sicyca={args.sicyca} users={args.users} durasi={args.duration}s")
+    elapsed, results, expired = run_load(args.users, args.duration, args.password, mix)
+
+    print(f"\n{'endpoint':<16} {'ok':>7} {'gagal':>6} {'ok/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['endpoint']:<16} {r['ok']:>7} {r['errors']:>6} {r['ops_per_sec']:>9.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+    total_ok = sum(r["ok"] for r in results)
+    print(f"\nTotal {total_ok} request sukses dalam {elapsed:.1f}s ({total_ok / elapsed:.1f}/s), "
+          f"sesi kedaluwarsa terdeteksi: {expired}")
+    if server:
+        print(f"Stand-in: {json.dumps(server.state.stats)}")
+
+    if args.json_out:
+        out = args.json_out if os.path.isabs(args.json_out) else os.path.join(ROOT, args.json_out)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "python": platform.python_version(),
+                         "users": args.users, "duration": elapsed, "gate": args.gate, "sicyca": args.sicyca,
+                         "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "error_rate": args.error_rate,
+                         "session_ttl": args.session_ttl},
+                "session_expired": expired,
+                "results": results,
+            }, f, indent=2)
+        print(f"Hasil disimpan ke {out}")
+    if server:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
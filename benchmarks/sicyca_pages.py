@@ -0,0 +1,149 @@
+# benchmarks/sicyca_pages.py
+# Halaman HTML sintetis yang meniru Gate & Sicyca, dipakai bersama oleh benchmark
+# (bench_krs_detail, bench_parsers) dan stand-in server lokal (standin_server.py).
+
+import base64
+import hashlib
+import os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# --- halaman sintetis mirip /table-proxy/ ---
+HEAD = """<html><head><title>Sicyca: Detail</title>
+<style>.sicycatable td { padding: 2px; } a:hover { color: red }</style>
+<script>var cfg = {mode: "detail", url: "https://sicyca.dinamika.ac.id"};</script></head><body>
+<!-- table-proxy: render ulang -->
+"""
+TAIL = "<div class='foot'>Dicetak: Senin, 13 Oktober 2025</div></body></html>"
+
+
+def page_nilai(n):
+    rows = "".join(
+        f"<tr><td>{i + 1}</td><td>Tugas {i + 1}</td><td>{(i * 7) % 100}</td><td>{10 + i % 5}%</td></tr>"
+        for i in range(n)
+    )
+    return (HEAD + "<div class='tabletitle'>NILAI: Pemrograman Web Lanjut (P1)</div>\n"
+            "<table class='sicycatable'><tr><th>No</th><th>Komponen</th><th>Nilai</th><th>Bobot</th></tr>"
+            f"{rows}<tr><td colspan='4'></td></tr></table>" + TAIL)
+
+
+def page_kehadiran(n):
+    rows = "".join(
+        f"<tr><td>{i + 1}</td><td>Senin, {1 + i % 28} Oktober 2025</td><td>{'Hadir' if i % 7 else 'Alpa'}</td>"
+        f"<td><a href='/akademik/kehadiran/{i}'>Lihat</a></td></tr>"
+        for i in range(n)
+    )
+    return (HEAD + "<h3>Rekap Kehadiran!!</h3>\n"
+            "<table class='sicycatable'><thead><tr><th>Pertemuan</th><th>Tanggal</th><th>Status</th><th></th></tr></thead>"
+            f"<tbody>{rows}</tbody></table>" + TAIL)
+
+
+def page_matakuliah(n, prak=False):
+    mhs = "".join(
+        f"<tr><td>{i + 1}</td><td><a href='/komunitas/mahasiswa/?nim=2341010{i:04d}'>2341010{i:04d}</a></td>"
+        f"<td>Mahasiswa Contoh {i}</td>" + (f"<td>{'A' if i % 2 else 'B'}</td>" if prak else "") + "</tr>"
+        for i in range(n)
+    )
+    prak_th = "<th>Group Prak</th>" if prak else ""
+    return (HEAD +
+            "<div class='info'>Dosen: Agus Dwi Churniawan, S.Si., M.Kom.<br/>\nKelas: P1<br/>\n"
+            "Ruang : B505\nJadwal: Senin 07:30-10:50<br/>Keterangan penting tanpa titik dua</div>\n"
+            "<table class='sicycatable'><tr><td>Matakuliah</td><td>SKS</td><td>Dosen</td></tr>"
+            "<tr><td>Pemrograman Mobile Lanjut</td><td>3</td><td>Agus</td></tr></table>\n"
+            "<b>PESERTA KULIAH</b>\n"
+            f"<table class='sicycatable'><tr><th>No</th><th>NIM</th><th>Nama</th>{prak_th}</tr>{mhs}</table>\n"
+            "<p>Catatan:</p><table><tr><td>x</td><td></td></tr><tr><td>1</td><td>2</td></tr></table>" + TAIL)
+
+
+# --- Sicyca: KRS, pencarian komunitas, jadwal ---
+def krs_page(n=10):
+    """Halaman KRS sintetis (tabel tableView 10 kolom + onclick modal), mirip /akademik/krs."""
+    rows = "".join(
+        f"<tr class='{'even' if i % 2 else 'odd'}'><td>Senin</td><td>07:30 - 10:50</td>"
+        f"<td style='text-align:left'><a href='#' onclick=\"showModalMatakuliah('P{i % 3 + 1}','4101{i:02d}','Matakuliah {i}')\">"
+        f"Matakuliah {i} (P{i % 3 + 1})</a></td><td><a href='https://mybrilian.dinamika.ac.id/'>Site</a></td>"
+        f"<td>B50{i % 9}</td><td>3</td><td>Detail</td><td>{'AB'[i % 2]}</td><td>{80 + i % 20}%</td><td>-</td></tr>"
+        for i in range(n)
+    )
+    head = "<tr><th>Hari</th><th>Waktu</th><th>Matakuliah (Kelas)</th><th>Brilian</th><th>Ruang</th>" \
+           "<th>SKS</th><th>Nilai</th><th>Nilai Minimal</th><th>Kehadiran</th><th>Keterangan</th></tr>"
+    return (f"<html><head><title>Sicyca</title></head><body><div class='tabletitle'>KRS</div>"
+            f"<table id='tableView' class='sicycatablemanual'>{head}{rows}</table></body></html>")
+
+
+def search_page(role, query, n):
+    """Hasil /komunitas/mahasiswa/ atau /komunitas/staff/ (n baris, deterministik per query)."""
+    seed = int(hashlib.md5(f"{role}:{query}".encode()).hexdigest()[:6], 16)
+    if role == "mahasiswa":
+        head = "<tr><th>NIM</th><th>Nama</th><th>Program Studi</th><th>Angkatan</th></tr>"
+        rows = "".join(
+            f"<tr><td>2341010{(seed + i) % 10000:04d}</td><td>{query.title()} Mahasiswa {i}</td>"
+            f"<td>S1 Sistem Informasi</td><td>20{20 + i % 5}</td></tr>"
+            for i in range(n)
+        )
+    else:
+        head = "<tr><th>NIK</th><th>Nama</th><th>Bagian</th></tr>"
+        rows = "".join(
+            f"<tr><td>{(seed + i) % 1000000:06d}</td><td>{query.title()} Staff {i}</td><td>Bagian {i % 7}</td></tr>"
+            for i in range(n)
+        )
+    return (f"<html><head><title>Sicyca - Komunitas</title></head><body>"
+            f"<div class='tabletitle'>HASIL PENCARIAN</div><table class='sicycatable'>{head}{rows}</table></body></html>")
+
+
+def jadwal_page():
+    """Halaman /akademik: pakai rekaman asli kalau ada (debug_output.html)."""
+    path = os.path.join(ROOT, "debug_output.html")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    rows = "".join(
+        f"<tr><td>Senin, {13 + i % 5} Oktober 2025</td><td>07:30-10:50</td><td>B50{i}</td>"
+        f"<td>Matakuliah {i}</td><td>Luring</td><td></td></tr>" for i in range(10)
+    )
+    return ("<html><body><div class='tabletitle'><span class='square'>&nbsp;</span>JADWAL KEGIATAN MINGGU INI"
+            "<span>Periode</span></div><table class='sicycatable'><tr><th>Hari, Tanggal</th><th>Jam</th>"
+            "<th>Ruangan</th><th>Nama Matakuliah</th><th>Status Kuliah</th><th>Keterangan</th></tr>"
+            f"{rows}</table></body></html>")
+
+
+def sicyca_dashboard_page(username):
+    return (f"<html><head><title>Sistem Informasi Cyber Campus</title></head><body>"
+            f"<div id='dashboardcontainer'>Selamat datang, {username}</div></body></html>")
+
+
+# --- Gate: login, dashboard, SSO hidden form ---
+def gate_login_page(csrf, error=None):
+    err = f"<div class='alert'>{error}</div>" if error else ""
+    return (f"<html><head><title>Gate Dinamika</title><meta name=\"csrf-token\" content=\"{csrf}\"></head><body>"
+            f"<div id=\"login-dropdown\">Masuk ke Sistem</div>{err}"
+            f"<form action=\"/login\" method=\"POST\" id=\"gate-login-form\">"
+            f"<input type=\"hidden\" name=\"_token\" value=\"{csrf}\">"
+            f"<input type=\"text\" name=\"userid\"><input type=\"password\" name=\"password\">"
+            f"<button type=\"submit\">Masuk</button></form></body></html>")
+
+
+def gate_dashboard_page(username, global_token):
+    return (f"<html><head><title>Gate Dinamika</title></head><body><div id='app'>Halo {username}</div>"
+            f"<script>var global_token = \"{global_token}\"; var base = '/';</script></body></html>")
+
+
+def sso_form_page(action, fields):
+    """Form tersembunyi auto-submit (alur redirect SSO Gate -> Sicyca)."""
+    inputs = "".join(f"<input type=\"hidden\" name=\"{k}\" value=\"{v}\">" for k, v in fields.items())
+    return (f"<html><body onload=\"document.forms[0].submit()\"><p>Mengalihkan...</p>"
+            f"<form method=\"POST\" action=\"{action}\">{inputs}</form></body></html>")
+
+
+# --- foto: JPEG valid 1x1, dipadatkan segmen komentar supaya ukurannya mirip foto asli ---
+_JPEG_1PX = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQEASABIAAD/2wBDAP//////////////////////////////////////////////////////////////////"
+    "////////////////////wgALCAABAAEBAREA/8QAFBABAAAAAAAAAAAAAAAAAAAAAP/aAAgBAQABPxA="
+)
+
+
+def photo_jpeg(id_, size=12000):
+    pad = hashlib.sha256(str(id_).encode()).digest() * (max(0, size - len(_JPEG_1PX)) // 32 + 1)
+    pad = pad[:max(0, min(size - len(_JPEG_1PX), 65533))]
+    comment = b"\xff\xfe" + (len(pad) + 2).to_bytes(2, "big") + pad
+    return _JPEG_1PX[:2] + comment + _JPEG_1PX[2:]
@@ -0,0 +1,368 @@
+# benchmarks/standin_server.py
+# Stand-in lokal untuk Gate SSO + Sicyca, supaya login/scraping bisa di-load-test
+# tanpa membebani server kampus. Yang ditiru:
+#   Gate  : GET/POST /login (form #gate-login-form + _token CSRF), rantai form SSO tersembunyi
+#           (/login/sso?step=N), dashboard "/" berisi var global_token.
+#   Sicyca: /sso/callback, /dashboard, /akademik, /akademik/krs, /table-proxy/?t=...,
+#           /komunitas/mahasiswa/, /komunitas/staff/, POST /sicyca_api.php, /static/foto/...
+#   Cookie: XSRF-TOKEN & gate_dinamika_session (Gate), SSO_TOKEN (Sicyca), kedaluwarsa setelah --session-ttl.
+#   Injeksi: --latency-ms/--jitter-ms, --route-latency PATH=MS, --error-rate (balas 503).
+#
+# Jalankan:  python benchmarks/standin_server.py --gate-port 8801 --sicyca-port 8802
+# Lalu arahkan app:  GATE_URL=http://127.0.0.1:8801 SICYCA_URL=http://127.0.0.1:8802 python app.py
+# Kontrol: GET <gate>/__standin/stats, POST <gate>/__standin/expire (paksa semua sesi kedaluwarsa)
+
+import os
+import sys
+import time
+import json
+import random
+import secrets
+import argparse
+import threading
+import logging
+
+from flask import Flask, request, redirect, make_response, jsonify, Response, abort
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sicyca_pages as pages
+
+
+class StandinState:
+    """Sesi Gate & token SSO di memori + konfigurasi injeksi latency/error."""
+    def __init__(self, password="standin", session_ttl=900, sso_hops=2, latency_ms=0, jitter_ms=0,
+                 route_latency=None, error_rate=0.0, peserta=40, search_rows=25, accept_any=False):
+        self.password = password
+        self.session_ttl = session_ttl
+        self.sso_hops = max(1, sso_hops)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.route_latency = route_latency or {}
+        self.error_rate = error_rate
+        self.peserta = peserta
+        self.search_rows = search_rows
+        self.accept_any = accept_any
+        self.lock = threading.Lock()
+        self.gate_sessions = {}   # sid -> {"csrf", "user", "expires", "global_token"}
+        self.sso_tokens = {}      # token -> {"user", "expires", "sid"}
+        self.tickets = {}         # ticket SSO sekali pakai -> sid
+        self.stats = {"requests": 0, "errors_injected": 0, "logins": 0, "login_failed": 0, "expired": 0}
+        self.jadwal_html = pages.jadwal_page()
+        self.krs_html = pages.krs_page(10)
+
+    def bump(self, key, n=1):
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    def expire_all(self):
+        with self.lock:
+            for s in self.gate_sessions.values():
+                s["expires"] = 0
+            for t in self.sso_tokens.values():
+                t["expires"] = 0
+
+    # --- sesi Gate ---
+    def new_anon_session(self):
+        sid = secrets.token_urlsafe(24)
+        with self.lock:
+            self.gate_sessions[sid] = {"csrf": secrets.token_urlsafe(16), "user": None, "expires": 0, "global_token": None}
+        return sid
+
+    def gate_session(self, sid, logged_in=True):
+        s = self.gate_sessions.get(sid or "")
+        if s is None:
+            return None
+        if logged_in:
+            if not s["user"]:
+                return None
+            if s["expires"] < time.time():
+                self.bump("expired")
+                s["user"] = None
+                return None
+        return s
+
+    def sso_user(self, token):
+        t = self.sso_tokens.get(token or "")
+        if t is None:
+            return None
+        if t["expires"] < time.time():
+            self.bump("expired")
+            self.sso_tokens.pop(token, None)
+            return None
+        return t["user"]
+
+    def issue_sso(self, sid):
+        s = self.gate_sessions[sid]
+        token = secrets.token_urlsafe(24)
+        with self.lock:
+            self.sso_tokens[token] = {"user": s["user"], "expires": s["expires"], "sid": sid}
+        return token
+
+
+def _inject(state):
+    """before_request bersama: latency + error 503 acak (kecuali endpoint kontrol)."""
+    def hook():
+        if request.path.startswith("/__standin"):
+            return None
+        state.bump("requests")
+        delay = state.route_latency.get(request.path, state.latency_ms)
+        if state.jitter_ms:
+            delay += random.uniform(0, state.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000.0)
+        if state.error_rate and random.random() < state.error_rate:
+            state.bump("errors_injected")
+            return Response("Service Unavailable (standin)", status=503)
+        return None
+    return hook
+
+
+def create_gate_app(state, sicyca_url):
+    app = Flask("standin_gate")
+    app.before_request(_inject(state))
+
+    def login_page(sid=None, error=None, status=200):
+        if sid is None or sid not in state.gate_sessions:
+            sid = state.new_anon_session()
+        s = state.gate_sessions[sid]
+        resp = make_response(pages.gate_login_page(s["csrf"], error), status)
+        resp.set_cookie("XSRF-TOKEN", s["csrf"], path="/")
+        resp.set_cookie("gate_dinamika_session", sid, path="/", httponly=True)
+        return resp
+
+    @app.get("/login")
+    def login_get():
+        sid = request.cookies.get("gate_dinamika_session")
+        if state.gate_session(sid):
+            return redirect("/")
+        return login_page(sid)
+
+    @app.post("/login")
+    def login_post():
+        sid = request.cookies.get("gate_dinamika_session")
+        s = state.gate_session(sid, logged_in=False)
+        if s is None or request.form.get("_token") != s["csrf"]:
+            # Mirip Laravel: CSRF tidak cocok -> 419
+            return login_page(None, "Page Expired", status=419)
+
+        user = (request.form.get("userid") or request.form.get("username") or "").strip()
+        if not user or (not state.accept_any and request.form.get("password") != state.password):
+            state.bump("login_failed")
+            return login_page(sid, "Username atau password salah")
+
+        with state.lock:
+            s["user"] = user
+            s["expires"] = time.time() + state.session_ttl
+            s["global_token"] = "$2y$10$" + secrets.token_urlsafe(40)
+            ticket = secrets.token_urlsafe(16)
+            state.tickets[ticket] = sid
+        state.bump("logins")
+        return _sso_step(1, ticket)
+
+    def _sso_step(step, ticket):
+        # Rantai form tersembunyi: hop 1..N-1 tetap di Gate (/login/sso), hop terakhir ke Sicyca
+        if step < state.sso_hops:
+            return pages.sso_form_page(f"/login/sso?step={step + 1}", {"ticket": ticket, "step": step + 1})
+        return pages.sso_form_page(f"{sicyca_url}/sso/callback", {"ticket": ticket})
+
+    @app.post("/login/sso")
+    def login_sso():
+        ticket = request.form.get("ticket", "")
+        if ticket not in state.tickets:
+            return redirect("/login")
+        return _sso_step(int(request.args.get("step", "1")), ticket)
+
+    @app.get("/")
+    def dashboard():
+        s = state.gate_session(request.cookies.get("gate_dinamika_session"))
+        if not s:
+            return redirect("/login")
+        return pages.gate_dashboard_page(s["user"], s["global_token"])
+
+    @app.get("/__standin/stats")
+    def stats():
+        with state.lock:
+            data = dict(state.stats, gate_sessions=len(state.gate_sessions), sso_tokens=len(state.sso_tokens))
+        return jsonify(data)
+
+    @app.post("/__standin/expire")
+    def expire():
+        state.expire_all()
+        return jsonify({"expired": True})
+
+    return app
+
+
+def create_sicyca_app(state, gate_url):
+    app = Flask("standin_sicyca")
+    app.before_request(_inject(state))
+
+    def current_user():
+        """User dari SSO_TOKEN; kalau belum ada tapi sesi Gate hidup -> auto-SSO (set SSO_TOKEN baru)."""
+        user = state.sso_user(request.cookies.get("SSO_TOKEN"))
+        if user:
+            return user, None
+        sid = request.cookies.get("gate_dinamika_session")
+        s = state.gate_session(sid)
+        if s:
+            return s["user"], state.issue_sso(sid)
+        return None, None
+
+    def guarded(render):
+        user, new_token = current_user()
+        if not user:
+            return redirect(f"{gate_url}/login")
+        resp = make_response(render(user))
+        if new_token:
+            resp.set_cookie("SSO_TOKEN", new_token, path="/")
+        return resp
+
+    @app.post("/sso/callback")
+    def sso_callback():
+        sid = state.tickets.pop(request.form.get("ticket", ""), None)
+        if not sid or not state.gate_session(sid):
+            return redirect(f"{gate_url}/login")
+        resp = redirect("/dashboard")
+        resp.set_cookie("SSO_TOKEN", state.issue_sso(sid), path="/")
+        return resp
+
+    @app.get("/dashboard")
+    def dashboard():
+        return guarded(pages.sicyca_dashboard_page)
+
+    @app.get("/akademik")
+    def akademik():
+        return guarded(lambda user: state.jadwal_html)
+
+    @app.get("/akademik/krs")
+    def krs():
+        return guarded(lambda user: state.krs_html)
+
+    @app.get("/table-proxy/")
+    def table_proxy():
+        t = request.args.get("t", "matakuliah")
+        if t == "nilai":
+            return guarded(lambda user: pages.page_nilai(12))
+        if t == "kehadiran":
+            return guarded(lambda user: pages.page_kehadiran(16))
+        prak = bool(request.args.get("grup"))
+        return guarded(lambda user: pages.page_matakuliah(state.peserta, prak=prak))
+
+    @app.get("/komunitas/mahasiswa/")
+    def komunitas_mhs():
+        return guarded(lambda user: pages.search_page("mahasiswa", request.args.get("q", ""), state.search_rows))
+
+    @app.get("/komunitas/staff/")
+    def komunitas_staff():
+        return guarded(lambda user: pages.search_page("staff", request.args.get("q", ""), state.search_rows))
+
+    @app.post("/sicyca_api.php")
+    def sicyca_api():
+        user, _ = current_user()
+        if not user:
+            return redirect(f"{gate_url}/login")
+        token = request.form.get("token")
+        valid = any(s["user"] == user and s["global_token"] == token for s in list(state.gate_sessions.values()))
+        if not valid or request.form.get("nim") != user:
+            return jsonify({"status": False, "message": "token tidak valid"}), 403
+        if request.form.get("masa_studi"):
+            return jsonify({"data": "3 Tahun 1 Bulan"})
+        if request.form.get("ultah"):
+            return jsonify({"data": [
+                {"NAMA": f"Mahasiswa Ultah {i}", "PRODI": "S1 Sistem Informasi", "TANGGAL": f"{1 + i % 28:02d}-10-200{i % 6}"}
+                for i in range(30)
+            ]})
+        return jsonify({"data": []})
+
+    @app.get("/static/foto/<any(mahasiswa, karyawan):kind>/<id_>.jpg")
+    def foto(kind, id_):
+        user, _ = current_user()
+        if not user:
+            return redirect(f"{gate_url}/login")
+        if id_.endswith("0"):
+            abort(404)  # sebagian foto memang tidak ada di Sicyca
+        return Response(pages.photo_jpeg(id_), mimetype="image/jpeg")
+
+    return app
+
+
+class StandinServer:
+    """Jalankan Gate & Sicyca stand-in di thread (dipakai juga oleh load_driver.py --spawn)."""
+    def __init__(self, state, host="127.0.0.1", gate_port=0, sicyca_port=0):
+        self.state = state
+        # Port 0 = pilih port kosong. URL Sicyca/Gate saling butuh, jadi server dibuat dulu baru app dipasang.
+        self._gate = make_server(host, gate_port, Flask("placeholder"), threaded=True)
+        self._sicyca = make_server(host, sicyca_port, Flask("placeholder"), threaded=True)
+        self.gate_url = f"http://{host}:{self._gate.server_port}"
+        self.sicyca_url = f"http://{host}:{self._sicyca.server_port}"
+        self._gate.app = create_gate_app(state, self.sicyca_url)
+        self._sicyca.app = create_sicyca_app(state, self.gate_url)
+        self._threads = []
+
+    def start(self):
+        for srv in (self._gate, self._sicyca):
+            t = threading.Thread(target=srv.serve_forever, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self):
+        for srv in (self._gate, self._sicyca):
+            srv.shutdown()
+
+
+def _parse_route_latency(items):
+    out = {}
+    for item in items or []:
+        path, _, ms = item.partition("=")
+        out[path] = float(ms)
+    return out
+
+
+def add_state_args(ap):
+    env = os.getenv
+    ap.add_argument("--password", default=env("STANDIN_PASSWORD", "standin"), help="password yang diterima Gate")
+    ap.add_argument("--accept-any", action="store_true", help="terima password apa pun")
+    ap.add_argument("--session-ttl", type=float, default=float(env("STANDIN_SESSION_TTL", "900")), help="umur sesi (detik)")
+    ap.add_argument("--sso-hops", type=int, default=int(env("STANDIN_SSO_HOPS", "2")), help="jumlah form SSO tersembunyi")
+    ap.add_argument("--latency-ms", type=float, default=float(env("STANDIN_LATENCY_MS", "0")))
+    ap.add_argument("--jitter-ms", type=float, default=float(env("STANDIN_JITTER_MS", "0")))
+    ap.add_argument("--route-latency", action="append", metavar="PATH=MS", help="latency khusus per path")
+    ap.add_argument("--error-rate", type=float, default=float(env("STANDIN_ERROR_RATE", "0")), help="peluang balas 503 (0-1)")
+    ap.add_argument("--peserta", type=int, default=40, help="jumlah mahasiswa di /table-proxy/?t=matakuliah")
+    ap.add_argument("--search-rows", type=int, default=25, help="jumlah baris hasil /komunitas/*")
+
+
+def state_from_args(args):
+    return StandinState(
+        password=args.password, session_ttl=args.session_ttl, sso_hops=args.sso_hops,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, route_latency=_parse_route_latency(args.route_latency),
+        error_rate=args.error_rate, peserta=args.peserta, search_rows=args.search_rows, accept_any=args.accept_any,
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Stand-in lokal Gate SSO + Sicyca")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--gate-port", type=int, default=8801)
+    ap.add_argument("--sicyca-port", type=int, default=8802)
+    add_state_args(ap)
+    args = ap.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = StandinServer(state_from_args(args), args.host, args.gate_port, args.sicyca_port).start()
+    print(f"Gate stand-in   : {server.gate_url}")
+    print(f"Sicyca stand-in : {server.sicyca_url}")
+    print(f"Pakai di app    : GATE_URL={server.gate_url} SICYCA_URL={server.sicyca_url}")
+    print(json.dumps({"password": args.password, "session_ttl": args.session_ttl, "sso_hops": args.sso_hops,
+                      "latency_ms": args.latency_ms, "error_rate": args.error_rate}))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 import os
+import time
+import threading
 import mysql.connector
 from mysql.connector import Error
 from dotenv import load_dotenv
@@ -7,21 +9,249 @@ import logging
 # Load .env di root project
 load_dotenv()
 
+# === KONFIGURASI POOL ===
+# Ukuran pool dihitung PER PROSES (per worker gunicorn).
+# Default 8 = sama dengan --threads 8 di Dockerfile, jadi tiap thread kebagian 1 koneksi.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_BORROW_TIMEOUT = float(os.getenv("DB_POOL_BORROW_TIMEOUT", "5"))   # detik nunggu koneksi kosong
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))     # koneksi idle > ini ditutup
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "0"))     # 0 = ping setiap borrow
+
+
+def _connect_raw():
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        user=os.getenv("DB_USERNAME"),
+        password=os.getenv("DB_PASSWORD"),
+        database=os.getenv("DB_DATABASE")
+    )
+
+
+class PooledConnection:
+    """
+    Pembungkus koneksi MySQL dari pool.
+    Semua atribut diteruskan ke koneksi asli, tapi close() MENGEMBALIKAN koneksi ke pool
+    (bukan memutus TCP), jadi kode lama yang pakai conn.close() tetap jalan tanpa diubah.
+    """
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._closed = False
+
+    def __getattr__(self, name):
+        # Pakai __dict__ langsung biar tidak rekursi kalau __init__ belum selesai
+        return getattr(self.__dict__["_raw"], name)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._pool._release(self._raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        # Jaga-jaga kalau ada caller lupa close() -> slot pool tidak bocor
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Pool koneksi MySQL sederhana (thread-safe) dengan:
+    - ping-on-borrow (koneksi mati dibuang & diganti),
+    - reaping koneksi idle,
+    - batas waktu tunggu saat pool penuh,
+    - statistik (waktu tunggu, in-use, created, failures).
+    """
+    def __init__(self, size=DB_POOL_SIZE, borrow_timeout=DB_POOL_BORROW_TIMEOUT,
+                 idle_timeout=DB_POOL_IDLE_TIMEOUT, ping_interval=DB_POOL_PING_INTERVAL):
+        self.size = max(1, size)
+        self.borrow_timeout = borrow_timeout
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = []      # list of (raw_conn, last_used_ts) -> LIFO biar koneksi "hangat" dipakai duluan
+        self._in_use = 0
+        self._total = 0      # idle + in_use
+
+        self._stats = {
+            "borrowed": 0,
+            "created": 0,
+            "closed": 0,
+            "reaped": 0,
+            "ping_failures": 0,
+            "connect_failures": 0,
+            "borrow_timeouts": 0,
+            "borrow_wait_total": 0.0,
+            "borrow_wait_max": 0.0,
+        }
+
+    # --- internal ---
+    def _close_raw(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _reap_idle_locked(self, now):
+        """Tutup koneksi yang idle terlalu lama. Dipanggil dengan lock dipegang."""
+        if self.idle_timeout <= 0 or not self._idle:
+            return []
+        keep, expired = [], []
+        for raw, last_used in self._idle:
+            (expired if now - last_used > self.idle_timeout else keep).append((raw, last_used))
+        self._idle = keep
+        self._total -= len(expired)
+        self._stats["reaped"] += len(expired)
+        return [raw for raw, _ in expired]
+
+    def _is_alive(self, raw, last_used, now):
+        if self.ping_interval > 0 and now - last_used < self.ping_interval:
+            return True
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    # --- public ---
+    def borrow(self):
+        start = time.monotonic()
+        deadline = start + self.borrow_timeout
+        candidate = None
+        to_close = []
+
+        with self._cond:
+            to_close = self._reap_idle_locked(time.time())
+            while True:
+                if self._idle:
+                    candidate = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._total < self.size:
+                    # Reservasi slot, koneksi dibuat di luar lock
+                    self._total += 1
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["borrow_timeouts"] += 1
+                    logging.error(f"=== Pool DB penuh ({self.size}), timeout {self.borrow_timeout}s ===")
+                    for raw in to_close:
+                        self._close_raw(raw)
+                    return None
+                self._cond.wait(remaining)
+
+        for raw in to_close:
+            self._close_raw(raw)
+
+        raw = None
+        if candidate:
+            raw, last_used = candidate
+            if not self._is_alive(raw, last_used, time.time()):
+                logging.warning("=== Koneksi pool mati (ping gagal), membuat ulang ===")
+                self._close_raw(raw)
+                raw = None
+                with self._cond:
+                    self._stats["ping_failures"] += 1
+
+        if raw is None:
+            try:
+                raw = _connect_raw()
+                with self._cond:
+                    self._stats["created"] += 1
+                logging.info("=== Koneksi ke database berhasil ===")
+            except Error as e:
+                logging.error(f"=== Gagal konek database: {e} ===")
+                with self._cond:
+                    self._stats["connect_failures"] += 1
+                    self._total -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                return None
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._stats["borrowed"] += 1
+            self._stats["borrow_wait_total"] += waited
+            self._stats["borrow_wait_max"] = max(self._stats["borrow_wait_max"], waited)
+        return PooledConnection(self, raw)
+
+    def _release(self, raw):
+        healthy = True
+        try:
+            # Bersihkan transaksi yang belum di-commit biar tidak bocor ke peminjam berikutnya
+            # (cek hidup/mati cukup di ping-on-borrow, jangan tambah round-trip di sini)
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((raw, time.time()))
+            else:
+                self._total -= 1
+                self._stats["closed"] += 1
+            self._cond.notify()
+
+        if not healthy:
+            self._close_raw(raw)
+
+    def stats(self):
+        with self._cond:
+            s = dict(self._stats)
+            s.update({
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "total": self._total,
+                "borrow_wait_avg": (s["borrow_wait_total"] / s["borrowed"]) if s["borrowed"] else 0.0,
+            })
+        return s
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Pool dibuat lazy & per proses (aman untuk fork worker gunicorn)."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool()
+                _pool_pid = pid
+                logging.info(f"=== Pool DB dibuat (size={_pool.size}, pid={pid}) ===")
+    return _pool
+
+
 def get_connection():
-    try:
-        connection = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT"),
-            user=os.getenv("DB_USERNAME"),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_DATABASE")
-        )
-        
-        logging.info("=== Koneksi ke database berhasil ===")
-        return connection
-    except Error as e:
-        logging.error(f"=== Gagal konek database: {e} ===")
-        return None
+    """
+    Pinjam koneksi dari pool. Kembalikan dengan conn.close() atau pakai `with get_connection() as conn:`.
+    Return None kalau gagal konek / pool penuh (sama seperti perilaku lama).
+    """
+    return _get_pool().borrow()
+
+
+def get_pool_stats():
+    return _get_pool().stats()
+
+
 if not all([os.getenv("DB_HOST"), os.getenv("DB_USERNAME"), os.getenv("DB_DATABASE")]):
     logging.error(f"⚠️  Missing DB config in .env")
     raise SystemExit("⚠️  Missing DB config in .env")
@@ -4,25 +4,43 @@ import os
 import time
 import threading
 import logging
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from requests.adapters import HTTPAdapter, Retry
 from urllib.parse import urljoin, urlparse
 
 # Import Model
 from models.gate import GateUser, GateSession
+from upstream import GATE_ROOT, TARGET_URL, SICYCA_HOST
 
 load_dotenv()
 
-# Konfigurasi
-GATE_ROOT = "https://gate.dinamika.ac.id"
-TARGET_URL = "https://sicyca.dinamika.ac.id"
+# Konfigurasi (GATE_ROOT & TARGET_URL dari upstream.py, bisa di-override lewat env)
 VALIDITY_CHECK_INTERVAL = 300 
 PROXY_URL = os.getenv("HTTP_PROXY_URL")
 
+# === SESSION KEEPER (validasi di background) ===
+KEEPER_INTERVAL = int(os.getenv("SESSION_KEEPER_INTERVAL", "30"))   # seberapa sering keeper jalan (detik)
+KEEPER_LEAD = int(os.getenv("SESSION_KEEPER_LEAD", "60"))           # probe sekian detik SEBELUM jatuh tempo
+KEEPER_WORKERS = int(os.getenv("SESSION_KEEPER_WORKERS", "3"))      # maksimal probe paralel
+# Kalau keeper macet/tertinggal (last_check lebih tua dari sekian x VALIDITY_CHECK_INTERVAL),
+# request kembali validasi sendiri seperti tanpa keeper
+KEEPER_STALE_FACTOR = float(os.getenv("SESSION_KEEPER_STALE_FACTOR", "3"))
+
+# _session_lock CUMA untuk bookkeeping dict (_active_sessions, _user_locks, _probe_status),
+# jangan dipegang saat I/O. I/O jaringan (validasi, restore DB, login SSO) dikunci per user
+# lewat _user_lock(), jadi login user A yang lambat tidak menahan request user B.
 _session_lock = threading.Lock()
 _active_sessions = {} 
+_user_locks = {}  # user_id -> [Lock, jumlah thread yang sedang pakai/tunggu]
+
+# Kalau keeper aktif, get_authenticated_session TIDAK validasi di jalur request,
+# cukup percaya status yang ditandai keeper.
+_keeper_enabled = False
+_keeper_executor = None
+_probe_status = {}  # user_id -> {"last_probe": ts, "outcome": str, "in_flight": bool}, selama session ada
 
 gate_user_model = GateUser()
 gate_session_model = GateSession()
@@ -69,6 +87,20 @@ def load_cookies(session, user_id):
         logging.error(f"Gagal load cookies: {e}")
         return False
 
+def _parse_login_form(html, base_url, form_id=None):
+    """
+    Ambil form dari HTML (form_id dulu, kalau tidak ada form pertama).
+    Return (action_url absolut, payload input ber-name) atau None kalau tidak ada form.
+    """
+    from bs4 import BeautifulSoup  # lazy: hanya dibutuhkan saat login ulang
+    soup = BeautifulSoup(html, "lxml")
+    form = (soup.find("form", id=form_id) if form_id else None) or soup.find("form")
+    if not form:
+        return None
+    action_url = urljoin(base_url, form.get("action") or base_url)
+    payload = {inp.get("name"): inp.get("value", "") for inp in form.find_all("input") if inp.get("name")}
+    return action_url, payload
+
 def login_gateDinamika(session, gate_username, gate_password):
     """
     Logika login yang disamakan dengan old-scrapper_requests.py
@@ -85,8 +117,7 @@ def login_gateDinamika(session, gate_username, gate_password):
             logging.info("[Login Gate] Sesi masih aktif (Redirected to Dashboard).")
             return True
 
-        soup = BeautifulSoup(r.text, "lxml")
-        form = soup.find("form", id="gate-login-form") or soup.find("form")
+        form = _parse_login_form(r.text, r.url, form_id="gate-login-form")
         
         if not form:
             # Fallback check
@@ -94,8 +125,7 @@ def login_gateDinamika(session, gate_username, gate_password):
             logging.error(f"[Login Gate] Form login tidak ditemukan.")
             return False
 
-        action_url = urljoin(r.url, form.get("action") or r.url)
-        payload = {inp.get("name"): inp.get("value", "") for inp in form.find_all("input") if inp.get("name")}
+        action_url, payload = form
         
         # 2. Isi User/Pass
         # Mapping key input yang mungkin beda-beda
@@ -122,26 +152,24 @@ def login_gateDinamika(session, gate_username, gate_password):
         
         for i in range(5):
             # Cek jika sudah masuk Sicyca atau Dashboard Gate
-            if "sicyca.dinamika.ac.id" in cur_url or (GATE_ROOT in cur_url and "login" not in cur_url):
+            if SICYCA_HOST in cur_url or (GATE_ROOT in cur_url and "login" not in cur_url):
                 # Double check content
                 if 'id="login-dropdown"' not in html:
                     logging.info("   --> Login dan proses SSO berhasil.")
                     return True
 
             # Cari form redirect (biasanya hidden form untuk SSO)
-            soup = BeautifulSoup(html, "lxml")
-            form = soup.find("form")
+            form = _parse_login_form(html, cur_url)
             if not form: break # Tidak ada form lagi, berarti finish atau stuck
             
-            action_url = urljoin(cur_url, form.get("action") or cur_url)
-            payload2 = {inp.get("name"): inp.get("value", "") for inp in form.find_all("input") if inp.get("name")}
+            action_url, payload2 = form
             
             # Post lanjutannya
             r2 = session.post(action_url, data=payload2, allow_redirects=True, timeout=30, headers={"Referer": cur_url})
             html, cur_url = r2.text, r2.url
             
         # Cek Final State
-        if "sicyca.dinamika.ac.id" in cur_url or "dashboard" in cur_url:
+        if SICYCA_HOST in cur_url or "dashboard" in cur_url:
             return True
         if cur_url.rstrip('/') == GATE_ROOT.rstrip('/') and 'id="login-dropdown"' not in html:
             return True
@@ -169,7 +197,7 @@ def check_validity(session):
         final_url = response.url.lower()
         
         # 1. Indikator SUKSES: Masuk Sicyca
-        if response.status_code == 200 and "/dashboard" in final_url and "sicyca" in final_url:
+        if response.status_code == 200 and "/dashboard" in final_url and SICYCA_HOST.lower() in final_url:
             return True
 
         # 2. Indikator SUKSES: Masuk Gate Dashboard (Induk Session Valid)
@@ -194,6 +222,87 @@ def check_validity(session):
         # Return True sementara (assume valid)
         return True
 
+def _prune_user_lock(user_id):
+    """Buang lock user yang tidak dipakai siapa pun & tidak punya session. WAJIB pegang _session_lock."""
+    entry = _user_locks.get(user_id)
+    if entry is not None and entry[1] == 0 and user_id not in _active_sessions:
+        del _user_locks[user_id]
+
+@contextmanager
+def _user_lock(user_id):
+    """Lock per user. Entry-nya dihitung pemakainya, jadi bisa dibuang tanpa memecah lock yang masih ditunggu."""
+    with _session_lock:
+        entry = _user_locks.get(user_id)
+        if entry is None:
+            entry = _user_locks[user_id] = [threading.Lock(), 0]
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _session_lock:
+            entry[1] -= 1
+            _prune_user_lock(user_id)
+
+def _publish_session(user_id, session, gate_id, now, nim=None):
+    # Entry baru = cache token API (api_token) otomatis kosong lagi setelah login ulang
+    with _session_lock:
+        _active_sessions[user_id] = {
+            'session': session, 'last_check': now, 'gate_user_id': gate_id, 'state': 'valid',
+            'nim': nim, 'api_token': None
+        }
+
+def _drop_session(user_id):
+    with _session_lock:
+        dropped = _active_sessions.pop(user_id, None)
+        _probe_status.pop(user_id, None)
+        _prune_user_lock(user_id)
+    return dropped
+
+def _update_session(user_id, user_data, **fields):
+    """Update entry session HANYA kalau masih entry yang sama (belum di-drop / diganti login ulang)."""
+    with _session_lock:
+        if _active_sessions.get(user_id) is not user_data:
+            return False
+        user_data.update(fields)
+        return True
+
+def _establish_session(user_id, now):
+    """
+    Restore cookies dari DB atau login ulang ke Gate.
+    WAJIB dipanggil dengan lock user ini sedang dipegang.
+    """
+    # 2. BUAT SESSION & LOAD DB (Recovery saat Restart Flask)
+    s = create_session_obj()
+    gate_id, g_user, g_pass = gate_user_model.get_credentials_by_user_id(user_id)
+    
+    if not g_user:
+        logging.warning(f"User ID {user_id} belum setup Gate.")
+        return None
+
+    # Coba restore dari DB
+    if load_cookies(s, user_id):
+        logging.info(f"Cookies User {user_id} dimuat dari DB. Melakukan validasi...")
+        
+        # Cek ke server apakah cookie DB ini masih sakti?
+        if check_validity(s):
+            logging.info(f"Session User {user_id} RESTORED dari Database & VALID.")
+            _publish_session(user_id, s, gate_id, now, nim=g_user)
+            return s
+        else:
+            logging.info(f"Session User {user_id} dari DATABASE sudah kedaluwarsa.")
+            s.cookies.clear() # Bersihkan sampah cookie lama
+    
+    # 3. LOGIN BARU (Jika DB kosong atau Expired)
+    logging.info(f"Melakukan LOGIN ULANG ke Gate untuk User {user_id}...")
+    
+    if login_gateDinamika(s, g_user, g_pass):
+        save_cookies(s, gate_id) # Simpan token baru yang segar
+        _publish_session(user_id, s, gate_id, now, nim=g_user)
+        return s
+    
+    return None
+
 def get_authenticated_session(user_id):
     """
     Mengambil session valid untuk user_id (Auto-Login/Load DB).
@@ -201,70 +310,168 @@ def get_authenticated_session(user_id):
     global _active_sessions
     if not user_id: return None
 
-    with _session_lock:
+    # Hanya caller untuk user yang SAMA yang saling tunggu di sini
+    with _user_lock(user_id):
         now = time.time()
-        user_data = _active_sessions.get(user_id)
+        with _session_lock:
+            user_data = _active_sessions.get(user_id)
 
         # 1. CEK MEMORI
         if user_data:
             session = user_data['session']
             last_check = user_data['last_check']
             
-            # Cek interval 5 menit
-            if now - last_check > VALIDITY_CHECK_INTERVAL:
+            keeper_fresh = now - last_check <= VALIDITY_CHECK_INTERVAL * KEEPER_STALE_FACTOR
+            if _keeper_enabled and user_data.get('state') == 'dead':
+                logging.info(f"Session Memori User {user_id} ditandai MATI oleh keeper.")
+                _drop_session(user_id)
+            elif _keeper_enabled and keeper_fresh:
+                # Validasi sudah diurus keeper di background -> jangan blok request
+                return session
+            # Cek interval 5 menit (atau keeper tertinggal terlalu jauh)
+            elif now - last_check > VALIDITY_CHECK_INTERVAL:
                 if not check_validity(session):
                     logging.info(f"Session Memori User {user_id} EXPIRED/INVALID.")
-                    del _active_sessions[user_id]
+                    _drop_session(user_id)
                 else:
-                    user_data['last_check'] = now
+                    _update_session(user_id, user_data, last_check=now)
                     return session
             else:
                 return session
 
-        # 2. BUAT SESSION & LOAD DB (Recovery saat Restart Flask)
-        s = create_session_obj()
-        gate_id, g_user, g_pass = gate_user_model.get_credentials_by_user_id(user_id)
-        
-        if not g_user:
-            logging.warning(f"User ID {user_id} belum setup Gate.")
-            return None
+        return _establish_session(user_id, now)
 
-        # Coba restore dari DB
-        if load_cookies(s, user_id):
-            logging.info(f"Cookies User {user_id} dimuat dari DB. Melakukan validasi...")
-            
-            # Cek ke server apakah cookie DB ini masih sakti?
-            if check_validity(s):
-                logging.info(f"Session User {user_id} RESTORED dari Database & VALID.")
-                _active_sessions[user_id] = {
-                    'session': s, 'last_check': now, 'gate_user_id': gate_id
-                }
-                return s
-            else:
-                logging.info(f"Session User {user_id} dari DATABASE sudah kedaluwarsa.")
-                s.cookies.clear() # Bersihkan sampah cookie lama
-        
-        # 3. LOGIN BARU (Jika DB kosong atau Expired)
-        logging.info(f"Melakukan LOGIN ULANG ke Gate untuk User {user_id}...")
-        
-        if login_gateDinamika(s, g_user, g_pass):
-            save_cookies(s, gate_id) # Simpan token baru yang segar
-            _active_sessions[user_id] = {
-                'session': s, 'last_check': now, 'gate_user_id': gate_id
-            }
-            return s
-        
-        return None
+def get_cached_api_params(user_id, session):
+    """
+    (nim, api_token) yang tersimpan bersama session aktif user ini.
+    Hanya berlaku kalau session-nya masih objek yang sama (bukan hasil login ulang).
+    """
+    with _session_lock:
+        user_data = _active_sessions.get(user_id)
+        if not user_data or user_data['session'] is not session:
+            return None, None
+        return user_data.get('nim'), user_data.get('api_token')
+
+def store_api_params(user_id, session, nim, token):
+    with _session_lock:
+        user_data = _active_sessions.get(user_id)
+        if user_data and user_data['session'] is session:
+            user_data['nim'] = nim
+            user_data['api_token'] = token
+
+def invalidate_api_token(user_id, session=None):
+    """Buang token API yang di-cache (mis. ditolak sicyca_api.php). NIM tetap disimpan."""
+    with _session_lock:
+        user_data = _active_sessions.get(user_id)
+        if user_data and (session is None or user_data['session'] is session):
+            user_data['api_token'] = None
+
+def _set_probe_status(user_id, **fields):
+    # Status probe cuma disimpan selama user punya session (dibuang bareng _drop_session)
+    with _session_lock:
+        if user_id in _active_sessions:
+            _probe_status.setdefault(user_id, {}).update(fields)
+
+def _probe_user_session(user_id):
+    """
+    Dijalankan di worker keeper: cek validitas session user_id,
+    kalau mati langsung login ulang supaya request berikutnya dapat session segar.
+    """
+    outcome = "error"
+    try:
+        with _session_lock:
+            user_data = _active_sessions.get(user_id)
+        if not user_data:
+            outcome = "gone"
+            return
+
+        # Probe TANPA lock user, biar request user ini tetap jalan selama probe
+        if check_validity(user_data['session']):
+            # Entry bisa sudah di-drop/diganti selama probe -> jangan hidupkan entry basi
+            _update_session(user_id, user_data, last_check=time.time(), state='valid')
+            outcome = "valid"
+            return
+
+        logging.info(f"[Keeper] Session User {user_id} mati, login ulang proaktif...")
+        _update_session(user_id, user_data, state='dead')
+        with _user_lock(user_id):
+            with _session_lock:
+                current = _active_sessions.get(user_id)
+            # Bisa jadi request lain sudah login ulang duluan
+            if current is not None and current is not user_data and current.get('state') != 'dead':
+                outcome = "relogin_ok"
+                return
+            _drop_session(user_id)
+            outcome = "relogin_ok" if _establish_session(user_id, time.time()) else "relogin_failed"
+    except Exception as e:
+        logging.error(f"[Keeper] Error probe User {user_id}: {e}")
+    finally:
+        _set_probe_status(user_id, last_probe=time.time(), outcome=outcome, in_flight=False)
+        logging.info(f"[Keeper] Probe User {user_id}: {outcome}")
+
+def session_keeper_tick():
+    """
+    Job periodik (APScheduler): cari session yang validasinya hampir jatuh tempo,
+    lalu probe di worker pool terbatas.
+    """
+    if not _keeper_executor:
+        return
+    now = time.time()
+    due_at = VALIDITY_CHECK_INTERVAL - KEEPER_LEAD
+    due = []
+    with _session_lock:
+        for uid, data in _active_sessions.items():
+            if now - data['last_check'] < due_at:
+                continue
+            status = _probe_status.setdefault(uid, {})
+            if status.get('in_flight'):
+                continue
+            status['in_flight'] = True
+            due.append(uid)
+
+    for uid in due:
+        _keeper_executor.submit(_probe_user_session, uid)
+
+def start_session_keeper(scheduler):
+    """Daftarkan keeper ke scheduler (APScheduler) milik app."""
+    global _keeper_enabled, _keeper_executor
+    if _keeper_executor is None:
+        _keeper_executor = ThreadPoolExecutor(max_workers=KEEPER_WORKERS, thread_name_prefix="session-keeper")
+    scheduler.add_job(session_keeper_tick, 'interval', seconds=KEEPER_INTERVAL,
+                      id="session-keeper", replace_existing=True, max_instances=1, coalesce=True)
+    _keeper_enabled = True
+    logging.info(f"[Keeper] Session keeper aktif (tiap {KEEPER_INTERVAL}s, lead {KEEPER_LEAD}s, {KEEPER_WORKERS} worker).")
+
+def get_session_keeper_status(user_id=None):
+    """Waktu probe terakhir & hasilnya, per user (atau satu user kalau user_id diisi)."""
+    with _session_lock:
+        if user_id is not None:
+            return dict(_probe_status.get(user_id, {}))
+        return {uid: dict(st) for uid, st in _probe_status.items()}
+
+def get_session_keeper_summary():
+    """Ringkasan agregat probe semua user (tanpa user_id), aman ditampilkan ke user mana pun."""
+    with _session_lock:
+        outcomes = {}
+        for st in _probe_status.values():
+            if st.get("outcome"):
+                outcomes[st["outcome"]] = outcomes.get(st["outcome"], 0) + 1
+        return {
+            "users": len(_probe_status),
+            "in_flight": sum(1 for st in _probe_status.values() if st.get("in_flight")),
+            "outcomes": outcomes,
+        }
 
 def reset_session_user(user_id):
     """
     Menghapus sesi scraper dari Memori DAN Database.
     """
-    # 1. Hapus dari Memory (RAM)
-    with _session_lock:
-        if user_id in _active_sessions:
-            del _active_sessions[user_id]
-            logging.info(f"[Reset Session] Sesi memori User {user_id} dihapus.")
+    # 1. Hapus dari Memory (RAM), sekalian status probe & lock user-nya
+    if _drop_session(user_id):
+        logging.info(f"[Reset Session] Sesi memori User {user_id} dihapus.")
+
+    # Kredensial dibaca ulang dari DB saat login berikutnya (mungkin baru diganti)
+    gate_user_model.invalidate_credentials(user_id)
 
     # 2. Hapus dari Database (Disk/MySQL)
     try:
@@ -277,5 +484,14 @@ def reset_session_user(user_id):
 
 def get_session_status(user_id):
     if not user_id: return {"active": False, "message": "No User ID"}
-    # Cek ringan tanpa request ke server (opsional)
-    return {"active": True, "message": "Session Managed"}
\ No newline at end of file
+    # Cek ringan tanpa request ke server (pakai hasil probe keeper terakhir)
+    with _session_lock:
+        user_data = _active_sessions.get(user_id)
+        probe = dict(_probe_status.get(user_id, {}))
+    return {
+        "active": bool(user_data) and user_data.get('state') != 'dead',
+        "message": "Session Managed",
+        "last_check": user_data['last_check'] if user_data else None,
+        "last_probe": probe.get('last_probe'),
+        "probe_outcome": probe.get('outcome')
+    }
\ No newline at end of file
@@ -6,10 +6,110 @@ import pytz
 import os
 from flask import current_app as app
 import logging
+import threading
+from cachetools import TTLCache
 from connection import get_connection
 
 JAKARTA_TZ = pytz.timezone(os.getenv("TIMEZONE", "Asia/Jakarta"))
 
+# === CACHE REFRESH TOKEN VALID ===
+# Token yang sudah terbukti valid di DB disimpan sebentar di memori,
+# jadi request berikutnya cukup decode JWT + lookup dict (tanpa query DB).
+# TTL pendek = batas maksimum "telat tahu" kalau token di-revoke dari worker/proses lain.
+REFRESH_CACHE_TTL = int(os.getenv("REFRESH_CACHE_TTL", "60"))
+REFRESH_CACHE_MAXSIZE = int(os.getenv("REFRESH_CACHE_MAXSIZE", "2048"))
+
+_refresh_cache = TTLCache(maxsize=REFRESH_CACHE_MAXSIZE, ttl=REFRESH_CACHE_TTL)  # token -> (user_id, expires_at)
+_refresh_cache_lock = threading.Lock()
+_refresh_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_refresh_cache_gen = 0  # naik tiap invalidasi, biar hasil query DB yang "balapan" dengan revoke tidak ikut di-cache
+
+
+def invalidate_refresh_token(refresh_token):
+    """Hapus 1 refresh token dari cache (dipanggil saat logout/revoke)."""
+    global _refresh_cache_gen
+    with _refresh_cache_lock:
+        _refresh_cache_gen += 1
+        if _refresh_cache.pop(refresh_token, None) is not None:
+            _refresh_cache_stats["invalidations"] += 1
+
+
+def invalidate_user_refresh_tokens(user_id):
+    """Hapus semua refresh token milik user_id dari cache (dipanggil saat logout semua device)."""
+    global _refresh_cache_gen
+    with _refresh_cache_lock:
+        _refresh_cache_gen += 1
+        stale = [tok for tok, (uid, _) in _refresh_cache.items() if str(uid) == str(user_id)]
+        for tok in stale:
+            del _refresh_cache[tok]
+        _refresh_cache_stats["invalidations"] += len(stale)
+
+
+def get_refresh_cache_stats():
+    with _refresh_cache_lock:
+        stats = dict(_refresh_cache_stats)
+        stats["size"] = len(_refresh_cache)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / total, 4) if total else 0.0
+    return stats
+
+
+def _check_refresh_token_db(refresh_token):
+    """Validasi refresh token ke DB. Return (user_id, expires_at) kalau valid, None kalau tidak."""
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        if conn:
+            cursor = conn.cursor(dictionary=True)
+            # Cek apakah token ada, tidak revoked, dan belum expired
+            cursor.execute(
+                "SELECT user_id, expires_at, revoked FROM user_sessions WHERE refresh_token = %s", 
+                (refresh_token,)
+            )
+            session_data = cursor.fetchone()
+            
+            if session_data:
+                # Cek Status Revoked
+                if session_data['revoked'] == 1:
+                    logging.warning(f"[GUARD] Refresh token revoked. Logout.")
+                # Cek Expired (expires_at di DB vs Sekarang)
+                elif session_data['expires_at'] < datetime.now():
+                    logging.info(f"[GUARD] Refresh token expired database time. Logout.")
+                    # Opsional: Set revoked=1 di sini biar database bersih
+                else:
+                    # Token Valid!
+                    return session_data['user_id'], session_data['expires_at']
+            else:
+                 logging.warning(f"[GUARD] Refresh token tidak ditemukan di DB.")
+
+    except Exception as e:
+        logging.error(f"[GUARD] DB Check Error: {e}")
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+    return None
+
+
+def _is_refresh_token_valid(refresh_token):
+    now = datetime.now()
+    with _refresh_cache_lock:
+        cached = _refresh_cache.get(refresh_token)
+        if cached and cached[1] >= now:
+            _refresh_cache_stats["hits"] += 1
+            return True
+        _refresh_cache_stats["misses"] += 1
+        gen = _refresh_cache_gen
+
+    result = _check_refresh_token_db(refresh_token)
+    if not result:
+        return False
+
+    with _refresh_cache_lock:
+        if gen == _refresh_cache_gen:
+            _refresh_cache[refresh_token] = result
+    return True
+
 def login_required(view_func):
     @wraps(view_func)
     def wrapped_view(*args, **kwargs):
@@ -27,42 +127,9 @@ def login_required(view_func):
 
         secret = current_app.config.get('SECRET_KEY') or app.secret_key
 
-        # 2. === VALIDASI REFRESH TOKEN (UUID) KE DATABASE ===
+        # 2. === VALIDASI REFRESH TOKEN (UUID) KE DATABASE (via cache) ===
         # Kita TIDAK pakai jwt.decode() karena refresh_token kamu adalah UUID string.
-        conn = None
-        cursor = None
-        refresh_valid = False
-        
-        try:
-            conn = get_connection()
-            if conn:
-                cursor = conn.cursor(dictionary=True)
-                # Cek apakah token ada, tidak revoked, dan belum expired
-                cursor.execute(
-                    "SELECT user_id, expires_at, revoked FROM user_sessions WHERE refresh_token = %s", 
-                    (refresh_token,)
-                )
-                session_data = cursor.fetchone()
-                
-                if session_data:
-                    # Cek Status Revoked
-                    if session_data['revoked'] == 1:
-                        logging.warning(f"[GUARD] Refresh token revoked. Logout.")
-                    # Cek Expired (expires_at di DB vs Sekarang)
-                    elif session_data['expires_at'] < datetime.now():
-                        logging.info(f"[GUARD] Refresh token expired database time. Logout.")
-                        # Opsional: Set revoked=1 di sini biar database bersih
-                    else:
-                        # Token Valid!
-                        refresh_valid = True
-                else:
-                     logging.warning(f"[GUARD] Refresh token tidak ditemukan di DB.")
-
-        except Exception as e:
-            logging.error(f"[GUARD] DB Check Error: {e}")
-        finally:
-            if cursor: cursor.close()
-            if conn: conn.close()
+        refresh_valid = _is_refresh_token_valid(refresh_token)
 
         # Jika Refresh Token Invalid secara Database -> TENDANG
         if not refresh_valid:
@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify, session, url_for
 from flask import current_app
 from connection import get_connection
+from middleware.auth_quard import invalidate_refresh_token, invalidate_user_refresh_tokens
 import logging
 import pytz
 from dotenv import load_dotenv
@@ -13,7 +14,7 @@ from dotenv import load_dotenv
 # from webauthn import verify_registration_response, verify_authentication_response, generate_authentication_options, generate_registration_options, serialize_options
 import base64
 import json
-from webauthn import verify_registration_response, verify_authentication_response, generate_authentication_options, generate_registration_options
+# webauthn di-import di dalam route Face ID saja (jarang dipakai, import-nya berat)
 
 
 from datetime import datetime, timedelta
@@ -90,6 +91,8 @@ def _revoke_refresh_token(refresh_token: str) -> bool:
         logging.error(f"Error saat revoke token (internal): {e}")
         return False
     finally:
+        # Buang dari cache guard SETELAH update DB, biar request berikutnya pasti cek ulang ke DB
+        invalidate_refresh_token(refresh_token)
         if cursor:
             cursor.close()
         if conn:
@@ -126,6 +129,7 @@ def _revoke_all_user_sessions(user_id: str) -> bool:
         logging.error(f"Error saat revoke all (internal): {e}")
         return False
     finally:
+        invalidate_user_refresh_tokens(user_id)
         if cursor:
             cursor.close()
         if conn:
@@ -258,6 +262,7 @@ def verify_face_id_registration():
         return jsonify({'error': 'No challenge'}), 400
     
     try:
+        from webauthn import verify_registration_response
         credential = verify_registration_response(
             credential=data,
             expected_challenge=challenge,
@@ -333,6 +338,7 @@ def verify_face_id_login():
         return jsonify({'error': 'Face ID credential not found'}), 404
     
     try:
+        from webauthn import verify_authentication_response
         assertion = verify_authentication_response(
             credential=data,
             expected_challenge=challenge,
@@ -0,0 +1,227 @@
+# models/directory_index.py
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import logging
+
+
+class DirectoryIndex:
+    """
+    Indeks lokal mahasiswa/staff (SQLite) yang diisi dari setiap hasil pencarian Sicyca
+    (dan crawl malam opsional). Dipakai untuk:
+    - menjawab ulang query yang sudah pernah dijawab Sicyca dalam hitungan milidetik,
+    - search-as-you-type (FTS5, hanya /suggest) tanpa request ke Sicyca sama sekali.
+    Tabel 'queries' + 'query_hits' mencatat query apa saja yang pernah dijawab Sicyca, kapan,
+    dan baris mana saja hasilnya. Query baru dijawab dari hasil query lama yang merupakan
+    substring-nya (Sicyca mencocokkan substring, tanpa beda huruf besar/kecil), difilter ulang
+    dengan aturan yang sama -- bukan dari FTS, yang cara cocoknya beda.
+    result_cap: batas aman jumlah hasil. Query lama hanya boleh menjawab query lain kalau hasilnya
+    KURANG dari result_cap (hasil sebanyak itu atau lebih bisa jadi sudah dipotong Sicyca).
+    0 = tidak pernah menjawab dari query lain, hanya query yang persis sama.
+    Koneksi SQLite per thread (WAL), aman dipakai dari worker gthread.
+    """
+    def __init__(self, path, result_cap=20):
+        self.path = path
+        self.result_cap = result_cap
+        self._local = threading.local()
+        self._stats = {"lookups": 0, "covered": 0, "records": 0, "suggests": 0}
+        self._stats_lock = threading.Lock()
+        dirname = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dirname, exist_ok=True)
+        self._init_schema()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        had_hits = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'query_hits'").fetchone()
+        with conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS people (
+                    role TEXT NOT NULL,
+                    pid TEXT NOT NULL,
+                    nama TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (role, pid)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS people_fts USING fts5(
+                    nama, pid, content='people', content_rowid='rowid',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+                );
+                CREATE TRIGGER IF NOT EXISTS people_ai AFTER INSERT ON people BEGIN
+                    INSERT INTO people_fts(rowid, nama, pid) VALUES (new.rowid, new.nama, new.pid);
+                END;
+                CREATE TRIGGER IF NOT EXISTS people_ad AFTER DELETE ON people BEGIN
+                    INSERT INTO people_fts(people_fts, rowid, nama, pid) VALUES ('delete', old.rowid, old.nama, old.pid);
+                END;
+                CREATE TRIGGER IF NOT EXISTS people_au AFTER UPDATE ON people BEGIN
+                    INSERT INTO people_fts(people_fts, rowid, nama, pid) VALUES ('delete', old.rowid, old.nama, old.pid);
+                    INSERT INTO people_fts(rowid, nama, pid) VALUES (new.rowid, new.nama, new.pid);
+                END;
+                CREATE TABLE IF NOT EXISTS queries (
+                    role TEXT NOT NULL,
+                    q TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    n INTEGER NOT NULL,
+                    PRIMARY KEY (role, q)
+                );
+                CREATE TABLE IF NOT EXISTS query_hits (
+                    role TEXT NOT NULL,
+                    q TEXT NOT NULL,
+                    pos INTEGER NOT NULL,
+                    pid TEXT NOT NULL,
+                    PRIMARY KEY (role, q, pos)
+                );
+            """)
+            if not had_hits:
+                # Indeks lama belum menyimpan hasil per query -> cakupannya tidak bisa dipercaya
+                conn.execute("DELETE FROM queries")
+
+    @staticmethod
+    def normalize(query):
+        return " ".join(str(query).split()).lower()
+
+    @staticmethod
+    def _fts_query(query):
+        """'budi san' -> '"budi"* AND "san"*' (prefix per kata, aman dari sintaks FTS)."""
+        tokens = re.findall(r"\w+", query.lower())
+        return " AND ".join(f'"{t}"*' for t in tokens)
+
+    def _bump(self, key, n=1):
+        with self._stats_lock:
+            self._stats[key] += n
+
+    # --- tulis ---
+    def record(self, role, query, rows, id_key, name_key="Nama"):
+        """
+        Simpan hasil pencarian Sicyca (list dict) + catat query-nya sudah dijawab upstream.
+        id_key: kolom NIM (mahasiswa) / NIK (staff).
+        """
+        now = time.time()
+        q = self.normalize(query)
+        items, pids = [], []
+        for row in rows:
+            pid = str(row.get(id_key) or "").strip()
+            nama = str(row.get(name_key) or "").strip()
+            if pid and nama:
+                items.append((role, pid, nama, json.dumps(row, ensure_ascii=False, default=str), now))
+                pids.append(pid)
+        conn = self._conn()
+        try:
+            with conn:
+                conn.executemany("""
+                    INSERT INTO people (role, pid, nama, data, updated_at) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(role, pid) DO UPDATE SET
+                        nama = excluded.nama, data = excluded.data, updated_at = excluded.updated_at
+                """, items)
+                conn.execute("""
+                    INSERT INTO queries (role, q, fetched_at, n) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(role, q) DO UPDATE SET fetched_at = excluded.fetched_at, n = excluded.n
+                """, (role, q, now, len(items)))
+                conn.execute("DELETE FROM query_hits WHERE role = ? AND q = ?", (role, q))
+                conn.executemany("INSERT INTO query_hits (role, q, pos, pid) VALUES (?, ?, ?, ?)",
+                                 [(role, q, pos, pid) for pos, pid in enumerate(pids)])
+            self._bump("records")
+        except sqlite3.Error as e:
+            logging.error(f"[DirectoryIndex] Gagal simpan hasil {role} '{query}': {e}")
+
+    # --- baca ---
+    def coverage(self, role, query):
+        """
+        Query tercatat paling segar yang hasilnya pasti mencakup hasil query ini: query itu sendiri,
+        atau query yang merupakan substring-nya ('udi' mencakup 'budi s'), dan hasilnya tidak terpotong.
+        Return (q_tercatat, fetched_at) atau (None, None) kalau belum ada.
+        """
+        q = self.normalize(query)
+        cap = max(0, self.result_cap)
+        row = self._conn().execute("""
+            SELECT q, fetched_at FROM queries
+            WHERE role = ? AND length(q) > 0 AND instr(?, q) > 0 AND (q = ? OR n < ?)
+            ORDER BY (q = ?) DESC, fetched_at DESC LIMIT 1
+        """, (role, q, q, cap, q)).fetchone()
+        return (row["q"], row["fetched_at"]) if row else (None, None)
+
+    def _hits(self, role, q):
+        rows = self._conn().execute("""
+            SELECT p.pid, p.nama, p.data, p.updated_at FROM query_hits h
+            JOIN people p ON p.role = h.role AND p.pid = h.pid
+            WHERE h.role = ? AND h.q = ? ORDER BY h.pos
+        """, (role, q)).fetchall()
+        return rows
+
+    def lookup(self, role, query):
+        """
+        (rows, fetched_at) kalau indeks mencakup query ini, atau (None, None) kalau belum.
+        rows = hasil query pencakup yang nama/NIM/NIK-nya mengandung query (substring, huruf bebas).
+        """
+        self._bump("lookups")
+        q = self.normalize(query)
+        try:
+            covering, fetched_at = self.coverage(role, q)
+            if covering is None:
+                return None, None
+            hits = self._hits(role, covering)
+        except sqlite3.Error as e:
+            logging.error(f"[DirectoryIndex] Gagal lookup {role} '{query}': {e}")
+            return None, None
+        self._bump("covered")
+        if covering != q:
+            hits = [h for h in hits if q in self.normalize(h["nama"]) or q in h["pid"].lower()]
+        return [dict(json.loads(h["data"]), _updated_at=h["updated_at"]) for h in hits], fetched_at
+
+    def suggest(self, query, limit=10):
+        """Search-as-you-type: hanya dari indeks lokal (tidak pernah ke Sicyca)."""
+        self._bump("suggests")
+        q = self.normalize(query)
+        if not q:
+            return []
+        conn = self._conn()
+        try:
+            if q.isdigit():
+                rows = conn.execute("""
+                    SELECT role, pid, nama FROM people WHERE pid >= ? AND pid < ? ORDER BY pid LIMIT ?
+                """, (q, q + "\uffff", limit)).fetchall()
+            else:
+                match = self._fts_query(q)
+                if not match:
+                    return []
+                rows = conn.execute("""
+                    SELECT p.role, p.pid, p.nama FROM people_fts f JOIN people p ON p.rowid = f.rowid
+                    WHERE people_fts MATCH ? ORDER BY f.rank LIMIT ?
+                """, (match, limit)).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"[DirectoryIndex] Gagal suggest '{query}': {e}")
+            return []
+        return [{"role": r["role"], "id": r["pid"], "nama": r["nama"]} for r in rows]
+
+    def stale_queries(self, older_than, limit=50):
+        """Query yang sudah lama tidak di-refresh dari Sicyca (bahan crawl malam)."""
+        rows = self._conn().execute("""
+            SELECT role, q FROM queries WHERE fetched_at < ? ORDER BY fetched_at LIMIT ?
+        """, (time.time() - older_than, limit)).fetchall()
+        return [(r["role"], r["q"]) for r in rows]
+
+    def stats(self):
+        conn = self._conn()
+        with self._stats_lock:
+            st = dict(self._stats)
+        try:
+            st["people"] = conn.execute("SELECT COUNT(*) FROM people").fetchone()[0]
+            st["queries"] = conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+        except sqlite3.Error:
+            pass
+        return st
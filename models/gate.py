@@ -2,24 +2,79 @@
 
 import os
 import logging
+import threading
 import requests
-from cryptography.fernet import Fernet
+from cachetools import TTLCache
 from connection import get_connection
+from upstream import GATE_COOKIE_DOMAIN, SSO_COOKIE_DOMAIN
+
+# === CACHE KREDENSIAL (hasil dekripsi) ===
+# Plaintext password hanya disimpan di memori proses ini (tidak pernah ditulis ke disk/log).
+# Dibagi oleh semua instance GateUser, key = str(user_id). Perubahan di DB dari luar proses
+# (mis. seed_gate_user.py) paling lambat kelihatan setelah TTL habis; reset_session_user
+# meng-invalidate entri user-nya supaya login ulang langsung baca DB.
+CRED_CACHE_TTL = int(os.getenv("GATE_CRED_CACHE_TTL", "600"))
+CRED_CACHE_MAXSIZE = int(os.getenv("GATE_CRED_CACHE_MAXSIZE", "256"))
+
+_cred_cache = TTLCache(maxsize=CRED_CACHE_MAXSIZE, ttl=CRED_CACHE_TTL)  # str(user_id) -> (gate_id, username, password)
+_cred_cache_lock = threading.Lock()
+_cred_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_cred_cache_gen = 0  # naik tiap invalidasi, biar hasil query yang "balapan" dengan update tidak ikut di-cache
+
+
+def get_credential_cache_stats():
+    with _cred_cache_lock:
+        return dict(_cred_cache_stats, size=len(_cred_cache), ttl=CRED_CACHE_TTL)
 
 # === MODEL USER (Kredensial) ===
 class GateUser:
     def __init__(self):
         self.key = os.getenv("GATE_ENCRYPTION_KEY")
+        self._cipher = None
         if not self.key:
             logging.error("FATAL: GATE_ENCRYPTION_KEY belum diset di .env")
-            self.cipher = None
-        else:
-            self.cipher = Fernet(self.key)
+
+    @property
+    def cipher(self):
+        # cryptography baru di-import saat pertama kali butuh dekripsi, bukan saat worker boot
+        if self._cipher is None and self.key:
+            from cryptography.fernet import Fernet
+            self._cipher = Fernet(self.key)
+        return self._cipher
 
     def _get_connection(self):
         return get_connection()
 
+    def invalidate_credentials(self, user_id=None):
+        """Buang kredensial dari cache (user_id=None -> semua user)."""
+        global _cred_cache_gen
+        with _cred_cache_lock:
+            _cred_cache_gen += 1
+            if user_id is None:
+                _cred_cache_stats["invalidations"] += len(_cred_cache)
+                _cred_cache.clear()
+            elif _cred_cache.pop(str(user_id), None) is not None:
+                _cred_cache_stats["invalidations"] += 1
+
     def get_credentials_by_user_id(self, user_id):
+        key = str(user_id)  # int dari session & str dari env/default harus jadi entri yang sama
+        with _cred_cache_lock:
+            cached = _cred_cache.get(key)
+            if cached is not None:
+                _cred_cache_stats["hits"] += 1
+                return cached
+            _cred_cache_stats["misses"] += 1
+            gen = _cred_cache_gen
+
+        creds = self._load_credentials(user_id)
+        # Yang tidak ketemu/gagal tidak di-cache, biar user yang baru di-seed langsung kebaca
+        if creds[0] is not None:
+            with _cred_cache_lock:
+                if gen == _cred_cache_gen:
+                    _cred_cache[key] = creds
+        return creds
+
+    def _load_credentials(self, user_id):
         if not self.cipher: return None, None, None
         conn = self._get_connection()
         if not conn: return None, None, None
@@ -47,6 +102,22 @@ class GateUser:
             cursor.close()
             conn.close()
 
+    def get_active_user_ids(self):
+        """Semua user_id yang punya kredensial Gate aktif (dipakai job scraping terjadwal)."""
+        conn = self._get_connection()
+        if not conn: return []
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT DISTINCT user_id FROM gate_users WHERE is_active = 1 ORDER BY user_id")
+            return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            logging.error(f"[GateUser] Gagal ambil daftar user aktif: {e}")
+            return []
+        finally:
+            cursor.close()
+            conn.close()
+
 # === MODEL SESSION (Cookies Terpisah) ===
 class GateSession:
     def _get_connection(self):
@@ -77,15 +148,15 @@ class GateSession:
             if res:
                 # 1. XSRF-TOKEN (Gate)
                 if res['xsrf_token']:
-                    jar.set('XSRF-TOKEN', res['xsrf_token'], domain='gate.dinamika.ac.id', path='/')
+                    jar.set('XSRF-TOKEN', res['xsrf_token'], domain=GATE_COOKIE_DOMAIN, path='/')
 
                 # 2. gate_dinamika_session (Gate)
                 if res['gate_session']:
-                    jar.set('gate_dinamika_session', res['gate_session'], domain='gate.dinamika.ac.id', path='/')
+                    jar.set('gate_dinamika_session', res['gate_session'], domain=GATE_COOKIE_DOMAIN, path='/')
 
                 # 3. SSO_TOKEN (Global)
                 if res['sso_token']:
-                    jar.set('SSO_TOKEN', res['sso_token'], domain='.dinamika.ac.id', path='/')
+                    jar.set('SSO_TOKEN', res['sso_token'], domain=SSO_COOKIE_DOMAIN, path='/')
 
                 return jar
             return None
@@ -0,0 +1,108 @@
+# models/jadwal_ics.py
+
+import re
+import logging
+from datetime import datetime
+
+month_translation = { 'Januari': 'January', 'Februari': 'February', 'Maret': 'March', 'April': 'April', 'Mei': 'May', 'Juni': 'June', 'Juli': 'July', 'Agustus': 'August', 'September': 'September', 'Oktober': 'October', 'November': 'November', 'Desember': 'December' }
+
+# Nama bulan (Indonesia & Inggris, lowercase) -> nomor bulan, untuk jalur parse cepat
+_MONTH_NUMBER = {}
+for _i, (_idn, _eng) in enumerate(month_translation.items(), start=1):
+    _MONTH_NUMBER[_idn.lower()] = _i
+    _MONTH_NUMBER[_eng.lower()] = _i
+
+# "Senin, 13 Oktober 2025" / "13 Oktober 25"
+_DATE_RE = re.compile(r"^(?:\w+, )?(\d{1,2})\s+([A-Za-z]+)\s+(\d{4}|\d{2})$")
+# "07:30"
+_TIME_RE = re.compile(r"^(\d{1,2}):(\d{2})$")
+
+
+def _parse_event_times_slow(date_str, time_range_str):
+    """Cara lama (translate nama bulan + strptime). Dipakai sebagai fallback format aneh."""
+    start_time_val, end_time_val = time_range_str.split('-')
+    start_date_time_str = re.sub(r"^\w+, ", "", date_str) + ' ' + start_time_val
+    end_date_time_str = re.sub(r"^\w+, ", "", date_str) + ' ' + end_time_val
+
+    for idn, eng in month_translation.items():
+        start_date_time_str = start_date_time_str.replace(idn, eng)
+        end_date_time_str = end_date_time_str.replace(idn, eng)
+    # Jika tahun hanya 2 digit, tambahkan '20' di depannya
+    def normalize_year(date_str):
+        parts = date_str.split()
+        if len(parts) >= 3 and len(parts[1]) > 0 and len(parts[2]) == 2:  # contoh: ['22', 'October', '25']
+            parts[2] = "20" + parts[2]
+            return " ".join(parts)
+        return date_str
+
+    start_date_time_str = normalize_year(start_date_time_str)
+    end_date_time_str = normalize_year(end_date_time_str)
+
+    start_time = datetime.strptime(start_date_time_str, "%d %B %Y %H:%M")
+    end_time = datetime.strptime(end_date_time_str, "%d %B %Y %H:%M")
+    return start_time, end_time
+
+
+def parse_event_times(date_str, time_range_str):
+    """
+    Parse 'Hari, Tanggal' + 'Jam' jadi (start, end) datetime.
+    Jalur cepat: regex terkompilasi + lookup bulan, tanpa replace berulang & strptime.
+    Format yang tidak dikenali jatuh ke cara lama, jadi hasilnya tetap sama.
+    """
+    date_match = _DATE_RE.match(date_str)
+    times = time_range_str.split('-')
+    if date_match and len(times) == 2:
+        month = _MONTH_NUMBER.get(date_match.group(2).lower())
+        start_match = _TIME_RE.match(times[0])
+        end_match = _TIME_RE.match(times[1])
+        if month and start_match and end_match:
+            day = int(date_match.group(1))
+            year = date_match.group(3)
+            year = int("20" + year) if len(year) == 2 else int(year)
+            return (
+                datetime(year, month, day, int(start_match.group(1)), int(start_match.group(2))),
+                datetime(year, month, day, int(end_match.group(1)), int(end_match.group(2)))
+            )
+    return _parse_event_times_slow(date_str, time_range_str)
+
+
+def _ics_datetime(dt):
+    # Setara dt.strftime('%Y%m%dT%H%M%S'), tapi tanpa parsing format string tiap event
+    return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}T{dt.hour:02d}{dt.minute:02d}{dt.second:02d}"
+
+
+def _ics_datetime_slow(dt):
+    return dt.strftime('%Y%m%dT%H%M%S')
+
+
+def build_ics(events, fast=True):
+    """Bangun isi file ICS (bytes UTF-8) dari list event jadwal."""
+    parse = parse_event_times if fast else _parse_event_times_slow
+    fmt = _ics_datetime if fast else _ics_datetime_slow
+    parts = ["BEGIN:VCALENDAR\nVERSION:2.0\nCALSCALE:GREGORIAN\n"]
+
+    for event in events:
+        try:
+            date_str = event.get("Hari, Tanggal", "")
+            time_range_str = event.get("Jam", "")
+            if not date_str or not time_range_str:
+                continue
+
+            start_time, end_time = parse(date_str, time_range_str)
+
+            parts.append(
+                "BEGIN:VEVENT\n"
+                f"SUMMARY:{event.get('Nama Matakuliah', 'Tanpa Nama')}\n"
+                f"DTSTART:{fmt(start_time)}\n"
+                f"DTEND:{fmt(end_time)}\n"
+                f"LOCATION:{event.get('Ruangan', 'Tidak Diketahui')}\n"
+                f"DESCRIPTION:Keterangan: {event.get('Keterangan', '-')}\n"
+                f"STATUS:{event.get('Status Kuliah', '-')}\n"
+                "END:VEVENT\n"
+            )
+        except Exception as e:
+            logging.warning(f"Gagal konversi event: {e}")
+            continue
+
+    parts.append("END:VCALENDAR\n")
+    return "".join(parts).encode('utf-8')
@@ -0,0 +1,224 @@
+# models/jadwal_store.py
+
+import os
+import json
+import glob
+import hashlib
+import tempfile
+import threading
+import logging
+from datetime import datetime
+
+
+class JadwalStore:
+    """
+    Penyimpanan snapshot jadwal per user.
+    - Tulis atomik (file temp + rename), pembaca tidak pernah lihat file setengah jadi.
+    - Tiap scrape di-hash; kalau isinya sama dengan snapshot terakhir, file TIDAK ditulis ulang.
+    - Simpan N versi terakhir di folder history (buat diff).
+    - Versi data naik terus (monoton) tiap kali isi berubah -> bisa dipakai untuk ETag/caching.
+    - Hasil parse disimpan di memori (per proses), di-invalidate oleh mtime/size file
+      atau langsung oleh publish(). Bytes JSON-nya juga disimpan, jadi API tinggal kirim.
+    """
+    def __init__(self, default_path, base_dir, default_user=1, keep_versions=5):
+        self.default_path = default_path
+        self.base_dir = base_dir
+        self.default_user = default_user
+        self.keep_versions = max(0, keep_versions)
+        self._lock = threading.Lock()
+        self._heads = {}  # path -> {"hash", "version"} (biar publish tidak perlu parse file lama)
+        self._parsed = {}  # path -> {"stat", "data", "json_bytes", "version"}
+        self._parsed_lock = threading.Lock()
+        self._cache_stats = {"hits": 0, "misses": 0}
+
+    # --- lokasi file ---
+    def path_for(self, user_id):
+        """Lokasi file jadwal milik user. User default tetap di default_path (dipakai /kalendar & boot)."""
+        if user_id is None or str(user_id) == str(self.default_user):
+            return self.default_path
+        return os.path.join(self.base_dir, f"jadwal_{user_id}.json")
+
+    def resolve_path(self, user_id):
+        """
+        File jadwal milik user. TIDAK fallback ke jadwal user lain: kalau belum ada,
+        pembaca dapat FileNotFoundError (jadwal belum tersedia).
+        """
+        if user_id is None:
+            raise FileNotFoundError("Jadwal tanpa user_id tidak tersedia.")
+        return self.path_for(user_id)
+
+    def _history_dir(self, user_id):
+        key = str(user_id if user_id is not None else self.default_user)
+        return os.path.join(self.base_dir, "history", key)
+
+    # --- baca ---
+    @staticmethod
+    def _stat_key(path):
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _remember(self, path, stat_key, payload, data):
+        meta = data.get("metadata", {}) if isinstance(data, dict) else {}
+        entry = {
+            "stat": stat_key,
+            "data": data,
+            "json_bytes": payload,
+            "version": int(meta.get("version", 0) or 0),
+            "derived": {}   # artefak turunan (mis. ICS), ikut hilang saat snapshot berganti
+        }
+        with self._parsed_lock:
+            self._parsed[path] = entry
+        return entry
+
+    def load(self, user_id):
+        """
+        Snapshot ter-parse dari cache memori. Return dict {data, json_bytes, version, stat}.
+        JANGAN ubah isi 'data' (dipakai bareng semua request).
+        Raise FileNotFoundError / JSONDecodeError kalau belum ada/rusak.
+        """
+        path = self.resolve_path(user_id)
+        stat_key = self._stat_key(path)
+        with self._parsed_lock:
+            entry = self._parsed.get(path)
+            if entry is not None and entry["stat"] == stat_key:
+                self._cache_stats["hits"] += 1
+                return entry
+            self._cache_stats["misses"] += 1
+
+        with open(path, 'rb') as f:
+            payload = f.read()
+        data = json.loads(payload)
+        return self._remember(path, stat_key, payload, data)
+
+    def read(self, user_id):
+        """Baca snapshot milik user (raise FileNotFoundError / JSONDecodeError kalau belum ada/rusak)."""
+        return self.load(user_id)["data"]
+
+    def read_bytes(self, user_id):
+        """Bytes JSON snapshot, siap dikirim sebagai response."""
+        return self.load(user_id)["json_bytes"]
+
+    def derived(self, user_id, name, builder):
+        """
+        Artefak turunan dari snapshot (mis. file ICS), dibangun SEKALI per versi data.
+        builder(data) dipanggil hanya kalau artefak belum ada untuk snapshot ini.
+        Return (artefak, entry snapshot).
+        """
+        entry = self.load(user_id)
+        artifacts = entry["derived"]
+        with self._parsed_lock:
+            artifact = artifacts.get(name)
+        if artifact is None:
+            # Builder dijalankan di luar lock; kalau dua request balapan, hasil pertama yang dipakai
+            built = builder(entry["data"])
+            with self._parsed_lock:
+                artifact = artifacts.setdefault(name, built)
+        return artifact, entry
+
+    def cache_stats(self):
+        with self._parsed_lock:
+            return dict(self._cache_stats, entries=len(self._parsed))
+
+    def current_version(self, user_id):
+        return self.load(user_id)["version"]
+
+    def etag(self, user_id):
+        """ETag snapshot yang akan dibaca user ini (file + versi data)."""
+        name = os.path.splitext(os.path.basename(self.resolve_path(user_id)))[0]
+        return f"{name}-v{self.current_version(user_id)}"
+
+    def history(self, user_id):
+        """Daftar versi yang masih disimpan (lama -> baru)."""
+        versions = []
+        for p in glob.glob(os.path.join(self._history_dir(user_id), "v*.json")):
+            try:
+                versions.append(int(os.path.basename(p)[1:-5]))
+            except ValueError:
+                continue
+        return sorted(versions)
+
+    def read_version(self, user_id, version):
+        with open(os.path.join(self._history_dir(user_id), f"v{version}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _head(self, path):
+        head = self._heads.get(path)
+        if head is None and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f).get("metadata", {})
+                head = {"hash": meta.get("content_hash"), "version": int(meta.get("version", 0))}
+            except Exception as e:
+                logging.warning(f"[JadwalStore] Gagal baca metadata {path}: {e}")
+                head = {"hash": None, "version": 0}
+            self._heads[path] = head
+        return head
+
+    # --- tulis ---
+    @staticmethod
+    def content_hash(records):
+        canonical = json.dumps(records, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _atomic_write(path, payload):
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def publish(self, user_id, records, last_scraped=None):
+        """
+        Simpan hasil scrape. Return (version, changed).
+        changed=False berarti isinya identik dengan snapshot terakhir & file tidak disentuh.
+        """
+        path = self.path_for(user_id)
+        digest = self.content_hash(records)
+        last_scraped = last_scraped or datetime.now().strftime("%A, %d %B %Y %H:%M:%S")
+
+        with self._lock:
+            head = self._head(path) or {"hash": None, "version": 0}
+            if head["hash"] == digest:
+                logging.info(f"[JadwalStore] Jadwal user {user_id} tidak berubah (v{head['version']}), skip tulis.")
+                return head["version"], False
+
+            history = self.history(user_id)
+            version = max([head["version"]] + history) + 1
+            json_output = {
+                "metadata": {
+                    "last_scraped": last_scraped,
+                    "total_jadwal": len(records),
+                    "version": version,
+                    "content_hash": digest
+                },
+                "data": records
+            }
+            payload = json.dumps(json_output, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            self._atomic_write(path, payload)
+
+            if self.keep_versions:
+                hist_dir = self._history_dir(user_id)
+                self._atomic_write(os.path.join(hist_dir, f"v{version}.json"), payload)
+                for old in (history + [version])[:-self.keep_versions]:
+                    try:
+                        os.unlink(os.path.join(hist_dir, f"v{old}.json"))
+                    except OSError:
+                        pass
+
+            self._heads[path] = {"hash": digest, "version": version}
+            # Langsung isi cache memori, pembaca berikutnya tidak perlu parse ulang file
+            self._remember(path, self._stat_key(path), payload, json_output)
+
+        logging.info(f"[JadwalStore] Jadwal user {user_id} disimpan sebagai v{version} ({len(records)} entri).")
+        return version, True
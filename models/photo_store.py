@@ -0,0 +1,362 @@
+# models/photo_store.py
+
+import io
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import logging
+from collections import OrderedDict
+from cachetools import TLRUCache
+
+
+# Varian foto: ukuran (sisi terpanjang, px; None = ukuran asli) & format keluaran
+THUMB_SIZES = {"sm": 120, "md": 360, "orig": None}
+THUMB_FORMATS = {"jpeg": "image/jpeg", "webp": "image/webp"}
+THUMB_QUALITY = int(os.getenv("PHOTO_THUMB_QUALITY", "80"))
+
+
+def make_variant(content, size, fmt, quality=THUMB_QUALITY):
+    """
+    Resize (kalau perlu) + encode ulang ke JPEG/WebP. Pillow wajib (requirements.txt), tapi baru
+    di-import saat dipakai supaya worker yang tidak melayani foto tidak ikut bayar import-nya.
+    Kalau gambar tidak bisa dibaca -> return None (pemanggil pakai foto asli).
+    """
+    from PIL import Image, ImageOps
+    try:
+        with Image.open(io.BytesIO(content)) as im:
+            im = ImageOps.exif_transpose(im)
+            px = THUMB_SIZES[size]
+            if px:
+                im.thumbnail((px, px), Image.LANCZOS)
+            if im.mode not in ("RGB", "L"):
+                im = im.convert("RGB")
+            out = io.BytesIO()
+            if fmt == "webp":
+                im.save(out, format="WEBP", quality=quality, method=4)
+            else:
+                im.save(out, format="JPEG", quality=quality, optimize=True, progressive=True)
+            return out.getvalue()
+    except Exception as e:
+        logging.warning(f"[PhotoStore] Gagal membuat varian {size}/{fmt}: {e}")
+        return None
+
+
+class PhotoStore:
+    """
+    Cache foto mahasiswa/staff 2 tingkat.
+    - Memori: LRU dengan batas total BYTE (bukan jumlah item), isinya bytes JPEG mentah.
+    - Disk: content-addressed (blobs/ab/<sha256>.jpg), foto yang sama persis cukup disimpan sekali.
+      Referensi (role, id) -> sha disimpan di refs/<role>/<id>.json, berlaku selama disk_ttl.
+    - Negative cache: foto yang memang tidak ada di Sicyca diingat selama negative_ttl,
+      jadi tidak ditanya ulang ke upstream tiap kali tombol diklik. Di memori dibatasi negative_maxsize entri.
+    - Varian (thumbnail sm/md, JPEG/WebP) disimpan di variants/ab/<sha>-<size>.<fmt>, di samping blob
+      aslinya. Kalau varian sudah ada, foto asli tidak perlu dibaca/disimpan di memori sama sekali.
+    - cleanup() (dijadwalkan di app.py) menghapus ref kedaluwarsa, lalu blob & varian yang tidak
+      dirujuk ref mana pun lagi, jadi folder cache tidak tumbuh terus.
+    Semua tulis file atomik (file temp + rename), sama seperti JadwalStore.
+    """
+    # File lebih muda dari ini tidak dihapus cleanup() walau belum ada ref-nya (put() yang sedang jalan)
+    CLEANUP_GRACE = 3600
+
+    def __init__(self, base_dir, mem_budget=32 * 1024 * 1024, disk_ttl=30 * 24 * 3600, negative_ttl=6 * 3600,
+                 negative_maxsize=10000):
+        self.base_dir = base_dir
+        self.mem_budget = mem_budget
+        self.disk_ttl = disk_ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._mem = OrderedDict()   # (role, id) -> (sha, bytes)
+        self._mem_bytes = 0
+        # (role, id) -> expires_at (epoch); entri kedaluwarsa/terlama dibuang otomatis
+        self._missing = TLRUCache(maxsize=negative_maxsize, ttu=lambda _key, expires_at, _now: expires_at,
+                                  timer=time.time)
+        self._stats = {"mem_hits": 0, "disk_hits": 0, "negative_hits": 0, "misses": 0, "stored": 0, "evictions": 0,
+                       "variant_hits": 0, "variants_made": 0, "cleanup_removed": 0}
+
+    # --- lokasi file ---
+    def _blob_path(self, sha):
+        return os.path.join(self.base_dir, "blobs", sha[:2], f"{sha}.jpg")
+
+    def _ref_path(self, role, id_):
+        return os.path.join(self.base_dir, "refs", role, f"{id_}.json")
+
+    def _variant_path(self, variant_key):
+        return os.path.join(self.base_dir, "variants", variant_key[:2], variant_key)
+
+    @staticmethod
+    def _write_atomic(path, payload):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # --- memori (LRU byte budget) ---
+    def _remember(self, key, sha, content):
+        """WAJIB dipanggil dengan self._lock dipegang."""
+        if len(content) > self.mem_budget:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= len(old[1])
+        self._mem[key] = (sha, content)
+        self._mem_bytes += len(content)
+        while self._mem_bytes > self.mem_budget:
+            _, (_, evicted) = self._mem.popitem(last=False)
+            self._mem_bytes -= len(evicted)
+            self._stats["evictions"] += 1
+
+    # --- baca ---
+    def lookup(self, role, id_, remember=True):
+        """
+        Return ("hit", sha, bytes), ("missing", None, None) kalau foto diketahui tidak ada,
+        atau (None, None, None) kalau belum pernah diambil / sudah kedaluwarsa.
+        remember=False -> hasil dari disk tidak dimasukkan ke LRU memori.
+        """
+        key = (role, str(id_))
+        now = time.time()
+        with self._lock:
+            cached = self._mem.get(key)
+            if cached is not None:
+                self._mem.move_to_end(key)
+                self._stats["mem_hits"] += 1
+                return ("hit",) + cached
+            if self._missing.get(key) is not None:
+                self._stats["negative_hits"] += 1
+                return "missing", None, None
+
+        found = self._lookup_disk(role, key[1], now)
+        with self._lock:
+            if found is None:
+                self._stats["misses"] += 1
+                return None, None, None
+            if found[0] == "missing":
+                self._missing[key] = found[1]
+                self._stats["negative_hits"] += 1
+                return "missing", None, None
+            _, sha, content = found
+            if remember:
+                self._remember(key, sha, content)
+            self._stats["disk_hits"] += 1
+            return "hit", sha, content
+
+    def _read_ref(self, role, id_, now):
+        """Isi refs/<role>/<id>.json yang masih berlaku, atau None."""
+        try:
+            with open(self._ref_path(role, id_), encoding="utf-8") as f:
+                ref = json.load(f)
+            ttl = self.negative_ttl if ref.get("missing") else self.disk_ttl
+            return ref if ref["fetched_at"] + ttl > now else None
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"[PhotoStore] Ref {role}/{id_} rusak, diabaikan: {e}")
+            return None
+
+    def _lookup_disk(self, role, id_, now):
+        ref = self._read_ref(role, id_, now)
+        if ref is None:
+            return None
+        if ref.get("missing"):
+            return "missing", ref["fetched_at"] + self.negative_ttl
+        try:
+            with open(self._blob_path(ref["sha"]), "rb") as f:
+                content = f.read()
+        except OSError as e:
+            logging.warning(f"[PhotoStore] Blob {role}/{id_} hilang, diabaikan: {e}")
+            return None
+        return "hit", ref["sha"], content
+
+    def _peek_sha(self, role, id_):
+        """sha foto asli TANPA membaca blob-nya. Return ("hit", sha), ("missing", None) atau (None, None)."""
+        key = (role, str(id_))
+        now = time.time()
+        with self._lock:
+            cached = self._mem.get(key)
+            if cached is not None:
+                return "hit", cached[0]
+            if self._missing.get(key) is not None:
+                return "missing", None
+        ref = self._read_ref(role, key[1], now)
+        if ref is None:
+            return None, None
+        return ("missing", None) if ref.get("missing") else ("hit", ref["sha"])
+
+    # --- tulis ---
+    def put(self, role, id_, content, remember=True):
+        """Simpan foto (memori + disk). Return sha256 isinya (dipakai sebagai ETag)."""
+        key = (role, str(id_))
+        sha = hashlib.sha256(content).hexdigest()
+        try:
+            blob = self._blob_path(sha)
+            if os.path.exists(blob):
+                os.utime(blob)  # blob dipakai lagi -> jangan dianggap sampah oleh cleanup()
+            else:
+                self._write_atomic(blob, content)
+            ref = {"sha": sha, "size": len(content), "fetched_at": time.time()}
+            self._write_atomic(self._ref_path(role, key[1]), json.dumps(ref).encode())
+        except OSError as e:
+            logging.error(f"[PhotoStore] Gagal simpan {role}/{id_} ke disk: {e}")
+        with self._lock:
+            self._missing.pop(key, None)
+            if remember:
+                self._remember(key, sha, content)
+            self._stats["stored"] += 1
+        return sha
+
+    def put_missing(self, role, id_):
+        """Catat bahwa foto ini tidak ada di Sicyca (negative cache)."""
+        key = (role, str(id_))
+        now = time.time()
+        try:
+            self._write_atomic(self._ref_path(role, key[1]), json.dumps({"missing": True, "fetched_at": now}).encode())
+        except OSError as e:
+            logging.error(f"[PhotoStore] Gagal simpan negative cache {role}/{id_}: {e}")
+        with self._lock:
+            self._missing[key] = now + self.negative_ttl
+
+    def get_or_fetch(self, role, id_, fetch, remember=True):
+        """
+        Ambil dari cache, kalau belum ada panggil fetch(role, id_) -> (bytes|None, status).
+        status: "ok", "missing" (foto memang tidak ada -> negative cache) atau "error" (tidak di-cache).
+        Return ("hit"|"missing"|"error", sha, bytes).
+        """
+        state, sha, content = self.lookup(role, id_, remember)
+        if state is not None:
+            return state, sha, content
+        content, status = fetch(role, id_)
+        return self.store_result(role, id_, content, status, remember)
+
+    def store_result(self, role, id_, content, status, remember=True):
+        """Simpan hasil fetch upstream sesuai status-nya. Return ("hit"|"missing"|"error", sha, bytes)."""
+        if status == "ok" and content:
+            return "hit", self.put(role, id_, content, remember), content
+        if status == "missing":
+            self.put_missing(role, id_)
+            return "missing", None, None
+        return "error", None, None
+
+    # --- varian (thumbnail / WebP) ---
+    def _variant_cached(self, variant_key):
+        with self._lock:
+            cached = self._mem.get(("variant", variant_key))
+            if cached is not None:
+                self._mem.move_to_end(("variant", variant_key))
+                self._stats["variant_hits"] += 1
+                return cached[1]
+        try:
+            with open(self._variant_path(variant_key), "rb") as f:
+                content = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            self._remember(("variant", variant_key), variant_key, content)
+            self._stats["variant_hits"] += 1
+        return content
+
+    def get_variant(self, role, id_, size, fmt, fetch):
+        """
+        Foto dalam ukuran (THUMB_SIZES) & format (THUMB_FORMATS) tertentu.
+        Return (state, etag, bytes, mimetype); state sama seperti get_or_fetch.
+        Kalau varian tidak bisa dibuat (mis. gambar rusak) -> foto asli JPEG.
+        """
+        if size == "orig" and fmt == "jpeg":
+            state, sha, content = self.get_or_fetch(role, id_, fetch)
+            return state, sha, content, THUMB_FORMATS["jpeg"]
+
+        # Varian sudah ada -> foto asli tidak perlu dibaca sama sekali
+        state, sha = self._peek_sha(role, id_)
+        if state == "missing":
+            return "missing", None, None, None
+        if sha:
+            cached = self._variant_cached(f"{sha}-{size}.{fmt}")
+            if cached is not None:
+                return "hit", f"{sha}-{size}.{fmt}", cached, THUMB_FORMATS[fmt]
+
+        state, sha, content = self.get_or_fetch(role, id_, fetch, remember=False)
+        if state != "hit":
+            return state, None, None, None
+        variant_key = f"{sha}-{size}.{fmt}"
+        cached = self._variant_cached(variant_key)
+        if cached is not None:
+            return "hit", variant_key, cached, THUMB_FORMATS[fmt]
+
+        data = make_variant(content, size, fmt)
+        if data is None:
+            return "hit", sha, content, THUMB_FORMATS["jpeg"]
+        try:
+            self._write_atomic(self._variant_path(variant_key), data)
+        except OSError as e:
+            logging.error(f"[PhotoStore] Gagal simpan varian {variant_key}: {e}")
+        with self._lock:
+            self._remember(("variant", variant_key), variant_key, data)
+            self._stats["variants_made"] += 1
+        return "hit", variant_key, data, THUMB_FORMATS[fmt]
+
+    # --- pembersihan disk ---
+    @staticmethod
+    def _walk_files(directory):
+        for root, _, files in os.walk(directory):
+            for name in files:
+                yield os.path.join(root, name), name
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def cleanup(self):
+        """
+        Hapus ref yang sudah lewat disk_ttl/negative_ttl, lalu blob & varian yang sha-nya tidak
+        dirujuk ref yang masih berlaku. File yang baru ditulis (< CLEANUP_GRACE) selalu dibiarkan.
+        Return jumlah file yang dihapus per jenis.
+        """
+        now = time.time()
+        removed = {"refs": 0, "blobs": 0, "variants": 0}
+        live = set()
+        for path, name in self._walk_files(os.path.join(self.base_dir, "refs")):
+            if name.startswith(".tmp-"):
+                if os.path.getmtime(path) < now - self.CLEANUP_GRACE:
+                    removed["refs"] += self._remove(path)
+                continue
+            role = os.path.basename(os.path.dirname(path))
+            ref = self._read_ref(role, name[:-len(".json")], now)
+            if ref is None:
+                removed["refs"] += self._remove(path)
+            elif ref.get("sha"):
+                live.add(ref["sha"])
+
+        for kind in ("blobs", "variants"):
+            for path, name in self._walk_files(os.path.join(self.base_dir, kind)):
+                sha = name.split(".", 1)[0].split("-", 1)[0]
+                if sha in live:
+                    continue
+                try:
+                    if os.path.getmtime(path) >= now - self.CLEANUP_GRACE:
+                        continue
+                except OSError:
+                    continue
+                removed[kind] += self._remove(path)
+
+        with self._lock:
+            # Salinan di memori bisa saja sudah tidak punya blob di disk; buang juga
+            for key in [k for k, (sha, _) in self._mem.items() if k[0] != "variant" and sha not in live]:
+                self._mem_bytes -= len(self._mem.pop(key)[1])
+            self._stats["cleanup_removed"] += sum(removed.values())
+        logging.info(f"[PhotoStore] Cleanup: {removed}")
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, mem_items=len(self._mem), mem_bytes=self._mem_bytes,
+                        mem_budget=self.mem_budget, negative_items=len(self._missing))
@@ -1,18 +1,31 @@
 # scrapper_requests.py
-import os, json, time
+from __future__ import annotations
+import os, json, time, threading
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 from dotenv import load_dotenv
 from urllib.parse import urljoin, quote, unquote
 import re
 from datetime import datetime, date, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cachetools import TTLCache, TLRUCache
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from zoneinfo import ZoneInfo
 from flask import session, has_request_context
-from controller.GateController import get_authenticated_session, reset_session_user
+from controller.GateController import (
+    get_authenticated_session, reset_session_user,
+    get_cached_api_params, store_api_params, invalidate_api_token,
+)
+from upstream import GATE_ROOT, TARGET_URL
 from models.gate import GateUser
+from singleflight import SingleFlight
+from scrapper_tables import extract_table, cell_attr, parse_krs_detail, JADWAL_MINGGU_INI, KOMUNITAS_SEARCH, KRS_LIST
+
+# pandas berat (~0.5 detik saat import), jadi baru di-import di dalam fungsi scraping
+# (lxml juga, lewat scrapper_tables). Worker web yang cuma melayani halaman/API lain
+# tidak ikut bayar biayanya.
+if TYPE_CHECKING:
+    import pandas as pd
 
 load_dotenv()
 proxy_url = os.getenv("HTTP_PROXY_URL")
@@ -23,8 +36,6 @@ proxy_url = os.getenv("HTTP_PROXY_URL")
 # === ENV & TZ ===
 TZ = os.getenv("TIMEZONE", "Asia/Jakarta")
 JKT = ZoneInfo(TZ)
-TARGET_URL = "https://sicyca.dinamika.ac.id"
-GATE_ROOT = "https://gate.dinamika.ac.id"
 COOKIES_FILE = "cookies.json"
 API_SICYCA = "/sicyca_api.php"
 
@@ -38,12 +49,94 @@ gate_user_model = GateUser()
 # _session.mount("https://", HTTPAdapter(max_retries=_retries))
 # _session.mount("http://", HTTPAdapter(max_retries=_retries))
 
+# === Single-flight: request identik yang barengan cukup 1x ke Sicyca ===
+_flight = SingleFlight()
+
+def _normalize_query(query) -> str:
+    return " ".join(str(query).split()).lower()
+
+def get_singleflight_stats():
+    return _flight.stats()
+
 # === Cache harian ===
+# Data ulang tahun: sama untuk semua user & cuma berubah per hari -> cache sampai tengah malam WIB
 _cache_data: Dict[str, Any] = {}
 _cache_expire_at: float = 0.0
 
 
 
+# === Cache KRS + masa studi per user (stale-while-revalidate) ===
+# KRS hampir tidak berubah selama semester: umur < KRS_FRESH_SECONDS -> langsung pakai,
+# sampai KRS_MAX_STALE_SECONDS -> tetap dipakai tapi di-refresh di background,
+# lebih tua dari itu (atau belum ada) -> tunggu fetch baru. Fetch gagal -> versi lama (stale) tetap dipakai.
+KRS_FRESH_SECONDS = int(os.getenv("KRS_FRESH_SECONDS", "900"))
+KRS_MAX_STALE_SECONDS = int(os.getenv("KRS_MAX_STALE_SECONDS", str(7 * 24 * 3600)))
+KRS_CACHE_MAXSIZE = int(os.getenv("KRS_CACHE_MAXSIZE", "1024"))
+# user_id -> {"data_krs", "masa_studi", "fetched_at"}; entri hilang sendiri setelah KRS_MAX_STALE_SECONDS
+_krs_cache = TTLCache(maxsize=KRS_CACHE_MAXSIZE, ttl=KRS_MAX_STALE_SECONDS)
+_krs_cache_lock = threading.Lock()
+_krs_refreshing = set()
+# Khusus masa studi yang jalan paralel dengan scrape KRS (tidak pernah submit task lagi -> aman dari deadlock)
+_masa_studi_pool = ThreadPoolExecutor(max_workers=int(os.getenv("KRS_WORKERS", "4")), thread_name_prefix="masa-studi")
+
+
+# === Cache detail KRS (/table-proxy/) per user + prefetch background (opsional) ===
+# Kalau KRS_PREFETCH=1: setelah daftar KRS didapat, detail tiap matkul diambil pelan-pelan di pool
+# kecil + jeda minimum antar request, biar modal di frontend langsung kebuka. Default MATI karena
+# menambah 3 x jumlah matkul request ke Sicyca per user.
+KRS_DETAIL_TTL = int(os.getenv("KRS_DETAIL_TTL", "1800"))
+KRS_DETAIL_CACHE_MAXSIZE = int(os.getenv("KRS_DETAIL_CACHE_MAXSIZE", "2048"))
+KRS_PREFETCH_ENABLED = os.getenv("KRS_PREFETCH", "0").lower() in ("1", "true", "yes")
+KRS_PREFETCH_WORKERS = int(os.getenv("KRS_PREFETCH_WORKERS", "2"))
+KRS_PREFETCH_INTERVAL = float(os.getenv("KRS_PREFETCH_INTERVAL", "0.5"))  # detik antar request prefetch (semua user)
+# Hanya tipe modal yang bisa dibuka dari krsKuliah.html. 'materikuliah' (butuh nik dosen, tidak ada
+# di baris KRS) dan 'kehadiranprak' (tidak ada tombolnya) sengaja tidak di-prefetch: tetap di-cache
+# saat diminta, tapi request pertamanya selalu ke Sicyca.
+KRS_PREFETCH_TYPES = ("matakuliah", "nilai", "kehadiran")
+
+_krs_detail_cache = TTLCache(maxsize=KRS_DETAIL_CACHE_MAXSIZE, ttl=KRS_DETAIL_TTL)  # (user_id, params) -> (hasil, asal)
+_krs_detail_lock = threading.Lock()
+_krs_detail_stats = {"requests": 0, "hits": 0, "prefetch_hits": 0, "misses": 0,
+                     "prefetched": 0, "prefetch_errors": 0, "prefetch_skipped": 0}
+_prefetch_pending = set()
+_prefetch_next_at = 0.0
+_prefetch_pool = ThreadPoolExecutor(max_workers=KRS_PREFETCH_WORKERS, thread_name_prefix="krs-prefetch")
+
+
+# === Cache hasil pencarian komunitas (mahasiswa/staff) ===
+# Direktori sama untuk semua user -> key (endpoint, query ternormalisasi). Hasil kosong juga di-cache
+# (negative cache) tapi TTL-nya lebih pendek; error upstream (None) tidak pernah di-cache. Dibatasi total byte, LRU.
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "600"))
+SEARCH_CACHE_EMPTY_TTL = int(os.getenv("SEARCH_CACHE_EMPTY_TTL", "60"))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_KB", "8192")) * 1024
+
+class _SearchCache(TLRUCache):
+    """TLRUCache yang menghitung eviksi karena kehabisan budget (bukan karena kedaluwarsa)."""
+    evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+def _search_ttu(_key, rows, now):
+    return now + (SEARCH_CACHE_TTL if rows else SEARCH_CACHE_EMPTY_TTL)
+
+def _search_sizeof(rows):
+    # Perkiraan kasar memori: isi string + overhead per sel/baris
+    return 256 + sum(232 + sum(len(str(v)) + 64 for v in row.values()) for row in rows)
+
+_search_cache = _SearchCache(maxsize=SEARCH_CACHE_MAX_BYTES, ttu=_search_ttu, timer=time.monotonic,
+                             getsizeof=_search_sizeof)
+_search_cache_lock = threading.Lock()
+_search_cache_stats = {"requests": 0, "hits": 0, "empty_hits": 0, "misses": 0, "stored": 0, "too_large": 0}
+
+
+# === Batch foto: fetch miss barengan di pool terbatas, satu session ===
+PHOTO_BATCH_WORKERS = int(os.getenv("PHOTO_BATCH_WORKERS", "6"))
+_photo_pool = ThreadPoolExecutor(max_workers=PHOTO_BATCH_WORKERS, thread_name_prefix="photo")
+
+
 def _midnight_epoch() -> float:
     now = datetime.now(JKT)
     midnight_tomorrow = datetime(now.year, now.month, now.day, tzinfo=JKT) + timedelta(days=1)
@@ -75,35 +168,51 @@ def _get_current_user_id(explicit_id=None):
     return 1
 
 # === HELPER: AMBIL CREDENTIALS (NIM & TOKEN) ===
-def _get_api_params(user_id, session_obj):
+_GLOBAL_TOKEN_RE = re.compile(r'var global_token\s*=\s*"([^"]+)"')
+_CSRF_META_RE = re.compile(r'name="csrf-token"\s+content="([^"]+)"')
+
+def _extract_global_token(html):
+    """Cari token API di HTML Gate Dashboard. Return (token, sumber) atau (None, None)."""
+    # Regex cari: var global_token = "..."
+    match = _GLOBAL_TOKEN_RE.search(html)
+    if match:
+        return match.group(1), "global_token"
+    # Fallback: cari meta csrf-token
+    meta_match = _CSRF_META_RE.search(html)
+    if meta_match:
+        return meta_match.group(1), "csrf-token"
+    return None, None
+
+def _get_api_params(user_id, session_obj, refresh=False):
     """
-    Mengambil NIM dari DB dan GLOBAL TOKEN dari HTML Gate Dashboard.
+    Mengambil NIM & GLOBAL TOKEN untuk sicyca_api.php.
+    Keduanya di-cache di entry session aktif (_active_sessions), jadi DB + GET Gate Dashboard
+    cuma dibayar sekali per login. refresh=True -> paksa ambil token baru.
     """
-    # 1. Ambil NIM dari Database
-    _, nim, _ = gate_user_model.get_credentials_by_user_id(user_id)
+    nim, token = get_cached_api_params(user_id, session_obj)
+    if token and nim and not refresh:
+        return nim, token
+
+    # 1. Ambil NIM dari Database (kalau belum tersimpan waktu login)
     if not nim:
-        logging.error(f"Gagal mengambil NIM untuk User ID {user_id}")
-        return None, None
+        _, nim, _ = gate_user_model.get_credentials_by_user_id(user_id)
+        if not nim:
+            logging.error(f"Gagal mengambil NIM untuk User ID {user_id}")
+            return None, None
 
     # 2. Scrape GLOBAL TOKEN dari Gate Dashboard (Sesuai request)
     token = None
     try:
         # Request ke halaman dashboard gate untuk cari var global_token
-        # Gunakan GATE_ROOT (https://gate.dinamika.ac.id)
+        # Gunakan GATE_ROOT (default https://gate.dinamika.ac.id)
         logging.info(f"Scraping global_token dari {GATE_ROOT}...")
         r = session_obj.get(GATE_ROOT, timeout=15)
         
-        # Regex cari: var global_token = "..."
-        match = re.search(r'var global_token\s*=\s*"([^"]+)"', r.text)
-        if match:
-            token = match.group(1)
+        token, source = _extract_global_token(r.text)
+        if source == "global_token":
             logging.info(f"Token ditemukan via regex global_token, dengan NIM: {nim}")
-        else:
-            # Fallback: cari meta csrf-token
-            meta_match = re.search(r'name="csrf-token"\s+content="([^"]+)"', r.text)
-            if meta_match: 
-                token = meta_match.group(1)
-                logging.info("Token ditemukan via meta csrf-token.")
+        elif source:
+            logging.info("Token ditemukan via meta csrf-token.")
                 
     except Exception as e:
         logging.error(f"Gagal ambil token dari Gate: {e}")
@@ -113,9 +222,71 @@ def _get_api_params(user_id, session_obj):
         logging.warning("Token global tidak ditemukan di HTML Gate.")
         return None, None
 
+    store_api_params(user_id, session_obj, nim, token)
     return nim, token
 
+def _api_token_rejected(status_code, data):
+    """
+    Token/sesi ditolak secara eksplisit oleh sicyca_api.php: HTTP 401/403, atau body error
+    Sicyca ({"status": false, "message": "...token..."}). Error jaringan/5xx BUKAN penolakan token.
+    """
+    if status_code in (401, 403):
+        return True
+    if isinstance(data, dict) and data.get('status') is False and 'data' not in data:
+        message = str(data.get('message') or data.get('error') or '').lower()
+        return 'token' in message or 'sesi' in message or 'session' in message
+    return False
+
+def sicyca_api_batch(operations, user_id=None) -> Dict[str, Any]:
+    """
+    Jalankan beberapa operasi sicyca_api.php (mis. ["masa_studi", "ultah"]) dengan SATU
+    pengambilan session + token. Return {operasi: JSON respon, atau None kalau gagal}.
+    Hanya kalau token ditolak eksplisit (401/403 / body error Sicyca): cache token dibuang,
+    token baru diambil sekali, operasi yang ditolak diulang. Error jaringan/5xx tidak diulang.
+    """
+    target_user = _get_current_user_id(user_id)
+    results: Dict[str, Any] = {op: None for op in operations}
+    pending = list(operations)
+
+    for attempt in range(2):
+        s = get_authenticated_session(target_user)
+        if not s:
+            continue
+        nim, token = _get_api_params(target_user, s)
+        if not nim or not token:
+            continue
+
+        rejected = []
+        for op in pending:
+            status_code, data = None, None
+            try:
+                logging.info(f"[API] {op} (Attempt {attempt+1})...")
+                r = s.post(f"{TARGET_URL}{API_SICYCA}", data={"nim": nim, "token": token, op: True}, timeout=20)
+                status_code = r.status_code
+                try:
+                    data = r.json()
+                except ValueError:
+                    logging.warning(f"[API] {op}: Respon bukan JSON.")
+                if status_code != 200:
+                    logging.warning(f"[API] {op}: Status Code {status_code}")
+            except Exception as e:
+                logging.error(f"[API] {op}: Error: {e}")
+                continue
+            if _api_token_rejected(status_code, data):
+                logging.warning(f"[API] {op}: Token ditolak Sicyca.")
+                rejected.append(op)
+            elif status_code == 200:
+                results[op] = data
+
+        if not rejected:
+            break
+        invalidate_api_token(target_user, s)
+        pending = rejected
+
+    return results
+
 def scrape_data(user_id=None):
+    import pandas as pd
     logging.info("\n--- Memulai Scraping Jadwal ---")
     target_user = _get_current_user_id(user_id)
     sess = get_authenticated_session(target_user)
@@ -124,15 +295,9 @@ def scrape_data(user_id=None):
         akademik_url = urljoin(TARGET_URL, "/akademik")
         resp_ak2 = sess.get(akademik_url, timeout=30, headers={"Referer": TARGET_URL})
         resp_ak2.raise_for_status()
-        soup = BeautifulSoup(resp_ak2.text, "lxml")
-        text_node = soup.find(string=re.compile(r'JADWAL KEGIATAN MINGGU INI', re.IGNORECASE))
-        target_div = text_node.find_parent("div", class_="tabletitle") if text_node else None
-        if not target_div: raise Exception("Tidak ketemu div 'JADWAL KEGIATAN MINGGU INI'.")
-        table = target_div.find_next("table", class_=re.compile(r"\bsicycatable\b"))
-        if not table: raise Exception("Tabel sicycatable tidak ketemu.")
-        headers = [th.get_text(strip=True) for th in table.find_all("th")]
-        rows = [[td.get_text(strip=True) for td in tr.find_all("td")] for tr in table.find_all("tr") if tr.find("td")]
-        df_raw = pd.DataFrame(rows, columns=headers)
+        table = extract_table(resp_ak2.text, JADWAL_MINGGU_INI)
+        if table is None: raise Exception("Tabel 'JADWAL KEGIATAN MINGGU INI' tidak ketemu.")
+        df_raw = pd.DataFrame(table.rows, columns=table.headers)
         df_raw.columns = df_raw.columns.str.strip()
         logging.info(f"   --> Scraping jadwal berhasil, {len(df_raw)} data ditemukan.")
         return df_raw
@@ -145,6 +310,11 @@ def scrape_krs(user_id=None) -> pd.DataFrame:
     Scrape data KRS (Hari, Jam, MK, Kode, Kelas, SKS, Ruang)
     """
     target_user = _get_current_user_id(user_id)
+    return _flight.do(("scrape_krs", target_user), _scrape_krs, target_user)
+
+def _scrape_krs(user_id=None) -> pd.DataFrame:
+    import pandas as pd
+    target_user = _get_current_user_id(user_id)
     
     for attempt in range(2):
         is_force = (attempt > 0)
@@ -160,11 +330,9 @@ def scrape_krs(user_id=None) -> pd.DataFrame:
             
             if "login" in r.url.lower(): raise Exception("Redirected to Login")
 
-            soup = BeautifulSoup(r.text, "html.parser")
-            tabel = soup.find('table', id='tableView')
-            if not tabel: tabel = soup.find('table', class_='sicycatablemanual')
+            tabel = extract_table(r.text, KRS_LIST)
             
-            if not tabel:
+            if tabel is None:
                 if attempt == 0: 
                     # Simpan debug html jika gagal
                     try:
@@ -174,21 +342,19 @@ def scrape_krs(user_id=None) -> pd.DataFrame:
                 return pd.DataFrame()
 
             data_rows = []
-            tr_list = tabel.find_all('tr')[1:] 
             
-            for tr in tr_list:
-                tds = tr.find_all('td')
+            for tds, cells in zip(tabel.rows, tabel.cells):
                 if len(tds) >= 9: 
-                    hari = tds[0].get_text(strip=True)
-                    waktu = tds[1].get_text(strip=True)
-                    mk_raw = tds[2].get_text(strip=True)
+                    hari = tds[0]
+                    waktu = tds[1]
+                    mk_raw = tds[2]
                     # tds[3] is Brilian, skip
-                    ruang = tds[4].get_text(strip=True)
-                    sks = tds[5].get_text(strip=True)
-                    nilai = tds[6].get_text(strip=True)
-                    min_nilai = tds[7].get_text(strip=True)
-                    kehadiran = tds[8].get_text(strip=True)
-                    keterangan = tds[9].get_text(strip=True) if len(tds) > 9 else "-"
+                    ruang = tds[4]
+                    sks = tds[5]
+                    nilai = tds[6]
+                    min_nilai = tds[7]
+                    kehadiran = tds[8]
+                    keterangan = tds[9] if len(tds) > 9 else "-"
                     
                     # Default Parsed Values
                     nama_mk = mk_raw
@@ -203,9 +369,8 @@ def scrape_krs(user_id=None) -> pd.DataFrame:
                         kelas = match_display.group(2).strip()
                     
                     # 2. Extract Parameter dari ONCLICK <a> di kolom Matakuliah (tds[2])
-                    link_mk = tds[2].find('a')
-                    if link_mk and link_mk.has_attr('onclick'):
-                        onclick = link_mk['onclick']
+                    onclick = cell_attr(cells[2], 'a', 'onclick')
+                    if onclick is not None:
                         # format: showModalMatakuliah('KELAS','KODE','NAMA')
                         args = re.findall(r"['\"](.*?)['\"]", onclick)
                         
@@ -252,53 +417,183 @@ def scrape_krs(user_id=None) -> pd.DataFrame:
     return pd.DataFrame()
 
 
-def fetch_masa_studi(user_id=None) -> str:
-    target_user = _get_current_user_id(user_id)
-    
-    for attempt in range(2):
-        s = get_authenticated_session(target_user)
-        if not s: 
-            if attempt == 0: continue
-            return "-"
+def _fetch_krs_bundle(user_id):
+    """scrape_krs & fetch_masa_studi barengan (masa studi di pool, KRS di thread ini)."""
+    future_masa = _masa_studi_pool.submit(fetch_masa_studi, user_id)
+    df_krs = scrape_krs(user_id)
+    masa_studi = future_masa.result()
+    if df_krs.empty:
+        return None
 
-        try:
-            nim, token = _get_api_params(target_user, s)
-            if not nim or not token: 
-                if attempt == 0: continue
-                return "-"
-
-            payload = {
-                "nim": nim,
-                "token": token,
-                "masa_studi": True
-            }
-
-            r = s.post(f"{TARGET_URL}{API_SICYCA}", data=payload, timeout=10)
-            
-            if r.status_code == 200:
-                try:
-                    data = r.json()
-                    if isinstance(data, dict) and 'data' in data:
-                        result = data['data']
-                        logging.info(f"    --> Masa studi JSON: {result}")
-                        return result
-                    return str(data)
-                except:
-                    pass # Retry
-            
-            if attempt == 0: continue
+    with _krs_cache_lock:
+        old = _krs_cache.get(user_id)
+        # Masa studi gagal ("-") tapi versi lama ada -> pakai yang lama
+        if masa_studi in (None, "-") and old:
+            masa_studi = old["masa_studi"]
+        entry = _krs_cache[user_id] = {
+            "data_krs": df_krs.to_dict(orient='records'),
+            "masa_studi": masa_studi,
+            "fetched_at": time.time(),
+        }
+    prefetch_krs_details(user_id, entry["data_krs"])
+    return entry
 
-        except Exception as e:
-            logging.error(f"[Masa Studi] Error: {e}")
-            if attempt == 0: continue
-                
-    return "-"
+def _refresh_krs_background(user_id):
+    try:
+        _flight.do(("krs_bundle", user_id), _fetch_krs_bundle, user_id)
+    except Exception as e:
+        logging.error(f"[KRS] Refresh background User {user_id} gagal: {e}")
+    finally:
+        with _krs_cache_lock:
+            _krs_refreshing.discard(user_id)
+
+def get_krs_bundle(user_id=None, force_refresh=False) -> Optional[Dict[str, Any]]:
+    """
+    Data KRS + masa studi untuk halaman KRS, dengan cache stale-while-revalidate per user.
+    Return dict {data_krs, masa_studi, fetched_at, age_seconds, stale, refreshing} atau None kalau gagal
+    dan tidak ada versi cache sama sekali.
+    """
+    target_user = _get_current_user_id(user_id)
+    now = time.time()
+    with _krs_cache_lock:
+        entry = _krs_cache.get(target_user)
+    age = now - entry["fetched_at"] if entry else None
+
+    if entry is None or force_refresh:
+        fresh = _flight.do(("krs_bundle", target_user), _fetch_krs_bundle, target_user)
+        if fresh is None:
+            if entry is None:
+                return None
+            # Sicyca gagal saat force refresh: tetap tampilkan versi lama, ditandai stale
+            logging.warning(f"[KRS] Refresh User {target_user} gagal, pakai cache umur {int(age)} detik.")
+            return dict(entry, age_seconds=int(age), stale=True, refreshing=False)
+        entry = fresh
+        age = time.time() - entry["fetched_at"]
+
+    refreshing = False
+    if age > KRS_FRESH_SECONDS:
+        with _krs_cache_lock:
+            refreshing = True
+            if target_user not in _krs_refreshing:
+                _krs_refreshing.add(target_user)
+                threading.Thread(target=_refresh_krs_background, args=(target_user,),
+                                 name=f"krs-refresh-{target_user}", daemon=True).start()
+
+    return dict(entry, age_seconds=int(age), stale=age > KRS_FRESH_SECONDS, refreshing=refreshing)
+
+def fetch_masa_studi(user_id=None) -> str:
+    data = sicyca_api_batch(["masa_studi"], user_id)["masa_studi"]
+    if data is None:
+        return "-"
+    if isinstance(data, dict) and 'data' in data:
+        result = data['data']
+        logging.info(f"    --> Masa studi JSON: {result}")
+        return result
+    return str(data)
         
+def krs_detail_params(req_type, mk=None, kls=None, grup=None, nik=None) -> Dict[str, str]:
+    """Parameter /table-proxy/ (?t=...). Dipakai API & prefetch supaya key cache-nya sama."""
+    params = {"t": req_type}
+    if mk: params['mk'] = mk
+    if kls: params['kls'] = kls
+    if grup: params['grup'] = grup
+    if nik: params['nik'] = nik # Untuk materi kuliah
+    return params
+
+def _krs_detail_key(user_id, params):
+    return (user_id, tuple(sorted(params.items())))
+
+def get_krs_detail_stats():
+    with _krs_detail_lock:
+        st = dict(_krs_detail_stats, size=len(_krs_detail_cache), ttl=KRS_DETAIL_TTL,
+                  prefetch_enabled=KRS_PREFETCH_ENABLED, prefetch_pending=len(_prefetch_pending))
+    st["hit_rate"] = round(st["hits"] / st["requests"], 3) if st["requests"] else None
+    st["prefetch_hit_rate"] = round(st["prefetch_hits"] / st["requests"], 3) if st["requests"] else None
+    return st
+
 def scrape_krs_detail(params: Dict[str, str], user_id=None) -> Dict[str, Any]:
     """
     Mengambil detail KRS. Menangani struktur Tabel murni (Nilai/Kehadiran) 
     dan struktur Campuran (Matakuliah: Info Dosen + Tabel Peserta).
+    Hasil sukses di-cache per user (KRS_DETAIL_TTL), biasanya sudah diisi prefetch.
     """
+    target_user = _get_current_user_id(user_id)
+    key = _krs_detail_key(target_user, params)
+    with _krs_detail_lock:
+        _krs_detail_stats["requests"] += 1
+        cached = _krs_detail_cache.get(key)
+        if cached is not None:
+            _krs_detail_stats["hits"] += 1
+            if cached[1] == "prefetch":
+                _krs_detail_stats["prefetch_hits"] += 1
+            return cached[0]
+        _krs_detail_stats["misses"] += 1
+
+    # Kalau prefetch untuk params yang sama sedang jalan, cukup numpang hasilnya
+    result = _flight.do(("scrape_krs_detail",) + key, _scrape_krs_detail_upstream, params, target_user)
+    _store_krs_detail(key, result, "request")
+    return result
+
+def _store_krs_detail(key, result, origin):
+    if result.get("success"):
+        with _krs_detail_lock:
+            if key not in _krs_detail_cache:
+                _krs_detail_cache[key] = (result, origin)
+
+def _prefetch_throttle():
+    """Jeda minimum antar request prefetch (global), biar tidak membanjiri Sicyca."""
+    global _prefetch_next_at
+    with _krs_detail_lock:
+        now = time.monotonic()
+        wait = _prefetch_next_at - now
+        _prefetch_next_at = max(now, _prefetch_next_at) + KRS_PREFETCH_INTERVAL
+    if wait > 0:
+        time.sleep(wait)
+
+def _prefetch_one(user_id, params):
+    key = _krs_detail_key(user_id, params)
+    try:
+        with _krs_detail_lock:
+            if key in _krs_detail_cache:
+                _krs_detail_stats["prefetch_skipped"] += 1
+                return
+        _prefetch_throttle()
+        result = _flight.do(("scrape_krs_detail",) + key, _scrape_krs_detail_upstream, params, user_id)
+        _store_krs_detail(key, result, "prefetch")
+        with _krs_detail_lock:
+            _krs_detail_stats["prefetched" if result.get("success") else "prefetch_errors"] += 1
+    except Exception as e:
+        logging.warning(f"[KRS Prefetch] Gagal {params}: {e}")
+        with _krs_detail_lock:
+            _krs_detail_stats["prefetch_errors"] += 1
+    finally:
+        with _krs_detail_lock:
+            _prefetch_pending.discard(key)
+
+def prefetch_krs_details(user_id, krs_rows):
+    """Antre-kan prefetch semua tipe detail untuk tiap matkul di KRS (yang belum ada di cache)."""
+    if not KRS_PREFETCH_ENABLED:
+        return 0
+    queued = 0
+    for row in krs_rows:
+        mk = row.get("param_mk")
+        if not mk or mk == "-":
+            continue
+        for req_type in KRS_PREFETCH_TYPES:
+            params = krs_detail_params(req_type, mk, row.get("param_kls"), row.get("param_grup"))
+            key = _krs_detail_key(user_id, params)
+            with _krs_detail_lock:
+                if key in _krs_detail_cache or key in _prefetch_pending:
+                    continue
+                _prefetch_pending.add(key)
+            _prefetch_pool.submit(_prefetch_one, user_id, params)
+            queued += 1
+    if queued:
+        logging.info(f"[KRS Prefetch] {queued} detail diantre untuk User {user_id}.")
+    return queued
+
+def _scrape_krs_detail_upstream(params: Dict[str, str], user_id=None) -> Dict[str, Any]:
+    """Parsing-nya di scrapper_tables.parse_krs_detail (lxml, satu kali parse)."""
     logging.info(f"\n--- Scraping KRS Detail: {params} ---")
     target_user = _get_current_user_id(user_id)
     sess = get_authenticated_session(target_user)
@@ -316,140 +611,8 @@ def scrape_krs_detail(params: Dict[str, str], user_id=None) -> Dict[str, Any]:
         #     return {"success": False, "message": "Sesi kedaluwarsa. Silakan refresh."}
 
         resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "lxml")
-        ada_prak = soup.find(string=re.compile(r"Group\s*Prak", re.IGNORECASE))
-        
-        # Tentukan judul dinamis buat Tabel Mahasiswa
-        judul_tabel_mhs = "Data Praktikum Mahasiswa" if ada_prak else "Data Peserta Mahasiswa"
-        # =================================================================
-        # --- 1. AMBIL METADATA (Untuk kasus t=matakuliah) ---
-        # Mencari teks di body yang bukan bagian dari tabel, lalu cari pola "Label: Value"
-        metadata = {}
-        full_text = soup.get_text(separator="\n")
-        
-        # Regex sederhana untuk menangkap "Label: Value" (misal: "Dosen: Budi")
-        # Kita batasi agar tidak mengambil isi tabel
-        lines = full_text.split('\n')
-        for line in lines:
-            if ":" in line:
-                parts = line.split(":", 1)
-                key = parts[0].strip()
-                val = parts[1].strip()
-                # Filter supaya gak ambil sampah (key terlalu panjang biasanya bukan label)
-                if len(key) < 50 and val: 
-                    metadata[key] = val
-        
-        # =================================================================
-        # --- 2. AMBIL TABEL ---
-        tables_list = []
-        html_tables = soup.find_all("table")
-        
-        for table in html_tables:
-            # --- Coba Cari Judul Tabel ---
-            # Cari elemen text sebelumnya (misal "PESERTA KULIAH")
-            title = ""
-            
-            # Logic: Mundur ke elemen sebelumnya sampai ketemu text yang bukan kosong
-            prev_el = table.previous_sibling
-            while prev_el:
-                if isinstance(prev_el, str) and prev_el.strip():
-                    title = prev_el.strip()
-                    found_title = prev_el.strip()
-                    title = found_title
-                    break
-                if hasattr(prev_el, 'get_text') and prev_el.get_text(strip=True):
-                    found_title = prev_el.get_text(strip=True)
-                    title = prev_el.get_text(strip=True)
-                    title = found_title
-                    break
-                prev_el = prev_el.previous_sibling
-            
-            # Bersihkan judul (kadang kebawa tanda baca aneh)
-            title = re.sub(r'[^\w\s]', '', title).strip() or "Detail"
-# --- Parse Header ---
-            headers = []
-            thead = table.find("thead")
-            if thead:
-                headers = [th.get_text(strip=True) for th in thead.find_all("th")]
-            
-            if not headers:
-                first_tr = table.find("tr")
-                if first_tr:
-                    headers = [ele.get_text(strip=True) for ele in first_tr.find_all(["th", "td"])]
-
-            # Fallback nama kolom
-            headers = [h if h else f"Kolom {i+1}" for i, h in enumerate(headers)]
-
-            # =============================================================
-            # [LOGIC TITLE] PENENTUAN JUDUL TABEL
-            # =============================================================
-            # Gabung header jadi string lowercase buat pengecekan
-            headers_str = " ".join(headers).lower()
-
-            if "nim" in headers_str or "nama" in headers_str:
-                # Ini pasti tabel daftar mahasiswa -> Pakai judul dinamis
-                title = judul_tabel_mhs
-            elif "dosen" in headers_str or "matakuliah" in headers_str or "sks" in headers_str:
-                # Ini tabel metadata (yang isinya rows group prak tadi)
-                title = "Detail Mata Kuliah"
-            else:
-                # Fallback title (mencoba cari judul dari text sebelumnya seperti kode lama)
-                title = "Data Lainnya"
-                prev_el = table.previous_sibling
-                while prev_el:
-                    if isinstance(prev_el, str) and prev_el.strip():
-                        title = prev_el.strip()
-                        break
-                    if hasattr(prev_el, 'get_text') and prev_el.get_text(strip=True):
-                        title = prev_el.get_text(strip=True)
-                        break
-                    prev_el = prev_el.previous_sibling
-                title = re.sub(r'[^\w\s]', '', title).strip() or "Tabel Data"
-            # --- Parse Rows ---
-            rows_data = []
-            all_trs = table.find_all("tr")
-            
-            # Skip header row?
-            start_idx = 0
-            # Jika headers diambil dari tr pertama dan tidak ada thead, skip tr pertama
-            if not thead and all_trs and headers:
-                # Cek apakah tr pertama isinya sama persis dengan headers
-                first_tr_text = [e.get_text(strip=True) for e in all_trs[0].find_all(["th", "td"])]
-                if first_tr_text == headers:
-                    start_idx = 1
-
-            tbody = table.find("tbody")
-            tr_source = tbody.find_all("tr") if tbody else all_trs[start_idx:]
-
-            for tr in tr_source:
-                cols = tr.find_all("td")
-                if not cols: continue
-                # Skip baris kosong
-                if len(cols) == 1 and not cols[0].get_text(strip=True): continue
-
-                row_obj = {}
-                for idx, td in enumerate(cols):
-                    val = td.get_text(strip=True)
-                    link = td.find("a")
-                    
-                    if idx < len(headers):
-                        col_name = headers[idx]
-                        row_obj[col_name] = val
-                        if link and link.get("href"):
-                            row_obj[f"{col_name}_link"] = link.get("href")
-                
-                if row_obj:
-                    rows_data.append(row_obj)
-            
-            # Masukkan ke list tables jika ada isinya
-            if headers or rows_data:
-                tables_list.append({
-                    "title": title,
-                    "headers": headers,
-                    "rows": rows_data
-                })
-        
-        # --- 3. RETURN HASIL ---
+        metadata, tables_list = parse_krs_detail(resp.text)
+
         return {
             "success": True,
             "metadata": metadata,
@@ -460,40 +623,69 @@ def scrape_krs_detail(params: Dict[str, str], user_id=None) -> Dict[str, Any]:
         logging.error(f"Error scrape krs detail: {e}")
         return {"success": False, "message": str(e)}
 
-def _generic_search(endpoint, query, label, user_id=None) -> pd.DataFrame:
+def get_search_cache_stats():
+    with _search_cache_lock:
+        _search_cache.expire()
+        st = dict(_search_cache_stats, entries=len(_search_cache), bytes=_search_cache.currsize,
+                  max_bytes=SEARCH_CACHE_MAX_BYTES, evictions=_search_cache.evictions,
+                  ttl=SEARCH_CACHE_TTL, empty_ttl=SEARCH_CACHE_EMPTY_TTL)
+    st["hit_rate"] = round(st["hits"] / st["requests"], 3) if st["requests"] else None
+    return st
+
+def _generic_search(endpoint, query, label, user_id=None) -> Optional[List[Dict[str, str]]]:
     """Helper function untuk search mhs/staff agar tidak duplikasi kode"""
+    key = (endpoint, _normalize_query(query))
+    with _search_cache_lock:
+        _search_cache_stats["requests"] += 1
+        cached = _search_cache.get(key)
+        if cached is not None:
+            _search_cache_stats["hits"] += 1
+            if not cached:
+                _search_cache_stats["empty_hits"] += 1
+            return [dict(row) for row in cached]  # caller bebas mengubah hasilnya
+        _search_cache_stats["misses"] += 1
+
+    target_user = _get_current_user_id(user_id)
+    rows = _flight.do(("_generic_search",) + key, _generic_search_upstream, endpoint, query, label, target_user)
+    if rows is None:
+        return None
+    with _search_cache_lock:
+        try:
+            _search_cache[key] = [dict(row) for row in rows]
+            _search_cache_stats["stored"] += 1
+        except ValueError:  # satu hasil lebih besar dari seluruh budget
+            _search_cache_stats["too_large"] += 1
+    return rows
+
+def _generic_search_upstream(endpoint, query, label, user_id=None) -> Optional[List[Dict[str, str]]]:
     logging.info(f"\n--- Cari {label}: '{query}' ---")
     target_user = _get_current_user_id(user_id)
     sess = get_authenticated_session(target_user)
-    if not sess: return pd.DataFrame()
+    if not sess: return None
     try:
         search_url = urljoin(TARGET_URL, f"{endpoint}?q={quote(query)}")
         resp = sess.get(search_url, timeout=20)
         resp.raise_for_status()
         
-        soup = BeautifulSoup(resp.text, "lxml")
-        # Cari tabel pertama yang sicycatable (biasanya hasil pencarian)
-        table = soup.find("table", class_=re.compile(r"\bsicycatable\b"))
+        # Tabel sicycatable pertama (biasanya hasil pencarian)
+        table = extract_table(resp.text, KOMUNITAS_SEARCH)
         
-        if not table:
+        if table is None:
             logging.info(f"   --> Tidak ada hasil {label}.")
-            return pd.DataFrame()
-            
-        headers = [th.get_text(strip=True) for th in table.find_all("th")]
-        rows = [[td.get_text(strip=True) for td in tr.find_all("td")] for tr in table.find_all("tr") if tr.find("td")]
-        
-        df = pd.DataFrame(rows, columns=headers)
-        df.columns = df.columns.str.strip()
-        return df
+            return []
+        headers = [h.strip() for h in table.headers]
+        return [dict(zip(headers, row)) for row in table.rows]
     except Exception as e:
         logging.error(f"Error cari {label}: {e}")
-        return pd.DataFrame()
+        return None
 
-def search_mahasiswa(query):
-    return _generic_search("/komunitas/mahasiswa/", query, "Mahasiswa")
+def search_mahasiswa(query, user_id=None):
+    """List dict per baris (kolom sesuai header Sicyca), [] kalau tidak ada hasil, None kalau Sicyca gagal."""
+    return _generic_search("/komunitas/mahasiswa/", query, "Mahasiswa", user_id)
 
-def search_staff(query):
-    return _generic_search("/komunitas/staff/", query, "Staff")
+def search_staff(query, user_id=None):
+    """Sama seperti search_mahasiswa, untuk /komunitas/staff/."""
+    return _generic_search("/komunitas/staff/", query, "Staff", user_id)
 
 def fetch_photo_from_sicyca(role, id_, user_id=None):
     """
@@ -502,11 +694,54 @@ def fetch_photo_from_sicyca(role, id_, user_id=None):
     id_: NIM (untuk mahasiswa) atau NIK (untuk staff)
     Returns: bytes of image content, or None if failed.
     """
+    content, _ = fetch_photo_status(role, id_, user_id)
+    return content
+
+def fetch_photo_status(role, id_, user_id=None):
+    """
+    Sama seperti fetch_photo_from_sicyca, tapi juga membedakan kenapa gagal.
+    Return (bytes|None, status): "ok", "missing" (404/bukan gambar -> aman di-negative-cache) atau "error".
+    """
+    target_user = _get_current_user_id(user_id)
+    key = ("fetch_photo_from_sicyca", target_user, role, str(id_).strip())
+    return _flight.do(key, _fetch_photo_upstream, role, id_, target_user)
+
+def fetch_photos_concurrent(pairs, user_id=None):
+    """
+    Generator: fetch banyak foto [(role, id_), ...] sekaligus di pool terbatas dengan SATU session.
+    Yield (role, id_, bytes|None, status) sesuai urutan selesai (bukan urutan input).
+    """
+    if not pairs:
+        return
     target_user = _get_current_user_id(user_id)
     sess = get_authenticated_session(target_user)
+    if not sess:
+        logging.error(f"   --> Batch foto ({len(pairs)}) gagal: Session tidak valid.")
+        for role, id_ in pairs:
+            yield role, id_, None, "error"
+        return
+
+    futures = {
+        _photo_pool.submit(_flight.do, ("fetch_photo_from_sicyca", target_user, role, str(id_).strip()),
+                           _fetch_photo_upstream, role, id_, target_user, sess): (role, id_)
+        for role, id_ in pairs
+    }
+    for future in as_completed(futures):
+        role, id_ = futures[future]
+        try:
+            content, status = future.result()
+        except Exception as e:
+            logging.error(f"   --> Batch foto {role}/{id_} error: {e}")
+            content, status = None, "error"
+        yield role, id_, content, status
+
+def _fetch_photo_upstream(role, id_, user_id=None, sess=None):
+    target_user = _get_current_user_id(user_id)
+    if sess is None:
+        sess = get_authenticated_session(target_user)
     if not sess:
         logging.error(f"   --> Gagal fetch foto {role}/{id_}: Session tidak valid.")
-        return None
+        return None, "error"
     
     try:
         if role == "mahasiswa":
@@ -518,20 +753,27 @@ def fetch_photo_from_sicyca(role, id_, user_id=None):
         
         logging.info(f"   --> Fetching foto dari {photo_url}")
         response = sess.get(photo_url, timeout=10, headers={"Referer": TARGET_URL})
+        if response.status_code == 404:
+            logging.info(f"   --> Foto {role}/{id_} tidak ada di Sicyca (404).")
+            return None, "missing"
         response.raise_for_status()
         
         if response.headers.get('content-type', '').startswith('image/'):
             logging.info(f"   --> Foto {role}/{id_} berhasil di-fetch ({len(response.content)} bytes).")
-            return response.content
+            return response.content, "ok"
+        elif GATE_ROOT in response.url:
+            # Dilempar ke halaman login Gate = sesi habis, bukan fotonya yang tidak ada
+            logging.warning(f"   --> Fetch foto {role}/{id_} dialihkan ke Gate (sesi habis).")
+            return None, "error"
         else:
             logging.warning(f"   --> Response bukan image untuk {role}/{id_}.")
-            return None
+            return None, "missing"
     except requests.RequestException as e:
         logging.error(f"   --> Gagal fetch foto {role}/{id_}: {e}")
-        return None
+        return None, "error"
     except Exception as e:
         logging.error(f"   --> Error tak terduga saat fetch foto {role}/{id_}: {e}")
-        return None
+        return None, "error"
         
     
         
@@ -540,102 +782,84 @@ def fetch_data_ultah(force_refresh=False, user_id=None):
     """
     Mengambil data ulang tahun, memparsing format DD-MM-YYYY, 
     menghitung umur, dan menyesuaikan key output untuk frontend.
+    Hasil di-cache sampai tengah malam (Asia/Jakarta), dipakai bersama semua user.
+    force_refresh=True -> abaikan cache dan ambil ulang dari Sicyca.
     """
-    target_user = _get_current_user_id(user_id)
-    
+    if not force_refresh and _cache_data and time.time() < _cache_expire_at:
+        return _cache_data
+    # Banyak user buka index barengan setelah cache habis -> cukup 1 request ke Sicyca
+    return _flight.do(("fetch_data_ultah", force_refresh), _fetch_data_ultah_upstream, user_id)
+
+def _fetch_data_ultah_upstream(user_id=None):
+    global _cache_data, _cache_expire_at
+    raw_data = sicyca_api_batch(["ultah"], user_id)["ultah"]
+    if raw_data is None:
+        return {"error": True, "message": "Gagal mengambil data ulang tahun.", "rows": []}
+    result = _format_ultah(raw_data)
+    _cache_data, _cache_expire_at = result, _midnight_epoch()
+    logging.info(f"[ULTAH] Cache diperbarui sampai {datetime.fromtimestamp(_cache_expire_at, JKT):%Y-%m-%d %H:%M}.")
+    return result
+
+def _format_ultah(raw_data):
     # Mapping Bulan Indonesia (Untuk format tampilan: 10 Desember 2024)
     bulan_indo = {
         1: "Januari", 2: "Februari", 3: "Maret", 4: "April", 5: "Mei", 6: "Juni",
         7: "Juli", 8: "Agustus", 9: "September", 10: "Oktober", 11: "November", 12: "Desember"
     }
 
-    for attempt in range(2):
-        s = get_authenticated_session(target_user)
-        if not s: 
-            if attempt == 0: continue
-            return {"error": True, "message": "Gagal mendapatkan sesi valid.", "rows": []}
-
-        try:
-            nim, token = _get_api_params(target_user, s)
-            if not nim or not token:
-                if attempt == 0: continue 
-                return {"error": True, "message": "Gagal mengambil Token/NIM.", "rows": []}
-            
-            payload = {"nim": nim, "token": token, "ultah": True}
-            
-            logging.info(f"[ULTAH] Mengambil data ultah (Attempt {attempt+1})...")
-            r = s.post(f"{TARGET_URL}{API_SICYCA}", data=payload, timeout=20)
-            
-            if r.status_code == 200:
-                try:
-                    raw_data = r.json()
-                    
-                    # 1. Ambil list data mentah berdasarkan struktur JSON yang kamu kirim
-                    # Struktur: { "data": [ { "NAMA": "...", ... }, ... ] }
-                    raw_rows = []
-                    if isinstance(raw_data, dict):
-                        raw_rows = raw_data.get('data', [])
-                    elif isinstance(raw_data, list):
-                        raw_rows = raw_data
-                    
-                    formatted_rows = []
-                    now = datetime.now(JKT) # Waktu server sekarang (Asia/Jakarta)
-
-                    for item in raw_rows:
-                        # 2. Ambil Key Huruf Kapital (Bukan Angka)
-                        nama = item.get('NAMA', 'Tanpa Nama')
-                        prodi = item.get('PRODI', '-')
-                        tgl_raw = item.get('TANGGAL', '') # Contoh: "10-12-2004"
-                        
-                        tgl_display = tgl_raw
-                        umur = "??"
-
-                        # 3. Parsing Tanggal & Hitung Umur
-                        if tgl_raw and len(tgl_raw) >= 10:
-                            try:
-                                # Parsing format "10-12-2004" (DD-MM-YYYY)
-                                dt = datetime.strptime(tgl_raw[:10], '%d-%m-%Y')
-                                
-                                # Format ulang jadi "10 Desember 2004" (Agar frontend bisa split)
-                                tgl_display = f"{dt.day} {bulan_indo[dt.month]} {dt.year}"
-                                
-                                # Hitung Umur
-                                # Logic: Tahun sekarang - Tahun lahir, dikurangi 1 jika ulang tahun belum lewat tahun ini
-                                umur_val = now.year - dt.year - ((now.month, now.day) < (dt.month, dt.day))
-                                umur = str(umur_val)
-                            except ValueError as ve:
-                                logging.warning(f"[ULTAH] Gagal parse tanggal {tgl_raw}: {ve}")
-                                # Fallback jika format tanggal beda/error, tetap tampilkan raw
-                                tgl_display = tgl_raw
-                        
-                        # 4. Susun Object Sesuai Frontend (renderUltah)
-                        # Frontend butuh: nama, prodi, tanggal_lahir, umur
-                        formatted_rows.append({
-                            "nama": nama,
-                            "prodi": prodi,
-                            "tanggal_lahir": tgl_display, 
-                            "umur": umur
-                        })
-
-                    logging.info(f"[ULTAH] Berhasil memproses {len(formatted_rows)} data.")
-                    
-                    return {
-                        "error": False, 
-                        "message": "Data ulang tahun berhasil diambil.", 
-                        "jumlah": len(formatted_rows),
-                        "tanggal_hari_ini": f"{now.day} {bulan_indo[now.month]} {now.year}", # Tambahan info tanggal hari ini
-                        "rows": formatted_rows
-                    }
-                    
-                except json.JSONDecodeError: 
-                    logging.warning("[ULTAH] Respon bukan JSON.")
-                    if attempt == 0: continue
-            else:
-                logging.warning(f"[ULTAH] Status Code {r.status_code}")
-                if attempt == 0: continue
+    # 1. Ambil list data mentah berdasarkan struktur JSON yang kamu kirim
+    # Struktur: { "data": [ { "NAMA": "...", ... }, ... ] }
+    raw_rows = []
+    if isinstance(raw_data, dict):
+        raw_rows = raw_data.get('data', [])
+    elif isinstance(raw_data, list):
+        raw_rows = raw_data
+    
+    formatted_rows = []
+    now = datetime.now(JKT) # Waktu server sekarang (Asia/Jakarta)
+
+    for item in raw_rows:
+        # 2. Ambil Key Huruf Kapital (Bukan Angka)
+        nama = item.get('NAMA', 'Tanpa Nama')
+        prodi = item.get('PRODI', '-')
+        tgl_raw = item.get('TANGGAL', '') # Contoh: "10-12-2004"
+        
+        tgl_display = tgl_raw
+        umur = "??"
+
+        # 3. Parsing Tanggal & Hitung Umur
+        if tgl_raw and len(tgl_raw) >= 10:
+            try:
+                # Parsing format "10-12-2004" (DD-MM-YYYY)
+                dt = datetime.strptime(tgl_raw[:10], '%d-%m-%Y')
                 
-        except Exception as e:
-            logging.error(f"[ULTAH] Error: {e}")
-            if attempt == 0: continue
-            
-    return {"error": True, "message": "Gagal mengambil data ulang tahun.", "rows": []}
\ No newline at end of file
+                # Format ulang jadi "10 Desember 2004" (Agar frontend bisa split)
+                tgl_display = f"{dt.day} {bulan_indo[dt.month]} {dt.year}"
+                
+                # Hitung Umur
+                # Logic: Tahun sekarang - Tahun lahir, dikurangi 1 jika ulang tahun belum lewat tahun ini
+                umur_val = now.year - dt.year - ((now.month, now.day) < (dt.month, dt.day))
+                umur = str(umur_val)
+            except ValueError as ve:
+                logging.warning(f"[ULTAH] Gagal parse tanggal {tgl_raw}: {ve}")
+                # Fallback jika format tanggal beda/error, tetap tampilkan raw
+                tgl_display = tgl_raw
+        
+        # 4. Susun Object Sesuai Frontend (renderUltah)
+        # Frontend butuh: nama, prodi, tanggal_lahir, umur
+        formatted_rows.append({
+            "nama": nama,
+            "prodi": prodi,
+            "tanggal_lahir": tgl_display, 
+            "umur": umur
+        })
+
+    logging.info(f"[ULTAH] Berhasil memproses {len(formatted_rows)} data.")
+    
+    return {
+        "error": False, 
+        "message": "Data ulang tahun berhasil diambil.", 
+        "jumlah": len(formatted_rows),
+        "tanggal_hari_ini": f"{now.day} {bulan_indo[now.month]} {now.year}", # Tambahan info tanggal hari ini
+        "rows": formatted_rows
+    }
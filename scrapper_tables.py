@@ -0,0 +1,415 @@
+# scrapper_tables.py
+# Engine ekstraksi tabel Sicyca (sicycatable dkk) berbasis lxml + XPath terkompilasi.
+# Pengganti pola lama: BeautifulSoup seluruh halaman -> find(string=regex) -> find_parent
+# -> find_next -> find_all bersarang per baris.
+import re
+import logging
+import threading
+
+# Nama class / id yang aman dipakai langsung di XPath & regex
+_NAME_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+_TABLE_TAG_RE = re.compile(r"<(/?)table\b", re.IGNORECASE)
+
+# Teks sel setara bs4 get_text(strip=True): semua text node (tanpa komentar,
+# script, style & template), masing-masing di-strip, yang kosong dibuang, lalu digabung.
+_CELL_TEXT_XPATH = ".//text()[not(ancestor::script) and not(ancestor::style) and not(ancestor::template)]"
+
+
+def _class_pred(cls):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+def _raw_table_re(kind, value):
+    """Regex di HTML mentah untuk tag <table> pembuka dengan id/class tertentu."""
+    if kind == "id":
+        attr = rf"""\bid\s*=\s*["']?{re.escape(value)}(?![\w-])"""
+    else:
+        attr = rf"""\bclass\s*=\s*["'][^"']*(?<![\w-]){re.escape(value)}(?![\w-])"""
+    return re.compile(rf"<table\b[^>]*{attr}", re.IGNORECASE)
+
+
+class TableSpec:
+    """
+    Spesifikasi tabel yang mau diambil, dikompilasi SEKALI (XPath & regex) lalu dipakai ulang.
+
+    tables   : list selector (kind, value) dicoba berurutan, kind 'class' atau 'id'.
+               Contoh KRS: [('id', 'tableView'), ('class', 'sicycatablemanual')].
+    anchor   : regex teks judul (opsional). Kalau ada, tabel yang diambil adalah tabel
+               pertama SETELAH elemen judul itu (div.<anchor_class>).
+    skip_rows: buang N baris pertama (mis. baris header tanpa <td>).
+    rows_with_td: hanya ambil <tr> yang punya <td> (perilaku scrape lama).
+    """
+    def __init__(self, name, tables, anchor=None, anchor_class="tabletitle",
+                 skip_rows=0, rows_with_td=True, header_normalizer=str.strip):
+        for kind, value in tables:
+            if kind not in ("class", "id") or not _NAME_RE.match(value):
+                raise ValueError(f"Selector tabel tidak valid: {(kind, value)}")
+        if anchor_class and not _NAME_RE.match(anchor_class):
+            raise ValueError(f"anchor_class tidak valid: {anchor_class}")
+
+        self.name = name
+        self.tables = list(tables)
+        self.anchor = re.compile(anchor, re.IGNORECASE) if isinstance(anchor, str) else anchor
+        self.anchor_class = anchor_class
+        self.skip_rows = skip_rows
+        self.rows_with_td = rows_with_td
+        self.header_normalizer = header_normalizer
+        self._raw_tables = [_raw_table_re(kind, value) for kind, value in self.tables]
+        self._compiled = None
+        self._compile_lock = threading.Lock()
+
+    def _table_pred(self, kind, value):
+        return f"@id='{value}'" if kind == "id" else _class_pred(value)
+
+    def compiled(self):
+        """XPath dikompilasi saat pertama dipakai (lxml ikut lazy, tidak dibayar saat boot)."""
+        if self._compiled is None:
+            with self._compile_lock:
+                if self._compiled is None:
+                    from lxml import etree
+                    ns = {"re": "http://exslt.org/regular-expressions"}
+                    compiled = {
+                        "headers": etree.XPath(".//th"),
+                        "rows": etree.XPath(".//tr[.//td]" if self.rows_with_td else ".//tr"),
+                        "cells": etree.XPath(".//td"),
+                        "text": etree.XPath(_CELL_TEXT_XPATH),
+                        "tables": [],
+                    }
+                    if self.anchor is not None:
+                        # Text node pertama yang cocok -> div judul terdekat -> tabel sesudahnya.
+                        # 'anchor_literal' = teks persis hasil regex di HTML mentah (contains() murni C,
+                        # jauh lebih cepat); 'anchor' (regex EXSLT) jadi cadangan.
+                        div_step = f"/ancestor::div[{_class_pred(self.anchor_class)}][1]"
+                        compiled["anchor_literal"] = etree.XPath("(//text()[contains(., $literal)])[1]" + div_step)
+                        compiled["anchor"] = etree.XPath(
+                            "(//text()[re:test(., $pattern, 'i')])[1]" + div_step,
+                            namespaces=ns
+                        )
+                    for kind, value in self.tables:
+                        pred = self._table_pred(kind, value)
+                        if self.anchor is not None:
+                            # Setara bs4 find_next: turunan elemen judul ATAU elemen sesudahnya
+                            xp = f"(descendant::table[{pred}] | following::table[{pred}])[1]"
+                        else:
+                            xp = f"(//table[{pred}])[1]"
+                        compiled["tables"].append(etree.XPath(xp))
+                    self._compiled = compiled
+        return self._compiled
+
+    def __repr__(self):
+        return f"TableSpec({self.name!r})"
+
+
+class ExtractedTable:
+    """Hasil ekstraksi: headers (list str), rows (list of list str), cells (elemen <td> per baris)."""
+    __slots__ = ("headers", "rows", "cells")
+
+    def __init__(self, headers, rows, cells):
+        self.headers = headers
+        self.rows = rows
+        self.cells = cells
+
+    def records(self):
+        """Baris sebagai list dict {header: nilai} (header harus sama panjang dgn baris)."""
+        return [dict(zip(self.headers, row)) for row in self.rows]
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def cell_text(spec, element):
+    """Teks elemen setara bs4 get_text(strip=True)."""
+    return "".join(t.strip() for t in spec.compiled()["text"](element))
+
+
+def cell_attr(element, tag, attr):
+    """Atribut dari elemen <tag> pertama di dalam sel (mis. onclick <a>), None kalau tidak ada."""
+    found = element.find(f".//{tag}")
+    return found.get(attr) if found is not None else None
+
+
+def _balanced_table_end(html, table_start):
+    """Posisi akhir </table> yang menutup <table> di table_start (memperhitungkan tabel bersarang)."""
+    depth = 0
+    for m in _TABLE_TAG_RE.finditer(html, table_start):
+        if m.group(1):
+            depth -= 1
+            if depth == 0:
+                close = html.find(">", m.end())
+                return len(html) if close < 0 else close + 1
+        else:
+            depth += 1
+    return len(html)
+
+
+def _narrow(html, spec):
+    """
+    Potong HTML mentah ke bagian yang relevan saja (judul + tabel target) sebelum di-parse.
+    Return potongan string, atau None kalau tidak bisa dipastikan (caller parse full halaman).
+    """
+    start = 0
+    if spec.anchor is not None:
+        m = spec.anchor.search(html)
+        if not m:
+            return None
+        start = html.rfind("<div", 0, m.start())
+        if start < 0:
+            return None
+
+    for raw_re in spec._raw_tables:
+        t = raw_re.search(html, start)
+        if t:
+            fragment = html[start:_balanced_table_end(html, t.start())]
+            # Komentar/script bisa berisi "<table"/"</table>" palsu -> hitungan tag tidak bisa dipercaya
+            if "<!--" in fragment or "<script" in fragment.lower():
+                return None
+            return fragment
+    return None
+
+
+def _parse(html):
+    import lxml.html
+    return lxml.html.document_fromstring(html)
+
+
+def _find_table(root, spec, html):
+    compiled = spec.compiled()
+    context = root
+    if spec.anchor is not None:
+        m = spec.anchor.search(html)
+        if not m:
+            return None
+        found = compiled["anchor_literal"](root, literal=m.group(0))
+        if not found:
+            found = compiled["anchor"](root, pattern=spec.anchor.pattern)
+        if not found:
+            return None
+        context = found[0]
+    for xp in compiled["tables"]:
+        found = xp(context)
+        if found:
+            return found[0]
+    return None
+
+
+def _extract_from(table, spec):
+    compiled = spec.compiled()
+    text_xp = compiled["text"]
+    cells_xp = compiled["cells"]
+
+    headers = [spec.header_normalizer("".join(t.strip() for t in text_xp(th)))
+               for th in compiled["headers"](table)]
+    rows, cells = [], []
+    for tr in compiled["rows"](table)[spec.skip_rows:]:
+        tds = cells_xp(tr)
+        cells.append(tds)
+        rows.append(["".join(t.strip() for t in text_xp(td)) for td in tds])
+    return ExtractedTable(headers, rows, cells)
+
+
+def extract_table(html, spec, narrow=True):
+    """
+    Ambil tabel sesuai spec dari HTML halaman. Return ExtractedTable atau None kalau tidak ketemu.
+    narrow=True: parse potongan HTML yang relevan saja; kalau gagal, otomatis parse full halaman.
+    """
+    if not html:
+        return None
+    if spec.anchor is not None and not spec.anchor.search(html):
+        # Judul tidak ada di HTML mentah -> tidak perlu parse sama sekali
+        return None
+
+    if narrow:
+        fragment = _narrow(html, spec)
+        if fragment is not None:
+            try:
+                table = _find_table(_parse(fragment), spec, fragment)
+            except Exception as e:
+                logging.debug(f"[TableSpec {spec.name}] Parse potongan gagal, fallback full: {e}")
+                table = None
+            if table is not None:
+                return _extract_from(table, spec)
+
+    table = _find_table(_parse(html), spec, html)
+    if table is None:
+        return None
+    return _extract_from(table, spec)
+
+
+# === Spesifikasi tabel Sicyca yang dipakai scraper ===
+JADWAL_MINGGU_INI = TableSpec(
+    "jadwal_minggu_ini",
+    tables=[("class", "sicycatable")],
+    anchor=r"JADWAL KEGIATAN MINGGU INI",
+)
+KOMUNITAS_SEARCH = TableSpec(
+    "komunitas_search",
+    tables=[("class", "sicycatable")],
+)
+KRS_LIST = TableSpec(
+    "krs_list",
+    tables=[("id", "tableView"), ("class", "sicycatablemanual")],
+    skip_rows=1,
+    rows_with_td=False,
+)
+
+
+# =====================================================================
+# === Detail KRS (/table-proxy/?t=...) ===
+# Parse sekali pakai lxml: metadata "Label: Value", judul, header, baris & link semua tabel.
+# Output (metadata, tables) identik dengan versi BeautifulSoup lama di scrape_krs_detail.
+# =====================================================================
+_RAW_TEXT_TAGS = ("script", "style", "template")
+_PRAK_RE = re.compile(r"Group\s*Prak", re.IGNORECASE)
+_TITLE_CLEAN_RE = re.compile(r"[^\w\s]")
+_detail_xpaths = None
+
+
+def _detail_xp():
+    global _detail_xpaths
+    if _detail_xpaths is None:
+        from lxml import etree
+        _detail_xpaths = {
+            "text": etree.XPath(_CELL_TEXT_XPATH, smart_strings=False),
+            # Teks halaman untuk metadata (setara soup.get_text(): tanpa komentar/script/style/template)
+            "page_text": etree.XPath(
+                "//text()[not(ancestor::script) and not(ancestor::style) and not(ancestor::template)]",
+                smart_strings=False
+            ),
+            # Deteksi "Group Prak": bs4 find(string=...) ikut melihat script, style & komentar
+            "raw_text": etree.XPath("//text() | //comment()", smart_strings=False),
+        }
+    return _detail_xpaths
+
+
+def _node_text(el, text_xp):
+    """Setara bs4 Tag.get_text(strip=True) (script/style/template mengembalikan isinya sendiri)."""
+    if el.tag in _RAW_TEXT_TAGS:
+        return "".join(t.strip() for t in el.itertext())
+    return "".join(t.strip() for t in text_xp(el))
+
+
+def _previous_title(table, text_xp):
+    """Teks pertama yang tidak kosong dari sibling sebelum tabel (setara loop previous_sibling bs4)."""
+    node = table
+    while True:
+        prev = node.getprevious()
+        if prev is None:
+            parent = node.getparent()
+            text = parent.text if parent is not None else None
+            return text.strip() if text and text.strip() else ""
+        if prev.tail and prev.tail.strip():
+            return prev.tail.strip()
+        if not isinstance(prev.tag, str):
+            # Komentar di bs4 adalah string biasa -> isinya bisa jadi judul
+            if prev.text and prev.text.strip():
+                return prev.text.strip()
+        else:
+            text = _node_text(prev, text_xp)
+            if text:
+                return text
+        node = prev
+
+
+def _has_prak(root, xp):
+    for node in xp["raw_text"](root):
+        text = node if isinstance(node, str) else node.text
+        if text and _PRAK_RE.search(text):
+            return True
+    return False
+
+
+def _parse_detail_table(table, judul_tabel_mhs, text_xp):
+    # Semua <tr> tabel (termasuk tabel bersarang, sama seperti find_all) cukup dijalani sekali
+    all_trs = list(table.iter("tr"))
+    thead = next(table.iter("thead"), None)
+    tbody = next(table.iter("tbody"), None)
+
+    headers = []
+    if thead is not None:
+        headers = [_node_text(th, text_xp) for th in thead.iter("th")]
+
+    first_tr_text = None
+    if not headers and all_trs:
+        first_tr_text = [_node_text(e, text_xp) for e in all_trs[0].iter("th", "td")]
+        headers = list(first_tr_text)
+
+    # Fallback nama kolom
+    headers = [h if h else f"Kolom {i+1}" for i, h in enumerate(headers)]
+
+    headers_str = " ".join(headers).lower()
+    if "nim" in headers_str or "nama" in headers_str:
+        title = judul_tabel_mhs
+    elif "dosen" in headers_str or "matakuliah" in headers_str or "sks" in headers_str:
+        title = "Detail Mata Kuliah"
+    else:
+        title = _previous_title(table, text_xp) or "Data Lainnya"
+        title = _TITLE_CLEAN_RE.sub("", title).strip() or "Tabel Data"
+
+    # Skip tr pertama kalau dia sumber header (tanpa thead & isinya persis sama)
+    start_idx = 0
+    if thead is None and all_trs and headers:
+        if first_tr_text is None:
+            first_tr_text = [_node_text(e, text_xp) for e in all_trs[0].iter("th", "td")]
+        if first_tr_text == headers:
+            start_idx = 1
+
+    tr_source = tbody.iter("tr") if tbody is not None else all_trs[start_idx:]
+    n_headers = len(headers)
+    rows_data = []
+    for tr in tr_source:
+        cols = list(tr.iter("td"))
+        if not cols:
+            continue
+        texts = [_node_text(td, text_xp) for td in cols[:n_headers]]
+        # Skip baris kosong
+        if len(cols) == 1 and not (texts[0] if texts else _node_text(cols[0], text_xp)):
+            continue
+
+        row_obj = {}
+        for idx, val in enumerate(texts):
+            col_name = headers[idx]
+            row_obj[col_name] = val
+            link = next(cols[idx].iter("a"), None)
+            if link is not None and link.get("href"):
+                row_obj[f"{col_name}_link"] = link.get("href")
+        if row_obj:
+            rows_data.append(row_obj)
+
+    if headers or rows_data:
+        return {"title": title, "headers": headers, "rows": rows_data}
+    return None
+
+
+def parse_krs_detail(html):
+    """
+    Parse halaman /table-proxy/ (t=nilai, t=kehadiran, t=matakuliah, ...).
+    Return (metadata, tables): metadata dict "Label: Value" dari teks halaman,
+    tables list {"title", "headers", "rows"}.
+    """
+    if not html or not html.strip():
+        return {}, []
+    root = _parse(html)
+    xp = _detail_xp()
+    text_xp = xp["text"]
+
+    # Judul dinamis buat tabel mahasiswa
+    judul_tabel_mhs = "Data Praktikum Mahasiswa" if _has_prak(root, xp) else "Data Peserta Mahasiswa"
+
+    # --- Metadata: baris "Label: Value" di teks halaman (key < 50 char & value tidak kosong) ---
+    metadata = {}
+    for text in xp["page_text"](root):
+        if ":" not in text:
+            continue
+        for line in text.split("\n"):
+            if ":" in line:
+                key, val = line.split(":", 1)
+                key, val = key.strip(), val.strip()
+                if len(key) < 50 and val:
+                    metadata[key] = val
+
+    tables = []
+    for table in root.iter("table"):
+        parsed = _parse_detail_table(table, judul_tabel_mhs, text_xp)
+        if parsed is not None:
+            tables.append(parsed)
+    return metadata, tables
@@ -0,0 +1,70 @@
+# singleflight.py
+import threading
+import logging
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Gabungkan panggilan IDENTIK yang sedang berjalan bersamaan.
+    Caller pertama (leader) yang benar-benar request ke upstream,
+    caller lain dengan key yang sama cukup menunggu & dapat hasil yang sama.
+    Tidak ada cache: begitu leader selesai, panggilan berikutnya request ulang.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {}  # name -> {"calls", "leaders", "coalesced"}
+
+    def _bump(self, name, field):
+        st = self._stats.setdefault(name, {"calls": 0, "leaders": 0, "coalesced": 0})
+        st[field] += 1
+
+    def do(self, key, fn, *args, **kwargs):
+        """key[0] dipakai sebagai nama metrik (biasanya nama fungsi)."""
+        name = key[0]
+        with self._lock:
+            self._bump(name, "calls")
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._bump(name, "coalesced")
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._bump(name, "leaders")
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            if call.waiters:
+                logging.info(f"[SingleFlight] {name}: {call.waiters} caller ikut hasil request yang sama.")
+            call.event.set()
+
+    def stats(self):
+        with self._lock:
+            out = {name: dict(st) for name, st in self._stats.items()}
+            out["_in_flight"] = len(self._calls)
+        return out
@@ -0,0 +1,39 @@
+# upstream.py
+# Alamat upstream Gate & Sicyca di satu tempat. Default ke server kampus asli,
+# bisa diarahkan ke stand-in lokal (benchmarks/standin_server.py) lewat env:
+#   GATE_URL=http://127.0.0.1:8801 SICYCA_URL=http://127.0.0.1:8802
+import os
+import ipaddress
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GATE_ROOT = os.getenv("GATE_URL", "https://gate.dinamika.ac.id").rstrip("/")
+TARGET_URL = os.getenv("SICYCA_URL", "https://sicyca.dinamika.ac.id").rstrip("/")
+
+# netloc dipakai untuk cek "URL ini sudah di Sicyca?" (dulu hardcode "sicyca.dinamika.ac.id")
+SICYCA_HOST = urlparse(TARGET_URL).netloc
+GATE_HOST = urlparse(GATE_ROOT).hostname or ""
+
+
+def _default_sso_domain():
+    """Domain cookie SSO_TOKEN: parent domain bersama Gate & Sicyca (mis. '.dinamika.ac.id')."""
+    sicyca_host = urlparse(TARGET_URL).hostname or ""
+    try:
+        ipaddress.ip_address(GATE_HOST)
+        return GATE_HOST  # IP (stand-in lokal): cookie harus pakai host persis
+    except ValueError:
+        pass
+    gate_labels, sicyca_labels = GATE_HOST.split("."), sicyca_host.split(".")
+    common = []
+    while gate_labels and sicyca_labels and gate_labels[-1] == sicyca_labels[-1]:
+        common.insert(0, gate_labels.pop())
+        sicyca_labels.pop()
+    if len(common) >= 2 and common != GATE_HOST.split("."):
+        return "." + ".".join(common)
+    return GATE_HOST
+
+
+GATE_COOKIE_DOMAIN = os.getenv("GATE_COOKIE_DOMAIN", GATE_HOST)
+SSO_COOKIE_DOMAIN = os.getenv("SSO_COOKIE_DOMAIN") or _default_sso_domain()